@@ -0,0 +1,147 @@
+import importlib.util
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from data_export import COLUMNS, iter_chunks
+from database_writer import BUSY_TIMEOUT_MS
+from rollups import update_rollups
+
+# Archivo columnar de telemetría: un dataset Parquet particionado por día
+# (carpetas fecha=AAAA-MM-DD) con tipos fijos y compresión zstd. El GPS se
+# guarda en float64 porque en float32 la resolución sería de casi un metro.
+# Además de las columnas de la tabla se guarda el enlace de cada muestra.
+ARCHIVE_COLUMNS = COLUMNS + ["link"]
+FLOAT32_COLUMNS = ["accel_x", "accel_y", "accel_z",
+                   "gyro_roll", "gyro_pitch", "gyro_yaw",
+                   "uv_index", "temperature"]
+
+
+def require_pyarrow():
+    if importlib.util.find_spec("pyarrow") is None:
+        raise RuntimeError("Para usar archivos Parquet instale pyarrow: python -m pip install pyarrow")
+
+
+def archive_schema():
+    """Columnas de cada archivo; la fecha de la partición va en el nombre de la carpeta"""
+    import pyarrow as pa
+    fields = [pa.field("id", pa.int64()), pa.field("timestamp", pa.timestamp("us"))]
+    for column in COLUMNS[2:]:
+        fields.append(pa.field(column, pa.float32() if column in FLOAT32_COLUMNS else pa.float64()))
+    fields.append(pa.field("link", pa.string()))
+    return pa.schema(fields)
+
+
+def archive_partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([pa.field("fecha", pa.date32())]), flavor="hive")
+
+
+def rows_to_table(rows, schema):
+    """Convierte filas de sensor_data (tuplas de ``ARCHIVE_COLUMNS``) en una tabla de Arrow"""
+    import pyarrow as pa
+    columns = list(zip(*rows))
+    arrays = [pa.array(columns[0], pa.int64()),
+              pa.array(columns[1], pa.string()).cast(pa.timestamp("us"))]
+    for i, column in enumerate(ARCHIVE_COLUMNS[2:], start=2):
+        arrays.append(pa.array(columns[i], schema.field(column).type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def export_parquet(conn, task, directory, where, params, order, time_range=None):
+    """Exporta el resultado de la consulta como dataset Parquet particionado por día.
+
+    Cada bloque leído se reparte entre los archivos de sus días, que quedan
+    abiertos hasta el final; la memoria usada no depende del tamaño del rango.
+    """
+    require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    schema = archive_schema()
+    # Nombre único por exportación para poder agregar sesiones al mismo
+    # archivo, aunque se exporte dos veces en el mismo segundo
+    token = f"{datetime.now():%Y%m%d_%H%M%S}-{uuid.uuid4().hex[:8]}"
+    writers = {}
+    count = 0
+    try:
+        for rows in iter_chunks(conn, task, where, params, order, time_range, ARCHIVE_COLUMNS):
+            table = rows_to_table(rows, schema)
+            days = table.column("timestamp").cast(pa.date32())
+            for day in pc.unique(days).to_pylist():
+                writer = writers.get(day)
+                if writer is None:
+                    folder = os.path.join(directory, f"fecha={day}")
+                    os.makedirs(folder, exist_ok=True)
+                    writer = pq.ParquetWriter(os.path.join(folder, f"parte-{token}.parquet"),
+                                              schema, compression="zstd")
+                    writers[day] = writer
+                writer.write_table(table.filter(pc.equal(days, pa.scalar(day, pa.date32()))))
+            count += len(rows)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return count
+
+
+def open_dataset(directory):
+    require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    # Con el esquema fijo, los archivos exportados antes de guardar el
+    # enlace se leen con la columna link vacía
+    schema = archive_schema().append(pa.field("fecha", pa.date32()))
+    return ds.dataset(directory, format="parquet", schema=schema, partitioning=archive_partitioning())
+
+
+def range_filter(time_range):
+    """Filtro de Arrow equivalente a inicio <= timestamp < fin.
+
+    También filtra por la columna de partición, así solo se abren los
+    archivos de los días incluidos en el rango.
+    """
+    import pyarrow.dataset as ds
+    start, end = (datetime.fromisoformat(value) for value in time_range)
+    return ((ds.field("fecha") >= start.date()) & (ds.field("fecha") <= end.date())
+            & (ds.field("timestamp") >= start) & (ds.field("timestamp") < end))
+
+
+def table_rows(table):
+    """Filas de una tabla de Arrow en el mismo formato que devuelve SQLite"""
+    columns = [table.column(column).to_pylist() for column in COLUMNS]
+    columns[1] = [str(value) if value is not None else None for value in columns[1]]
+    return list(zip(*columns))
+
+
+def import_parquet(db_path, directory, batch_size=5000):
+    """Carga un archivo Parquet en sensor_data; devuelve la cantidad de filas.
+
+    Los registros reciben ids nuevos para no chocar con los existentes. Los
+    agregados se actualizan en la misma transacción que cada lote, como en
+    ``serial_capture.ingest_capture``. Los lotes son chicos para que el
+    ``DatabaseWriter`` de una captura en curso no espere más que unos
+    milisegundos por el bloqueo de escritura.
+    """
+    dataset = open_dataset(directory)
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    count = 0
+    try:
+        for batch in dataset.to_batches(columns=ARCHIVE_COLUMNS[1:], batch_size=batch_size):
+            columns = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+            columns[0] = [str(value) if value is not None else None for value in columns[0]]
+            with conn:
+                # El último id se lee con el bloqueo de escritura ya tomado (ver DatabaseWriter)
+                conn.execute("BEGIN IMMEDIATE")
+                last_id = conn.execute("SELECT coalesce(max(id), 0) FROM sensor_data").fetchone()[0]
+                conn.executemany(f'''
+                INSERT INTO sensor_data ({", ".join(ARCHIVE_COLUMNS[1:])})
+                VALUES ({", ".join("?" * len(ARCHIVE_COLUMNS[1:]))})
+                ''', zip(*columns))
+                update_rollups(conn, last_id)
+            count += batch.num_rows
+    finally:
+        conn.close()
+    return count
@@ -0,0 +1,457 @@
+"""Benchmarks de la estación terrena: ingesta, consultas y dibujo.
+
+Se ejecutan sin ventana (plataforma "offscreen" de Qt) y guardan los
+resultados en JSON para comparar entre commits:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --filas 10000,100000,1000000,10000000
+    python benchmarks/run_benchmarks.py --comparar benchmarks/resultados/anterior.json
+
+Las bases de datos de prueba se generan con el simulador en una carpeta
+temporal; con ``--datos CARPETA`` se conservan y se reutilizan.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from database import Database  # noqa: E402
+# main importa QtWebEngineWidgets, que debe cargarse antes de crear la QApplication
+from main import LiveGraph, MapaFolium  # noqa: E402
+from PyQt5.QtCore import QDateTime  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+from conect.frames import encode_sample  # noqa: E402
+from conect.serial_client import SerialDataClient  # noqa: E402
+from data_sources import SyntheticGenerator  # noqa: E402
+from database_writer import INSERT_SQL  # noqa: E402
+from rollups import backfill_rollups  # noqa: E402
+from serial_capture import CaptureIngest, CaptureWriter, ingest_capture, read_chunks  # noqa: E402
+
+SAMPLE_PERIOD = 0.1  # Segundos entre muestras de las bases generadas
+REGRESSION_RATIO = 1.2  # Más lento que esto respecto de la referencia es regresión
+
+
+def summarize(times, items=1):
+    """Estadísticas de una lista de tiempos en segundos; ``items`` por repetición"""
+    times = np.asarray(times)
+    result = {
+        "n": len(times),
+        "min_ms": float(times.min() * 1000),
+        "median_ms": float(np.median(times) * 1000),
+        "p95_ms": float(np.percentile(times, 95) * 1000),
+        "mean_ms": float(times.mean() * 1000),
+    }
+    if items > 1:
+        result["items"] = items
+        result["items_per_s"] = float(items / np.median(times))
+    return result
+
+
+def measure(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def wait_until(app, condition, timeout=120.0):
+    """Procesa eventos de Qt hasta que se cumpla la condición"""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("El benchmark no terminó a tiempo")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def sample_rows(count, seed=1):
+    """Valores simulados como lista de tuplas de 10 canales"""
+    _, values = SyntheticGenerator(seed).batch(count, SAMPLE_PERIOD)
+    return [tuple(row) for row in values.tolist()]
+
+
+# ---- Ingesta ----
+
+def bench_frame_decode(count=20000, chunk_size=4096):
+    """SerialDataClient.feed con tramas binarias y con líneas JSON"""
+    results = {}
+    rows = sample_rows(count)
+    for wire in ("binario", "json"):
+        stream = b"".join(encode_sample(wire, seq, seq * 100, row) for seq, row in enumerate(rows))
+        chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+        decoded = []
+
+        def run():
+            decoded.clear()
+            client = SerialDataClient(chunk_size=chunk_size)
+            client.set_callback(decoded.append)
+            for chunk in chunks:
+                client.feed(chunk)
+
+        times = measure(run, repeat=5)
+        assert len(decoded) == count
+        results[f"decodificacion_{wire}"] = summarize(times, count)
+    return results
+
+
+def bench_insert(workdir, count=50000):
+    """Database.insert_data: costo de encolar y muestras guardadas por segundo.
+
+    Si la cola del escritor se llena se espera a que baje, así se mide el
+    ritmo sostenido de escritura y no la cantidad de descartes.
+    """
+    path = os.path.join(workdir, "insercion.db")
+    rows = [(datetime.now(),) + row + (None,) for row in sample_rows(count)]
+    db = Database(path, maintenance=False)
+    queue = db.writer.queue
+    put_times = []
+    start = time.perf_counter()
+    for row in rows:
+        while queue.qsize() >= queue.maxsize - 1:
+            time.sleep(0.001)
+        t = time.perf_counter()
+        db.insert_data(row)
+        put_times.append(time.perf_counter() - t)
+    db.close()  # Espera a que el escritor guarde todo
+    total = time.perf_counter() - start
+    stats = db.stats()
+    return {
+        "insercion_encolar": summarize(put_times),
+        "insercion_total": {
+            "items": count,
+            "seconds": total,
+            "items_per_s": stats["total_written"] / total,
+            "written": stats["total_written"],
+            "dropped": stats["dropped"],
+            "avg_commit_ms": stats["avg_commit_ms"],
+            "max_commit_ms": stats["max_commit_ms"],
+        },
+    }
+
+
+def bench_capture_ingest(workdir, count=300000, chunk_size=4096):
+    """serial_capture.ingest_capture: filas por segundo al recargar una captura.
+
+    Se mide con tramas binarias solamente y con una línea JSON cada tres
+    tramas, incluyendo los agregados; también solo la decodificación.
+    """
+    results = {}
+    rows = sample_rows(count)
+    origin = time.time() - count * SAMPLE_PERIOD
+    for mix, every in (("binario", None), ("mixto", 3)):
+        directory = os.path.join(workdir, f"captura_{mix}")
+        shutil.rmtree(directory, ignore_errors=True)
+        writer = CaptureWriter(directory)
+        frames = [encode_sample("json" if every and seq % every == 0 else "binario", seq, seq * 100, row)
+                  for seq, row in enumerate(rows)]
+        per_chunk = max(1, chunk_size // len(frames[0]))
+        for first in range(0, count, per_chunk):
+            writer.write(b"".join(frames[first:first + per_chunk]), origin + first * SAMPLE_PERIOD)
+        writer.close()
+
+        start = time.perf_counter()
+        parser = CaptureIngest()
+        for received, chunk in read_chunks(directory):
+            parser.timestamp = received
+            parser.feed(chunk)
+            parser.rows.clear()
+        parse = time.perf_counter() - start
+
+        path = os.path.join(workdir, f"captura_{mix}.db")
+        if os.path.exists(path):
+            os.remove(path)
+        Database(path, maintenance=False).close()
+        start = time.perf_counter()
+        written, errors = ingest_capture(path, directory)
+        total = time.perf_counter() - start
+        assert written == count and not errors
+        results[f"recarga_captura_{mix}"] = {
+            "items": count,
+            "seconds": total,
+            "items_per_s": count / total,
+            "decode_items_per_s": count / parse,
+        }
+    return results
+
+
+# ---- Consultas del visualizador ----
+
+def make_database(path, rows, batch=100000):
+    """Crea (o reutiliza) una base con ``rows`` muestras simuladas cada SAMPLE_PERIOD s"""
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        existing = conn.execute("SELECT count(*) FROM sensor_data").fetchone()[0]
+        conn.close()
+        if existing == rows:
+            return
+        os.remove(path)
+
+    Database(path, maintenance=False).close()  # Esquema y migraciones
+    conn = sqlite3.connect(path)
+    generator = SyntheticGenerator(seed=rows)
+    origin = np.datetime64("2026-01-01T00:00:00", "us")
+    period = np.timedelta64(int(SAMPLE_PERIOD * 1e6), "us")
+    for first in range(0, rows, batch):
+        n = min(batch, rows - first)
+        _, values = generator.batch(n, SAMPLE_PERIOD)
+        stamps = np.datetime_as_string(origin + period * np.arange(first, first + n))
+        stamps = np.char.replace(stamps, "T", " ")
+        with conn:
+            conn.executemany(INSERT_SQL, ((s, *v, None) for s, v in zip(stamps.tolist(), values.tolist())))
+    with conn:
+        backfill_rollups(conn)
+    conn.close()
+
+
+def data_range(path):
+    conn = sqlite3.connect(path)
+    first, last = conn.execute("SELECT min(timestamp), max(timestamp) FROM sensor_data").fetchone()
+    conn.close()
+    return first[:19], last[:19]
+
+
+def bench_viewer(app, directory, rows, repeat=5):
+    """DatabaseViewer.apply_filters: primera página y total, y carga de páginas siguientes"""
+    from database_viewer import DatabaseViewer
+
+    previous = os.getcwd()
+    os.chdir(directory)  # El visualizador abre "sensor_data.db" del directorio actual
+    viewer = DatabaseViewer()
+    try:
+        viewer.show()
+        model = viewer.model
+        # Esperar la consulta inicial (últimas 24 horas)
+        wait_until(app, lambda: not model.worker.callbacks)
+        first, last = data_range("sensor_data.db")
+        last_hour = (datetime.fromisoformat(last).timestamp() - 3600)
+        ranges = {
+            "todo": (first, last),
+            "ultima_hora": (datetime.fromtimestamp(last_hour).strftime("%Y-%m-%d %H:%M:%S"), last),
+        }
+        results = {}
+        for range_name, (start, end) in ranges.items():
+            for resolution in ("crudos", "auto"):
+                viewer.resolution.setCurrentIndex(1 if resolution == "crudos" else 0)
+                viewer.start_date.setDateTime(QDateTime.fromString(start, "yyyy-MM-dd HH:mm:ss"))
+                viewer.end_date.setDateTime(QDateTime.fromString(end, "yyyy-MM-dd HH:mm:ss"))
+                first_page, totals = [], []
+                for _ in range(repeat + 1):
+                    counted = []
+                    model.total_changed.connect(counted.append)
+                    start_time = time.perf_counter()
+                    viewer.apply_filters()
+                    wait_until(app, lambda: model.rowCount() > 0 or counted)
+                    first_page.append(time.perf_counter() - start_time)
+                    wait_until(app, lambda: counted)
+                    totals.append(time.perf_counter() - start_time)
+                    model.total_changed.disconnect(counted.append)
+                key = f"visor_{rows}_{range_name}_{resolution}"
+                results[f"{key}_primera_pagina"] = summarize(first_page[1:])
+                results[f"{key}_total"] = summarize(totals[1:])
+
+        # Páginas siguientes (reemplaza al antiguo update_table_model)
+        viewer.resolution.setCurrentIndex(1)
+        viewer.start_date.setDateTime(QDateTime.fromString(ranges["todo"][0], "yyyy-MM-dd HH:mm:ss"))
+        viewer.end_date.setDateTime(QDateTime.fromString(ranges["todo"][1], "yyyy-MM-dd HH:mm:ss"))
+        viewer.apply_filters()
+        wait_until(app, lambda: model.rowCount() > 0 and model.total > model.page_size)
+        pages = []
+        for _ in range(min(repeat * 4, max(0, rows // model.page_size - 2))):
+            if not model.canFetchMore():
+                break
+            loaded = model.rowCount()
+            start_time = time.perf_counter()
+            model.fetchMore()
+            wait_until(app, lambda: model.rowCount() > loaded)
+            pages.append(time.perf_counter() - start_time)
+        if pages:
+            results[f"visor_{rows}_pagina_siguiente"] = summarize(pages, model.page_size)
+        return results
+    finally:
+        viewer.close()
+        os.chdir(previous)
+
+
+# ---- Dibujo ----
+
+def bench_live_graph(app, count=500):
+    """LiveGraph.update_graph por cuadro y add_values con lotes de 100 valores"""
+    graph = LiveGraph("Benchmark", "Tiempo (s)", "Valor")
+    graph.resize(600, 400)
+    graph.show()
+    graph.draw()  # Guarda el fondo para el blit
+    app.processEvents()
+    values = np.random.default_rng(1).normal(25.0, 3.0, count).tolist()
+    iterator = iter(values * 2)
+
+    def one():
+        graph.update_graph(next(iterator))
+
+    frame_times = measure(one, repeat=count, warmup=20)
+    batch = np.random.default_rng(2).normal(25.0, 3.0, 100).tolist()
+    batch_times = measure(lambda: graph.add_values(batch), repeat=100, warmup=5)
+    graph.close()
+    return {
+        "grafico_update_graph": summarize(frame_times),
+        "grafico_add_values_100": summarize(batch_times, 100),
+    }
+
+
+def bench_map(app, db_path, count=2000):
+    """MapaFolium: carga de la traza, update_marker y envío de posiciones al navegador"""
+    start = time.perf_counter()
+    widget = MapaFolium(lat=-12.0464, lon=-77.0428, db_path=db_path)
+    build = time.perf_counter() - start
+    # La traza se lee en otro hilo; se mide hasta que llega a la ventana
+    wait_until(app, lambda: widget.track_ready)
+    track_load = time.perf_counter() - start
+    widget.show()
+    try:
+        wait_until(app, lambda: widget.page_ready, timeout=15.0)
+    except TimeoutError:
+        # Sin navegador disponible se mide igual el costo del lado de Python
+        widget.page_ready = True
+    widget.js_timer.stop()
+
+    rng = np.random.default_rng(3)
+    points = (np.array([-12.0464, -77.0428]) + rng.normal(0.0, 1e-4, (count, 2))).tolist()
+    iterator = iter(points * 2)
+
+    def update():
+        widget.update_marker(*next(iterator))
+
+    update_times = measure(update, repeat=count, warmup=10)
+    widget.pending_points.clear()
+    widget.pending_total = 0
+
+    def flush():
+        # Lo acumulado en un intervalo de 0,5 s a 10 muestras por segundo
+        for _ in range(5):
+            update()
+        widget.flush_updates()
+
+    flush_times = measure(flush, repeat=200, warmup=5)
+    widget.close()
+    return {
+        "mapa_construccion": {"seconds": build, "track_seconds": track_load,
+                              "track_points": len(widget.track_lat)},
+        "mapa_update_marker": summarize(update_times),
+        "mapa_flush_updates": summarize(flush_times),
+    }
+
+
+# ---- Resultados ----
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, reference_path):
+    """Imprime la relación con una corrida anterior; devuelve la cantidad de regresiones"""
+    with open(reference_path, encoding="utf-8") as f:
+        reference = json.load(f)["resultados"]
+    regressions = 0
+    print(f"\nComparación con {reference_path}:")
+    for name, result in sorted(results.items()):
+        old = reference.get(name)
+        if not old or "median_ms" not in result or "median_ms" not in old:
+            continue
+        ratio = result["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        mark = "  REGRESIÓN" if ratio > REGRESSION_RATIO else ""
+        regressions += bool(mark)
+        print(f"  {name:55s} {old['median_ms']:10.3f} -> {result['median_ms']:10.3f} ms  x{ratio:.2f}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de ingesta, consultas y dibujo")
+    parser.add_argument("--filas", default="10000,100000,1000000",
+                        help="tamaños de tabla para el visualizador, separados por coma")
+    parser.add_argument("--datos", help="carpeta donde generar y reutilizar las bases de prueba")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto en benchmarks/resultados)")
+    parser.add_argument("--comparar", metavar="JSON", help="resultados anteriores para detectar regresiones")
+    args = parser.parse_args()
+
+    sizes = [int(value) for value in args.filas.split(",") if value]
+    app = QApplication(sys.argv[:1])
+    workdir = args.datos or tempfile.mkdtemp(prefix="bench_estacion_")
+    os.makedirs(workdir, exist_ok=True)
+    previous = os.getcwd()
+    os.chdir(workdir)  # mapa.html y las bases temporales quedan fuera del repositorio
+
+    results = {}
+    try:
+        print("Decodificación de tramas...")
+        results.update(bench_frame_decode())
+        print("Inserción en la base de datos...")
+        results.update(bench_insert(workdir))
+        print("Recarga de capturas...")
+        results.update(bench_capture_ingest(workdir))
+        for rows in sizes:
+            directory = os.path.join(workdir, f"filas_{rows}")
+            os.makedirs(directory, exist_ok=True)
+            print(f"Generando base de {rows} filas...")
+            make_database(os.path.join(directory, "sensor_data.db"), rows)
+            print(f"Visualizador con {rows} filas...")
+            results.update(bench_viewer(app, directory, rows))
+        print("Gráfico en vivo...")
+        results.update(bench_live_graph(app))
+        print("Mapa...")
+        results.update(bench_map(app, os.path.join(workdir, f"filas_{sizes[0]}", "sensor_data.db")
+                                 if sizes else None))
+    finally:
+        os.chdir(previous)
+        if not args.datos:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    commit = git_commit()
+    report = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": results,
+    }
+    output = args.salida
+    if output is None:
+        folder = os.path.join(ROOT, "benchmarks", "resultados")
+        os.makedirs(folder, exist_ok=True)
+        output = os.path.join(folder, f"bench_{datetime.now():%Y%m%d_%H%M%S}_{commit or 'sin_commit'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    for name, result in results.items():
+        if "median_ms" in result:
+            print(f"  {name:55s} mediana {result['median_ms']:10.3f} ms  p95 {result['p95_ms']:10.3f} ms")
+        elif "items_per_s" in result:
+            print(f"  {name:55s} {result['items_per_s']:10.0f} por segundo")
+    print(f"Resultados guardados en {output}")
+
+    if args.comparar:
+        return 1 if compare(results, args.comparar) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
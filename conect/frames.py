@@ -0,0 +1,143 @@
+import binascii
+import json
+import math
+import struct
+
+# Formato binario de telemetría (todos los campos en little-endian):
+#   sync (2 bytes 0xA5 0x5A) | versión (uint8) | secuencia (uint16) |
+#   ticks_ms del ESP32 (uint32, da la vuelta en TICKS_MODULO) |
+#   acelerómetro y giroscopio (6 float32) |
+#   latitud y longitud (2 int32, millonésimas de grado) | UV y temperatura (2 float32) |
+#   CRC16 (uint16)
+# El GPS va en enteros porque el ESP32 solo tiene float32, que a estas
+# latitudes resuelve casi un metro; en millonésimas de grado son 11 cm.
+# Sin dato de GPS se envía GPS_MISSING, que se decodifica como NaN.
+# El CRC es CRC-16/CCITT-FALSE calculado desde la versión hasta el último canal.
+SYNC = b'\xa5\x5a'
+VERSION = 2
+FRAME_STRUCT = struct.Struct('<2sBHI6f2i2fH')
+FRAME_SIZE = FRAME_STRUCT.size
+TICKS_MODULO = 1 << 30  # time.ticks_ms() de MicroPython da la vuelta cada 2**30 ms (~12,4 días)
+GPS_SCALE = 1_000_000
+GPS_MISSING = -(1 << 31)
+
+CHANNELS = (
+    'accel_x', 'accel_y', 'accel_z',
+    'gyro_roll', 'gyro_pitch', 'gyro_yaw',
+    'gps_lat', 'gps_lon',
+    'uv_index', 'temperature',
+)
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (polinomio 0x1021, valor inicial 0xFFFF)"""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def gps_to_int(degrees):
+    """Grados a millonésimas de grado; NaN o None pasan a ``GPS_MISSING``"""
+    if degrees is None or degrees != degrees:
+        return GPS_MISSING
+    return round(degrees * GPS_SCALE)
+
+
+def gps_from_int(value):
+    return float("nan") if value == GPS_MISSING else value / GPS_SCALE
+
+
+def has_fix(lat, lon):
+    """False si falta la latitud o la longitud (None en JSON, NaN en las tramas binarias)"""
+    return lat is not None and lon is not None and math.isfinite(lat) and math.isfinite(lon)
+
+
+def encode_frame(seq, ticks_ms, values):
+    """Empaqueta los 10 canales en una trama binaria"""
+    values = list(values)
+    values[6] = gps_to_int(values[6])
+    values[7] = gps_to_int(values[7])
+    body = FRAME_STRUCT.pack(SYNC, VERSION, seq & 0xFFFF, ticks_ms % TICKS_MODULO, *values, 0)
+    return body[:-2] + struct.pack('<H', crc16(body[2:-2]))
+
+
+def decode_frames(buffer, start=0):
+    """Decodifica las tramas binarias consecutivas que empiezan en ``start``.
+
+    Devuelve ``(tramas, consumidos)``: una lista de tuplas
+    ``(seq, ticks_ms, valores)`` y la cantidad de bytes usados. Se detiene en
+    la primera trama incompleta, sin sincronismo, de otra versión o con CRC
+    inválido, así que ``consumidos == 0`` indica que en ``start`` no hay una
+    trama válida completa.
+    """
+    frames = []
+    with memoryview(buffer) as view:
+        # Tramas completas y contiguas, para decodificarlas en una sola llamada
+        end = start
+        while end + FRAME_SIZE <= len(view) and view[end:end + 2] == SYNC:
+            end += FRAME_SIZE
+
+        pos = start
+        if end > start:
+            for fields in FRAME_STRUCT.iter_unpack(view[start:end]):
+                if fields[1] != VERSION or fields[-1] != crc16(view[pos + 2:pos + FRAME_SIZE - 2]):
+                    break
+                values = fields[4:-1]
+                frames.append((fields[2], fields[3],
+                               values[:6] + (gps_from_int(values[6]), gps_from_int(values[7]))
+                               + values[8:]))
+                pos += FRAME_SIZE
+    return frames, pos - start
+
+
+def frame_to_dict(seq, ticks_ms, values):
+    """Convierte una trama decodificada al mismo formato que las líneas JSON"""
+    ax, ay, az, roll, pitch, yaw, lat, lon, uv, temp = values
+    return {
+        "seq": seq,
+        "ticks_ms": ticks_ms,
+        "accel": {"x": ax, "y": ay, "z": az},
+        "gyro": {"roll": roll, "pitch": pitch, "yaw": yaw},
+        "gps": {"lat": lat, "lon": lon},
+        "uv_index": uv,
+        "temperature": temp,
+    }
+
+
+def sample_from_values(values):
+    """Arma una muestra en formato JSON a partir de los 10 canales de ``CHANNELS``.
+
+    Los canales sin dato (None) quedan como NaN, igual que en las tramas binarias.
+    """
+    ax, ay, az, roll, pitch, yaw, lat, lon, uv, temp = (
+        float("nan") if v is None else v for v in values)
+    return {
+        "accel": {"x": ax, "y": ay, "z": az},
+        "gyro": {"roll": roll, "pitch": pitch, "yaw": yaw},
+        "gps": {"lat": lat, "lon": lon},
+        "uv_index": uv,
+        "temperature": temp,
+    }
+
+
+def sample_values(data):
+    """Los 10 canales de una muestra, en el orden de ``CHANNELS``"""
+    accel = data['accel']
+    gyro = data['gyro']
+    gps = data['gps']
+    return (accel['x'], accel['y'], accel['z'],
+            gyro['roll'], gyro['pitch'], gyro['yaw'],
+            gps['lat'], gps['lon'],
+            data['uv_index'], data['temperature'])
+
+
+WIRE_FORMATS = ("binario", "json")
+
+
+def encode_sample(wire, seq, ticks_ms, values):
+    """Bytes que el ESP32 enviaría con estos canales: trama "binario" o línea "json" """
+    if wire == "binario":
+        return encode_frame(seq, ticks_ms, values)
+    sample = sample_from_values(values)
+    # Las líneas JSON llevan la misma secuencia de 16 bits y ticks que las tramas
+    sample["seq"] = seq & 0xFFFF
+    sample["ticks_ms"] = ticks_ms % TICKS_MODULO
+    return json.dumps(sample).encode() + b"\n"
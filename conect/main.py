@@ -2,10 +2,25 @@
 from machine import Pin, I2C, UART
 import time
 import json
+import struct
 
 # Configurar UART
 uart = UART(2, baudrate=115200)  # UART2 en ESP32
 
+# Formato de envío: True para tramas binarias compactas (51 bytes),
+# False para líneas JSON. La estación terrena reconoce ambos formatos.
+BINARY_FRAMES = True
+
+# Trama binaria (little-endian), debe coincidir con conect/frames.py:
+# sync 0xA5 0x5A | versión | secuencia | ticks_ms (da la vuelta cada 2**30 ms) |
+# accel y gyro (6 float32) |
+# lat y lon (2 int32, millonésimas de grado) | UV y temperatura (2 float32) | CRC16
+# El GPS va en enteros porque los float de MicroPython son de 32 bits.
+FRAME_SYNC = b'\xa5\x5a'
+FRAME_VERSION = 2
+FRAME_FORMAT = '<BHI6f2i2f'
+GPS_MISSING = -(1 << 31)  # Sin dato de GPS
+
 def read_sensors():
     # Simular lecturas de sensores - reemplazar con tus lecturas reales
     return {
@@ -27,14 +42,54 @@ def read_sensors():
         "temperature": 0  # Lectura real del sensor de temperatura
     }
 
+def crc16(data):
+    # CRC-16/CCITT-FALSE (polinomio 0x1021, valor inicial 0xFFFF)
+    crc = 0xFFFF
+    for b in data:
+        crc ^= b << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+    return crc
+
+def gps_to_int(degrees):
+    # Grados a millonésimas de grado
+    if degrees is None or degrees != degrees:
+        return GPS_MISSING
+    return round(degrees * 1000000)
+
+def encode_frame(seq, data):
+    accel = data["accel"]
+    gyro = data["gyro"]
+    gps = data["gps"]
+    payload = struct.pack(
+        FRAME_FORMAT, FRAME_VERSION, seq & 0xFFFF, time.ticks_ms(),
+        accel["x"], accel["y"], accel["z"],
+        gyro["roll"], gyro["pitch"], gyro["yaw"],
+        gps_to_int(gps["lat"]), gps_to_int(gps["lon"]),
+        data["uv_index"], data["temperature"]
+    )
+    return FRAME_SYNC + payload + struct.pack('<H', crc16(payload))
+
 def main():
+    seq = 0
     while True:
         try:
             # Leer datos de sensores
             data = read_sensors()
-            # Convertir a JSON y enviar
-            message = json.dumps(data) + '\n'  # Añadir newline como delimitador
-            uart.write(message.encode())
+            if BINARY_FRAMES:
+                uart.write(encode_frame(seq, data))
+            else:
+                # Secuencia y ticks como en las tramas binarias, para que la
+                # estación detecte líneas perdidas o duplicadas
+                data["seq"] = seq & 0xFFFF
+                data["ticks_ms"] = time.ticks_ms()
+                # Convertir a JSON y enviar
+                message = json.dumps(data) + '\n'  # Añadir newline como delimitador
+                uart.write(message.encode())
+            seq += 1
             time.sleep(1)
         except Exception as e:
             print("Error:", e)
@@ -1,14 +1,23 @@
 import serial
 import json
+import time
 from datetime import datetime
 import serial.tools.list_ports
+from conect.frames import SYNC, FRAME_SIZE, decode_frames, frame_to_dict
 
 class SerialDataClient:
-    def __init__(self, baudrate=115200):
+    def __init__(self, baudrate=115200, timeout=0.1, chunk_size=4096):
         self.serial = None
         self.baudrate = baudrate
+        self.timeout = timeout  # Tiempo máximo bloqueado esperando datos
+        self.chunk_size = chunk_size  # Máximo de bytes leídos por llamada
         self.data_callback = None
         self.running = False
+        self.buffer = bytearray()  # Bytes recibidos aún sin trama completa
+        self.monitor = None  # PerfMonitor opcional
+        self.capture = None  # CaptureWriter opcional: guarda los bytes crudos recibidos
+        self.link_stats = None  # LinkStats opcional: calidad del enlace
+        self.parse_errors = 0
         
     def list_ports(self):
         """Lista todos los puertos seriales disponibles"""
@@ -18,7 +27,7 @@ class SerialDataClient:
     def connect(self, port):
         """Conecta al puerto serial especificado"""
         try:
-            self.serial = serial.Serial(port, self.baudrate)
+            self.serial = serial.Serial(port, self.baudrate, timeout=self.timeout)
             print(f"Conectado a {port}")
             return True
         except Exception as e:
@@ -36,17 +45,114 @@ class SerialDataClient:
         
         self.running = True
         while self.running:
-            if self.serial.in_waiting:
-                try:
-                    line = self.serial.readline().decode().strip()
-                    data = json.loads(line)
-                    if self.data_callback:
-                        self.data_callback(data)
-                except Exception as e:
+            try:
+                # Bloquea hasta recibir al menos un byte o agotar el timeout,
+                # luego toma de una vez todo lo que ya esté en el buffer del puerto
+                chunk = self.serial.read(max(1, min(self.serial.in_waiting, self.chunk_size)))
+            except Exception as e:
+                if self.running:
                     print(f"Error leyendo datos: {e}")
-                    
+                break
+            if chunk:
+                if self.capture:
+                    self.capture.write(chunk, time.time())
+                if self.monitor:
+                    # Decodificación y entrega de lo leído (incluye el callback)
+                    with self.monitor.measure("lectura_serial"):
+                        self.feed(chunk)
+                else:
+                    self.feed(chunk)
+
+    def feed(self, chunk):
+        """Agrega bytes recibidos al buffer y procesa las tramas completas.
+
+        En el mismo flujo pueden llegar líneas JSON terminadas en salto de
+        línea y tramas binarias (ver ``conect/frames.py``), que se reconocen
+        por su palabra de sincronismo.
+        """
+        if self.link_stats:
+            self.link_stats.on_bytes(len(chunk))
+        self.buffer += chunk
+        buf = self.buffer
+        pos = 0
+        while pos < len(buf):
+            if buf.startswith(SYNC, pos):
+                if len(buf) - pos < FRAME_SIZE:
+                    break  # Trama binaria incompleta
+                frames, consumed = decode_frames(buf, pos)
+                if not consumed:
+                    self.parse_error("trama binaria inválida")
+                    pos = self._resync(pos + 1)
+                    continue
+                self.deliver_frames(frames)
+                pos += consumed
+                continue
+
+            end = buf.find(b'\n', pos)
+            sync = buf.find(SYNC, pos)
+            if sync >= 0 and (end < 0 or sync < end):
+                # Bytes sueltos antes de una trama binaria
+                self.process_frame(buf[pos:sync])
+                pos = sync
+            elif end >= 0:
+                self.process_frame(buf[pos:end])
+                pos = end + 1
+            else:
+                break
+
+        if pos:
+            del buf[:pos]
+        elif len(buf) > 16 * self.chunk_size:
+            # Sin delimitador en demasiados bytes: se descarta la basura acumulada
+            self.parse_error("trama sin delimitador, buffer descartado")
+            buf.clear()
+
+    def _resync(self, pos):
+        """Busca el siguiente inicio posible de trama (binaria o JSON)"""
+        candidates = [i for i in (self.buffer.find(SYNC, pos), self.buffer.find(b'{', pos)) if i >= 0]
+        if candidates:
+            return min(candidates)
+        # Conservar el último byte por si es la primera mitad del sincronismo
+        return max(pos, len(self.buffer) - 1)
+
+    def process_frame(self, frame):
+        """Decodifica una línea JSON y la entrega al callback"""
+        frame = frame.strip()
+        if not frame:
+            return
+        try:
+            data = json.loads(frame)
+        except ValueError as e:
+            self.parse_error(e)
+            return
+        self.deliver(data)
+
+    def parse_error(self, error):
+        """Cuenta e informa un error de decodificación"""
+        self.parse_errors += 1
+        if self.link_stats:
+            self.link_stats.on_error()
+        print(f"Error leyendo datos: {error}")
+
+    def deliver_frames(self, frames):
+        """Entrega las tramas binarias decodificadas, convertidas al formato JSON"""
+        for frame in frames:
+            self.deliver(frame_to_dict(*frame))
+
+    def deliver(self, data):
+        """Entrega una muestra decodificada al callback"""
+        if self.link_stats:
+            self.link_stats.on_frame(data.get("seq"), data.get("ticks_ms"))
+        if self.data_callback:
+            try:
+                self.data_callback(data)
+            except Exception as e:
+                print(f"Error procesando datos: {e}")
+
     def stop(self):
         """Detiene la lectura y cierra la conexión"""
         self.running = False
         if self.serial:
-            self.serial.close()
\ No newline at end of file
+            self.serial.close()
+        if self.capture:
+            self.capture.close()
\ No newline at end of file
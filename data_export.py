@@ -0,0 +1,157 @@
+import csv
+import heapq
+import itertools
+import pathlib
+import sqlite3
+from partitions import MAX_ATTACHED, RANGE_VIEW, attach_range, main_path, split_range
+
+# Columnas de sensor_data en el orden en que se leen y exportan, y sus
+# encabezados. Se definen aquí, sin Qt, para que las exportaciones e
+# importaciones se puedan usar sin interfaz; table_models las reexporta.
+COLUMNS = ["id", "timestamp", "accel_x", "accel_y", "accel_z",
+           "gyro_roll", "gyro_pitch", "gyro_yaw",
+           "gps_lat", "gps_lon", "uv_index", "temperature"]
+
+HEADERS = ["ID", "Fecha y Hora", "Acel X", "Acel Y", "Acel Z",
+           "Roll", "Pitch", "Yaw", "Latitud", "Longitud",
+           "Índice UV", "Temperatura"]
+
+CHUNK_SIZE = 5000  # Filas leídas de SQLite por iteración
+EXCEL_MAX_ROWS = 1048576  # Límite de filas de una hoja de Excel (incluye encabezado)
+MAX_MERGED_PARTS = 16  # Tramos de MAX_ATTACHED días que se unen a la vez (160 días)
+
+
+def sort_key(row, sort_column):
+    """Clave para ordenar filas en Python como ``table_models.order_clause`` (NULL antes que los valores)"""
+    value = row[sort_column]
+    return (value is not None, value if value is not None else 0, row[0])
+
+
+def iter_chunks(conn, task, where, params, order, time_range=None, columns=COLUMNS):
+    """Recorre la consulta por bloques, sin cargar todo el resultado en memoria.
+
+    Sin ``time_range`` se lee solo la tabla del día en curso. Con él también
+    se leen los días archivados del rango, por tramos de a lo sumo
+    MAX_ATTACHED días (``partitions.split_range``). Ordenado por fecha, los
+    tramos se leen uno tras otro; por otra columna se unen en un solo orden
+    (``merged_chunks``), igual que en la tabla del visualizador.
+    """
+    if time_range is None:
+        parts = [("sensor_data", where, params, None)]
+    else:
+        ranges = split_range(conn, *time_range)
+        if order.split(",")[0].split()[-1] == "DESC":
+            ranges.reverse()
+        parts = [(RANGE_VIEW, f"({where}) AND timestamp >= ? AND timestamp < ?", (*params, *part), part)
+                 for part in ranges]
+
+    total = 0
+    for table, part_where, part_params, part in parts:
+        if part:
+            attach_range(conn, part)
+        total += conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {part_where}", part_params).fetchone()[0]
+
+    if len(parts) > 1 and order.split()[0] != "timestamp":
+        chunks = merged_chunks(conn, parts, order, columns)
+    else:
+        chunks = sequential_chunks(conn, parts, order, columns)
+    written = 0
+    for rows in chunks:
+        task.check()
+        yield rows
+        written += len(rows)
+        task.progress(f"Exportando... {written}/{total} registros")
+
+
+def sequential_chunks(conn, parts, order, columns):
+    """Bloques de cada tramo, tramo por tramo"""
+    for table, part_where, part_params, part in parts:
+        if part:
+            attach_range(conn, part)
+        cursor = conn.execute(
+            f"SELECT {', '.join(columns)} FROM {table} WHERE {part_where} ORDER BY {order}", part_params
+        )
+        while True:
+            rows = cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            yield rows
+
+
+def cursor_rows(cursor):
+    while True:
+        rows = cursor.fetchmany(CHUNK_SIZE)
+        if not rows:
+            break
+        yield from rows
+
+
+def merged_chunks(conn, parts, order, columns):
+    """Bloques de todos los tramos unidos en el orden de ``order`` (``heapq.merge``).
+
+    Cada tramo se lee con su propia conexión de solo lectura, que adjunta
+    sus días, así todos los cursores avanzan a la vez. Se abren a lo sumo
+    MAX_MERGED_PARTS conexiones.
+    """
+    if len(parts) > MAX_MERGED_PARTS:
+        raise RuntimeError(f"El rango abarca {len(parts)} tramos de {MAX_ATTACHED} días; para "
+                           f"exportarlo ordenado por otra columna se pueden unir hasta "
+                           f"{MAX_MERGED_PARTS}. Ordene por fecha o acorte el rango")
+    sort_column = columns.index(order.split()[0])
+    descending = order.split(",")[0].split()[-1] == "DESC"
+    uri = pathlib.Path(main_path(conn)).absolute().as_uri() + "?mode=ro"
+    connections = []
+    try:
+        iterators = []
+        for table, part_where, part_params, part in parts:
+            part_conn = sqlite3.connect(uri, uri=True)
+            connections.append(part_conn)
+            attach_range(part_conn, part)
+            iterators.append(cursor_rows(part_conn.execute(
+                f"SELECT {', '.join(columns)} FROM {table} WHERE {part_where} ORDER BY {order}", part_params
+            )))
+        merged = heapq.merge(*iterators, key=lambda row: sort_key(row, sort_column), reverse=descending)
+        while True:
+            rows = list(itertools.islice(merged, CHUNK_SIZE))
+            if not rows:
+                break
+            yield rows
+    finally:
+        for part_conn in connections:
+            part_conn.close()
+
+
+def export_csv(conn, task, file_name, where, params, order, time_range=None):
+    """Escribe el resultado de la consulta en CSV con la precisión completa"""
+    count = 0
+    with open(file_name, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        for rows in iter_chunks(conn, task, where, params, order, time_range):
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def export_excel(conn, task, file_name, where, params, order, time_range=None):
+    """Escribe el resultado en Excel; si no entra en una hoja continúa en otra"""
+    from openpyxl import Workbook
+
+    # En modo write_only openpyxl escribe las filas a disco a medida que llegan
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = 0
+    count = 0
+    for rows in iter_chunks(conn, task, where, params, order, time_range):
+        for row in rows:
+            if sheet is None or sheet_rows >= EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Datos {len(workbook.worksheets) + 1}")
+                sheet.append(HEADERS)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+        count += len(rows)
+    if sheet is None:
+        workbook.create_sheet("Datos 1").append(HEADERS)
+    workbook.save(file_name)
+    return count
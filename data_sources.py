@@ -0,0 +1,247 @@
+import os
+import threading
+import time
+import numpy as np
+from conect.frames import encode_sample, sample_from_values
+from conect.serial_client import SerialDataClient
+
+# Todas las fuentes tienen la interfaz de SerialDataClient: set_callback,
+# start_reading (bloquea; se ejecuta en un hilo propio) y stop. El callback
+# recibe cada muestra con el formato de las líneas JSON del ESP32.
+SOURCE_KINDS = ("simulador", "serial", "multi", "replay", "pty")
+
+# Posición inicial de la simulación (Lima)
+HOME_LAT = -12.0464
+HOME_LON = -77.0428
+
+
+class SyntheticGenerator:
+    """Genera lotes de muestras verosímiles con operaciones vectorizadas de NumPy.
+
+    Acelerómetro con la gravedad en z, vibración y ruido; orientación que
+    deriva como una caminata aleatoria; GPS que recorre un círculo de unos
+    500 m; UV y temperatura con variaciones lentas. Cada lote es una matriz
+    de (n, 10) con los canales en el orden de ``CHANNELS``.
+    """
+
+    def __init__(self, seed=None, lat=HOME_LAT, lon=HOME_LON):
+        self.rng = np.random.default_rng(seed)
+        self.lat = lat
+        self.lon = lon
+        self.t = 0.0  # Segundos simulados hasta la última muestra
+        self.orientation = np.zeros(3)
+
+    def batch(self, n, dt):
+        """Devuelve (tiempos, valores) de las próximas ``n`` muestras separadas por ``dt`` s"""
+        rng = self.rng
+        t = self.t + dt * np.arange(1, n + 1)
+        self.t = t[-1]
+
+        accel = rng.normal(0.0, 0.05, (n, 3))
+        accel[:, 0] += 0.3 * np.sin(2 * np.pi * 0.5 * t)
+        accel[:, 2] += 9.81
+
+        steps = rng.normal(0.0, 0.5 * np.sqrt(dt), (n, 3))
+        orientation = self.orientation + np.cumsum(steps, axis=0)
+        self.orientation = orientation[-1]
+        gyro = (orientation + 180.0) % 360.0 - 180.0
+
+        # Una vuelta cada 10 minutos; el radio en grados es de unos 500 m
+        angle = 2 * np.pi * t / 600.0
+        lat = self.lat + 0.0045 * np.sin(angle) + rng.normal(0.0, 2e-5, n)
+        lon = self.lon + 0.0045 * np.cos(angle) / np.cos(np.radians(self.lat)) + rng.normal(0.0, 2e-5, n)
+
+        uv = np.clip(6.0 + 4.0 * np.sin(2 * np.pi * t / 3600.0) + rng.normal(0.0, 0.2, n), 0.0, 11.0)
+        temp = 25.0 + 5.0 * np.sin(2 * np.pi * t / 1800.0) + rng.normal(0.0, 0.1, n)
+
+        return t, np.column_stack([accel, gyro, lat, lon, uv, temp])
+
+
+class SyntheticSource:
+    """Simulador: entrega muestras sintéticas a ``rate_hz`` (de 1 Hz a 10 kHz o más).
+
+    Las muestras se generan por lotes cada ``batch_interval`` segundos (o
+    al ritmo de las muestras si es más lento), con los tiempos calculados
+    desde el inicio para que el ritmo no se desvíe. ``max_samples`` detiene
+    la simulación después de esa cantidad de muestras.
+    """
+
+    def __init__(self, rate_hz=1.0, batch_interval=0.05, seed=None, max_samples=None):
+        self.rate_hz = rate_hz
+        self.batch_interval = batch_interval
+        self.max_samples = max_samples
+        self.generator = SyntheticGenerator(seed)
+        self.data_callback = None
+        self.batch_callback = None
+        self.running = False
+
+        # Contadores
+        self.delivered = 0
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def set_callback(self, callback):
+        """Establece la función callback que procesará cada muestra"""
+        self.data_callback = callback
+
+    def set_batch_callback(self, callback):
+        """Recibe cada lote completo (tiempos, valores) en lugar de muestra por muestra"""
+        self.batch_callback = callback
+
+    def start_reading(self):
+        """Genera muestras hasta que se llame a ``stop`` (bloquea)"""
+        self.running = True
+        self.started = time.monotonic()
+        dt = 1.0 / self.rate_hz
+        try:
+            while self.running:
+                due = int((time.monotonic() - self.started) * self.rate_hz) + 1
+                if self.max_samples is not None:
+                    due = min(due, self.max_samples)
+                n = due - self.delivered
+                if n > 0:
+                    t, values = self.generator.batch(n, dt)
+                    self.deliver_batch(t, values)
+                if self.max_samples is not None and self.delivered >= self.max_samples:
+                    break
+
+                # Despertar con la próxima muestra, pero no más seguido que batch_interval
+                now = time.monotonic()
+                wake = max(self.started + self.delivered / self.rate_hz, now + self.batch_interval)
+                time.sleep(wake - now)
+        finally:
+            self.running = False
+            self.finished = time.monotonic()
+            self.done.set()
+
+    def deliver_batch(self, t, values):
+        self.delivered += len(values)
+        if self.batch_callback:
+            self.batch_callback(t, values)
+            return
+        if not self.data_callback:
+            return
+        for row in values.tolist():
+            try:
+                self.data_callback(sample_from_values(row))
+            except Exception as e:
+                print(f"Error procesando datos: {e}")
+
+    def stats(self):
+        """Muestras entregadas, duración y ritmo promedio"""
+        if self.started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            "delivered": self.delivered,
+            "elapsed_s": elapsed,
+            "samples_per_s": self.delivered / elapsed if elapsed else 0.0,
+            "finished": self.done.is_set(),
+        }
+
+    def stop(self):
+        """Detiene la simulación"""
+        self.running = False
+
+
+class PtySource(SerialDataClient):
+    """Simulador detrás de una pseudo-terminal, para probar el camino serial completo.
+
+    El simulador escribe las muestras codificadas (tramas binarias o líneas
+    JSON) en el lado maestro y este cliente las lee del lado esclavo con
+    pyserial, igual que desde el puerto del ESP32. Solo en Linux y macOS.
+    """
+
+    def __init__(self, rate_hz=1.0, wire="binario", seed=None, max_samples=None, **kwargs):
+        super().__init__(**kwargs)
+        if not hasattr(os, "openpty"):
+            raise RuntimeError("La pseudo-terminal solo está disponible en Linux y macOS")
+        self.wire = wire
+        self.seq = 0
+        self.master, self.slave = os.openpty()
+        self.port_name = os.ttyname(self.slave)
+        self.simulator = SyntheticSource(rate_hz, seed=seed, max_samples=max_samples)
+        self.simulator.set_batch_callback(self.write_batch)
+
+    def write_batch(self, t, values):
+        """Codifica el lote y lo escribe en el lado maestro de la pseudo-terminal"""
+        data = bytearray()
+        for ticks, row in zip((t * 1000).astype(np.int64).tolist(), values.tolist()):
+            data += encode_sample(self.wire, self.seq, ticks, row)
+            self.seq += 1
+        view = memoryview(data)
+        while view and self.simulator.running:
+            written = os.write(self.master, view)
+            view = view[written:]
+
+    def start_reading(self):
+        if not self.serial and not self.connect(self.port_name):
+            return
+        writer = threading.Thread(target=self.simulator.start_reading, name="PtySource")
+        writer.daemon = True
+        writer.start()
+        super().start_reading()
+
+    def stop(self):
+        self.simulator.stop()
+        super().stop()
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def open_serial(port=None):
+    """Conecta al ESP32; si no se indica el puerto se busca uno USB o CP210x"""
+    client = SerialDataClient()
+    if port is None:
+        ports = esp32_ports()
+        if not ports:
+            print("No se encontró el ESP32")
+            return None
+        port = ports[0]
+    if not client.connect(port):
+        return None
+    return client
+
+
+def esp32_ports():
+    """Puertos USB o CP210x conectados (comunes en ESP32, TNC y radios)"""
+    return [device for device, desc in SerialDataClient().list_ports() if "USB" in desc or "CP210x" in desc]
+
+
+def open_links(ports=None):
+    """Lee varios enlaces a la vez; sin puertos se usan todos los USB o CP210x"""
+    from multi_link import MultiLinkSource
+    ports = ports or esp32_ports()
+    if not ports:
+        print("No se encontró ningún enlace serial")
+        return None
+    source = MultiLinkSource(ports)
+    if not source.links:
+        return None
+    return source
+
+
+def create_source(kind="simulador", rate_hz=1.0, ports=None, replay=None, speed=1.0, wire=None,
+                  start=None, end=None):
+    """Crea la fuente de datos elegida al iniciar la aplicación (None si no está disponible).
+
+    ``ports`` es una lista de puertos; con más de uno la fuente serial lee todos a la vez.
+    """
+    ports = ports or []
+    if kind == "simulador":
+        return SyntheticSource(rate_hz)
+    if kind == "serial" and len(ports) <= 1:
+        return open_serial(ports[0] if ports else None)
+    if kind in ("serial", "multi"):
+        return open_links(ports)
+    if kind == "replay":
+        from replay import TelemetryReplay, open_samples
+        return TelemetryReplay(open_samples(replay, start, end), speed=speed, wire=wire)
+    if kind == "pty":
+        return PtySource(rate_hz, wire=wire or "binario")
+    raise ValueError(f"Fuente de datos desconocida: {kind}")
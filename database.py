@@ -0,0 +1,187 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+from database_writer import DatabaseWriter
+from link_stats import LINK_FIELDS
+from partitions import PartitionMaintenance, add_partition_column, create_catalog
+from rollups import add_channel_counts, create_rollup_tables, backfill_rollups
+
+class Database:
+    """Base de datos de la estación.
+
+    Los días cerrados se archivan en un archivo por día (``partitions.py``);
+    ``retention_days`` y ``max_bytes`` limitan lo que se conserva de los
+    datos crudos. Con ``maintenance=False`` no se mueve ni se borra nada.
+    Con ``vacuum=True`` una base creada antes de ``auto_vacuum`` se
+    reorganiza al abrirla (ver ``enable_incremental_vacuum``).
+    """
+
+    def __init__(self, db_path='sensor_data.db', monitor=None, retention_days=None, max_bytes=None,
+                 maintenance=True, vacuum=False):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.cursor = self.conn.cursor()
+        if self.cursor.execute("SELECT count(*) FROM sqlite_master").fetchone()[0] == 0:
+            # Base nueva: el modo se fija antes de crear la primera tabla y no
+            # hace falta un VACUUM para cambiarlo
+            self.cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.create_table()
+        if vacuum:
+            self.enable_incremental_vacuum()
+        self.session_id = None
+        # Las inserciones se hacen en lotes desde un hilo escritor
+        self.writer = DatabaseWriter(db_path, monitor=monitor)
+        self.maintenance = None
+        if maintenance:
+            self.maintenance = PartitionMaintenance(db_path, retention_days, max_bytes)
+        print("Base de datos iniciada correctamente")
+
+    def create_table(self):
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sensor_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            accel_x REAL,
+            accel_y REAL,
+            accel_z REAL,
+            gyro_roll REAL,
+            gyro_pitch REAL,
+            gyro_yaw REAL,
+            gps_lat REAL,
+            gps_lon REAL,
+            uv_index REAL,
+            temperature REAL
+        )
+        ''')
+        self.conn.commit()
+        self.migrate()
+
+    def migrate(self):
+        """Actualiza el esquema de bases de datos creadas con versiones anteriores"""
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # Índice para que los filtros por rango de fecha no recorran toda la tabla
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sensor_data_timestamp ON sensor_data(timestamp)"
+            )
+            self.cursor.execute("PRAGMA user_version = 1")
+        if version < 2:
+            # Agregados de 10 s, 1 min y 1 h calculados con los datos existentes
+            create_rollup_tables(self.cursor)
+            if self.cursor.execute("SELECT 1 FROM sensor_data LIMIT 1").fetchone():
+                print("Calculando agregados de los datos existentes...")
+                backfill_rollups(self.conn)
+            self.cursor.execute("PRAGMA user_version = 2")
+        if version < 3:
+            # Sesiones y catálogo de días archivados
+            create_catalog(self.cursor)
+            self.cursor.execute("PRAGMA user_version = 3")
+            if self.cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                print("La base de datos no devuelve al disco el espacio de los días archivados; "
+                      "para activarlo iniciar una vez con --compactar")
+        if version < 4:
+            # Calidad del enlace de cada sesión (link_stats.py)
+            for field in LINK_FIELDS:
+                kind = "REAL" if field == "jitter_ms" else "INTEGER"
+                self.cursor.execute(f"ALTER TABLE sessions ADD COLUMN {field} {kind}")
+            self.cursor.execute("PRAGMA user_version = 4")
+        if version < 5:
+            # Enlace por el que llegó cada muestra (multi_link.py) y calidad de
+            # cada enlace cuando una sesión lee varios
+            self.cursor.execute("ALTER TABLE sensor_data ADD COLUMN link TEXT")
+            add_partition_column(self.conn, self.db_path, "link TEXT")
+            columns = ", ".join(f"{field} {'REAL' if field == 'jitter_ms' else 'INTEGER'}" for field in LINK_FIELDS)
+            self.cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS session_links (
+                session_id INTEGER,
+                link TEXT,
+                {columns},
+                PRIMARY KEY (session_id, link)
+            )
+            ''')
+            self.cursor.execute("PRAGMA user_version = 5")
+        if version < 6:
+            # Cantidad de valores de cada canal en los agregados, para que los
+            # promedios no cuenten las muestras sin dato de ese canal (los
+            # agregados creados arriba ya la tienen)
+            if version >= 2:
+                print("Recalculando agregados...")
+                add_channel_counts(self.conn)
+            self.cursor.execute("PRAGMA user_version = 6")
+        self.conn.commit()
+
+    def enable_incremental_vacuum(self):
+        """Pasa una base existente a ``auto_vacuum = INCREMENTAL`` con un VACUUM completo.
+
+        Así el espacio que liberan los días archivados se devuelve de a poco
+        (``partitions.incremental_vacuum``). El VACUUM reescribe toda la base:
+        puede tardar varios minutos en bases grandes y necesita otro tanto de
+        espacio libre en disco, por eso solo se hace si se pide.
+        """
+        if self.cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        size_mb = os.path.getsize(self.db_path) / (1024 * 1024)
+        print(f"Reorganizando la base de datos ({size_mb:.0f} MB, necesita otro tanto libre en disco)...")
+        start = time.perf_counter()
+        self.cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.cursor.execute("VACUUM")
+        print(f"Base de datos reorganizada en {time.perf_counter() - start:.0f} s")
+
+    def start_session(self, source):
+        """Registra el inicio de una sesión de recepción desde ``source``"""
+        first_id = self.cursor.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'sensor_data'").fetchone()
+        self.cursor.execute(
+            "INSERT INTO sessions (source, started, first_id) VALUES (?, ?, ?)",
+            (source, datetime.now(), first_id[0] if first_id else 0))
+        self.conn.commit()
+        self.session_id = self.cursor.lastrowid
+
+    def save_link_stats(self, stats, link=None):
+        """Guarda en la sesión actual los contadores del enlace (``LinkStats.snapshot``).
+
+        Con ``link`` se guardan los de uno de los enlaces de la sesión en session_links.
+        """
+        if self.session_id is None:
+            return
+        values = [stats[field] for field in LINK_FIELDS]
+        if link is None:
+            self.cursor.execute(
+                f"UPDATE sessions SET {', '.join(f'{field} = ?' for field in LINK_FIELDS)} WHERE id = ?",
+                values + [self.session_id])
+        else:
+            self.cursor.execute(
+                f"INSERT OR REPLACE INTO session_links (session_id, link, {', '.join(LINK_FIELDS)}) "
+                f"VALUES ({', '.join('?' * (len(LINK_FIELDS) + 2))})",
+                [self.session_id, link] + values)
+        self.conn.commit()
+
+    def end_session(self):
+        """Registra el fin de la sesión y las muestras guardadas"""
+        if self.session_id is None:
+            return
+        self.cursor.execute(
+            "UPDATE sessions SET stopped = ?, samples = ? WHERE id = ?",
+            (datetime.now(), self.writer.total_written, self.session_id))
+        self.conn.commit()
+        self.session_id = None
+
+    def insert_data(self, data, block=False):
+        # Solo encola la muestra; el hilo escritor la guarda en el siguiente lote
+        if not self.writer.put(data, block) and self.writer.dropped % 1000 == 1:
+            # Se avisa una vez cada 1000 descartes para no saturar la consola
+            print(f"Cola de escritura llena, muestras descartadas: {self.writer.dropped}")
+
+    def stats(self):
+        """Devuelve los contadores del escritor (cola, lotes, latencia de commit)"""
+        return self.writer.stats()
+
+    def close(self):
+        # Escribir las muestras pendientes antes de cerrar
+        self.writer.close()
+        self.end_session()
+        if self.maintenance:
+            self.maintenance.close()
+        self.conn.close()
+        print("Conexión a la base de datos cerrada")
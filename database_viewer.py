@@ -1,16 +1,22 @@
 import sys
-import pandas as pd
+import threading
+from collections import deque
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, 
                             QWidget, QFrame, QPushButton, QDateTimeEdit, QTableView,
                             QFileDialog, QComboBox, QGroupBox, QStatusBar, QMessageBox,
-                            QCheckBox)
-from PyQt5.QtCore import Qt, QDateTime, QSortFilterProxyModel, QTimer
-from PyQt5.QtGui import QStandardItemModel, QStandardItem
-import sqlite3
+                            QCheckBox, QTabWidget)
+from PyQt5.QtCore import Qt, QDateTime, QTimer
 from datetime import datetime, timedelta
+from table_models import ParquetSource, SensorTableModel, SQLiteSource, TailTableModel, order_clause, read_tail
+from data_export import export_csv, export_excel
+from archive import export_parquet, import_parquet
+from rollups import ROLLUPS, RESOLUTION_NAMES, choose_resolution, rollup_view
+from query_worker import QueryWorker
+from history_plot import HistoryPlot, load_history
+from live_feed import LiveSubscriber
 
 class DatabaseViewer(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, live_port=None, db_path='sensor_data.db', read_only=False):
         super().__init__(parent)
         self.setWindowTitle("Visualizador de Datos Históricos")
         self.setGeometry(100, 100, 1000, 700)
@@ -18,14 +24,36 @@ class DatabaseViewer(QDialog):
         
         # Variable para controlar la actualización en tiempo real
         self.real_time_enabled = False
+        self.resolution_text = ""  # Resolución de los datos mostrados
+        self.columns_resized = False  # Columnas de la tabla filtrada ya ajustadas
         self.last_id = 0  # Para rastrear el último ID recuperado
+        self.live_start_id = 0  # Último ID existente al activar el tiempo real
+        # Con live_port el tiempo real se suscribe a las muestras publicadas
+        # por la ingesta (live_feed.py) en lugar de consultar la base cada segundo
+        self.live_port = live_port
+        self.live_subscriber = None
+        self.live_rows = deque()
+        self.last_live_timestamp = None  # Hora de la última muestra en vivo mostrada
+        self.db_path = db_path
+        # La base es de otro proceso (ingest.py): no se importa nada en ella
+        self.read_only = read_only
         
         # Timer para actualización en tiempo real
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_real_time_data)
         
+        # Hilo que ejecuta las consultas fuera de la interfaz
+        self.query_worker = QueryWorker(db_path)
+        self.query_worker.start()
+        
+        # Las exportaciones usan su propio hilo para no demorar las consultas
+        self.export_worker = QueryWorker(db_path)
+        self.export_worker.start()
+        
         # Configurar UI
         self.setup_ui()
+        self.query_worker.progress.connect(self.status_bar.showMessage)
+        self.export_worker.progress.connect(self.status_bar.showMessage)
         
         # Cargar datos iniciales (los últimos 24 horas)
         self.load_initial_data()
@@ -73,33 +101,57 @@ class DatabaseViewer(QDialog):
         self.apply_btn.clicked.connect(self.apply_filters)
         filter_layout.addWidget(self.apply_btn, 2, 3)
         
+        # Resolución: datos crudos o promedios por intervalo. En modo automático
+        # se usa el intervalo más grueso que aún da suficientes puntos.
+        resolution_label = QLabel("Resolución:")
+        self.resolution = QComboBox()
+        self.resolution.addItem("Automática", "auto")
+        self.resolution.addItem("Datos crudos", None)
+        for name, _, _ in ROLLUPS:
+            self.resolution.addItem(f"Promedios de {RESOLUTION_NAMES[name]}", name)
+        filter_layout.addWidget(resolution_label, 3, 0)
+        filter_layout.addWidget(self.resolution, 3, 1)
+        
         filter_group.setLayout(filter_layout)
         main_layout.addWidget(filter_group)
         
         # ---- Tabla de Datos ----
-        table_group = QGroupBox("Datos del Sensor")
+        self.table_group = QGroupBox("Datos del Sensor")
         table_layout = QVBoxLayout()
         
-        # Crear modelo de tabla y vista
-        self.model = QStandardItemModel()
-        self.proxy_model = QSortFilterProxyModel()
-        self.proxy_model.setSourceModel(self.model)
+        # Modelo paginado para los filtros por fecha (lee de la base de datos
+        # solo las filas que se muestran y ordena con SQL)
+        self.model = SensorTableModel(self.query_worker)
+        self.model.total_changed.connect(self.on_total_changed)
+        self.model.load_failed.connect(self.on_load_failed)
+        
+        # Modelo para el modo tiempo real: buffer circular con los últimos registros
+        self.live_model = TailTableModel(capacity=1000)
+        self.live_resized = False  # Columnas ajustadas con el primer lote
         
         self.table_view = QTableView()
-        self.table_view.setModel(self.proxy_model)
+        self.table_view.setModel(self.model)
+        self.table_view.horizontalHeader().setSortIndicator(1, Qt.DescendingOrder)
         self.table_view.setSortingEnabled(True)
         self.table_view.setAlternatingRowColors(True)
         self.table_view.setSelectionBehavior(QTableView.SelectRows)
         self.table_view.horizontalHeader().setStretchLastSection(True)
         
-        table_layout.addWidget(self.table_view)
+        # Pestañas con la tabla y el gráfico del mismo rango
+        self.history_plot = HistoryPlot()
+        self.plot_range = None  # Rango dibujado en el gráfico
+        self.view_tabs = QTabWidget()
+        self.view_tabs.addTab(self.table_view, "Tabla")
+        self.view_tabs.addTab(self.history_plot, "Gráfico")
+        self.view_tabs.currentChanged.connect(self.update_plot)
+        table_layout.addWidget(self.view_tabs)
         
         # Información de registros
         self.records_info = QLabel("Registros: 0")
         table_layout.addWidget(self.records_info)
         
-        table_group.setLayout(table_layout)
-        main_layout.addWidget(table_group)
+        self.table_group.setLayout(table_layout)
+        main_layout.addWidget(self.table_group)
         
         # ---- Botones de Acción ----
         btn_layout = QHBoxLayout()
@@ -114,6 +166,22 @@ class DatabaseViewer(QDialog):
         self.export_excel_btn.clicked.connect(lambda: self.export_data("excel"))
         btn_layout.addWidget(self.export_excel_btn)
         
+        # Botón para exportar a un archivo Parquet particionado por día
+        self.export_parquet_btn = QPushButton("Exportar a Parquet")
+        self.export_parquet_btn.clicked.connect(lambda: self.export_data("parquet"))
+        btn_layout.addWidget(self.export_parquet_btn)
+        
+        # Botón para abrir un archivo Parquet como origen de solo lectura
+        self.open_archive_btn = QPushButton("Abrir archivo Parquet")
+        self.open_archive_btn.clicked.connect(self.toggle_archive)
+        btn_layout.addWidget(self.open_archive_btn)
+        
+        # Botón para cargar un archivo Parquet en la base de datos
+        self.import_archive_btn = QPushButton("Importar Parquet")
+        self.import_archive_btn.clicked.connect(self.import_archive)
+        self.import_archive_btn.setVisible(not self.read_only)
+        btn_layout.addWidget(self.import_archive_btn)
+        
         # Botón para cerrar
         self.close_btn = QPushButton("Cerrar")
         self.close_btn.clicked.connect(self.close)
@@ -126,12 +194,6 @@ class DatabaseViewer(QDialog):
         main_layout.addWidget(self.status_bar)
         
         self.setLayout(main_layout)
-        
-        # Configurar encabezados de la tabla
-        headers = ["ID", "Fecha y Hora", "Acel X", "Acel Y", "Acel Z", 
-                   "Roll", "Pitch", "Yaw", "Latitud", "Longitud", 
-                   "Índice UV", "Temperatura"]
-        self.model.setHorizontalHeaderLabels(headers)
 
     def load_initial_data(self):
         """Carga los datos de las últimas 24 horas"""
@@ -147,83 +209,143 @@ class DatabaseViewer(QDialog):
         self.end_date.setEnabled(not enabled)
         self.time_preset.setEnabled(not enabled)
         self.apply_btn.setEnabled(not enabled)
+        self.resolution.setEnabled(not enabled)
         
         if enabled:
             # Obtener el último ID para empezar a seguir desde ahí
-            try:
-                conn = sqlite3.connect('sensor_data.db')
-                cursor = conn.cursor()
-                cursor.execute("SELECT MAX(id) FROM sensor_data")
-                max_id = cursor.fetchone()[0]
-                if max_id:
-                    self.last_id = max_id
-                conn.close()
-                
-                # Limpiar la tabla actual
-                self.model.removeRows(0, self.model.rowCount())
-                self.records_info.setText("Registros: 0")
-                
-                # Iniciar timer para actualizaciones en tiempo real (cada 1 segundo)
-                self.update_timer.start(1000)
-                self.status_bar.showMessage("Modo tiempo real activado")
-            except Exception as e:
-                self.status_bar.showMessage(f"Error al iniciar modo tiempo real: {str(e)}")
-                self.real_time_checkbox.setChecked(False)
+            self.query_worker.submit(
+                "tiempo_real", lambda conn, task: conn.execute("SELECT MAX(id) FROM sensor_data").fetchone()[0],
+                on_result=self.start_real_time, on_error=self.on_real_time_error
+            )
         else:
-            # Detener el timer
+            # Detener el timer y volver a la tabla filtrada por fecha
             self.update_timer.stop()
+            self.stop_live_feed()
+            self.query_worker.cancel("tiempo_real")
+            self.table_view.setModel(self.model)
+            self.table_view.setSortingEnabled(True)
+            self.records_info.setText(f"Registros: {self.model.total}")
             self.status_bar.showMessage("Modo tiempo real desactivado")
 
+    def start_real_time(self, max_id):
+        """Comienza el seguimiento a partir del último ID existente"""
+        if max_id:
+            self.last_id = max_id
+        self.live_start_id = self.last_id
+        self.last_live_timestamp = None
+        
+        # Limpiar la tabla actual y mostrar la de tiempo real
+        self.live_model.clear()
+        self.live_resized = False
+        self.table_view.setSortingEnabled(False)
+        self.table_view.setModel(self.live_model)
+        self.records_info.setText("Registros: 0")
+        
+        if self.live_port and self.start_live_feed():
+            # Las muestras recibidas se pasan a la tabla cada 50 ms
+            self.update_timer.start(50)
+            self.status_bar.showMessage("Modo tiempo real activado (muestras en vivo)")
+            return
+        
+        # Iniciar timer para actualizaciones en tiempo real (cada 1 segundo)
+        self.update_timer.start(1000)
+        self.status_bar.showMessage("Modo tiempo real activado")
+
+    def start_live_feed(self):
+        """Se suscribe a las muestras en vivo; devuelve False si no hay publicador"""
+        subscriber = LiveSubscriber(self.live_port)
+        if not subscriber.connect():
+            return False
+        self.live_subscriber = subscriber
+        rows = self.live_rows = deque(maxlen=self.live_model.capacity)
+
+        def receive():
+            # Filas como las de sensor_data; el id aún no existe
+            for _, timestamp, values, _ in subscriber.messages():
+                rows.append((None, str(datetime.fromtimestamp(timestamp)), *values))
+
+        thread = threading.Thread(target=receive, name="LiveSubscriber")
+        thread.daemon = True
+        thread.start()
+        return True
+
+    def stop_live_feed(self):
+        if self.live_subscriber:
+            self.live_subscriber.stop()
+            self.live_subscriber = None
+
+    def on_real_time_error(self, message):
+        self.status_bar.showMessage(f"Error al iniciar modo tiempo real: {message}")
+        self.real_time_checkbox.setChecked(False)
+
     def update_real_time_data(self):
-        """Actualiza la tabla con los nuevos datos desde el último ID conocido"""
-        try:
-            conn = sqlite3.connect('sensor_data.db')
-            
-            # Consulta para obtener solo los nuevos registros
-            query = f"""
-            SELECT id, timestamp, accel_x, accel_y, accel_z, 
-                   gyro_roll, gyro_pitch, gyro_yaw,
-                   gps_lat, gps_lon, uv_index, temperature
-            FROM sensor_data
-            WHERE id > {self.last_id}
-            ORDER BY id ASC
-            """
-            
-            # Obtener datos como DataFrame
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            
-            if not df.empty:
-                # Actualizar el último ID conocido
-                self.last_id = df['id'].max()
-                
-                # Añadir nuevos datos al modelo (al principio para mostrar los más recientes primero)
-                for i, row in df.iterrows():
-                    items = []
-                    for value in row:
-                        # Formatear valores numéricos con 2 decimales
-                        if isinstance(value, (int, float)) and not isinstance(value, bool):
-                            if isinstance(value, int):
-                                item = QStandardItem(str(value))
-                            else:
-                                item = QStandardItem(f"{value:.2f}")
-                        else:
-                            item = QStandardItem(str(value))
-                        items.append(item)
-                    self.model.insertRow(0, items)  # Insertar al principio
-                
-                # Limitar a 1000 filas para evitar consumo excesivo de memoria
-                if self.model.rowCount() > 1000:
-                    self.model.removeRows(1000, self.model.rowCount() - 1000)
-                
-                # Actualizar información de registros
-                self.records_info.setText(f"Registros: {self.model.rowCount()} (mostrando los últimos 1000)")
-                
-                # Ajustar ancho de columnas automáticamente
-                self.table_view.resizeColumnsToContents()
-                
-        except Exception as e:
-            self.status_bar.showMessage(f"Error al actualizar datos en tiempo real: {str(e)}")
+        """Pide los nuevos datos desde el último ID conocido"""
+        if self.live_subscriber:
+            rows = []
+            while True:
+                try:
+                    rows.append(self.live_rows.popleft())
+                except IndexError:
+                    break
+            self.add_real_time_rows(rows)
+            if self.live_subscriber.sock is None and not self.live_rows:
+                self.fall_back_to_polling()
+            return
+        self.query_worker.submit(
+            "tiempo_real", read_tail, (int(self.last_id), self.live_model.capacity),
+            on_result=self.add_real_time_rows,
+            on_error=lambda message: self.status_bar.showMessage(
+                f"Error al actualizar datos en tiempo real: {message}")
+        )
+
+    def fall_back_to_polling(self):
+        """El publicador se cerró: el tiempo real sigue consultando la base.
+
+        Se continúa desde la fila guardada con la hora de la última muestra
+        en vivo mostrada (la ingesta publica y guarda la misma hora). Para
+        volver a las muestras en vivo se desactiva y activa el tiempo real.
+        """
+        self.stop_live_feed()
+        self.update_timer.stop()
+        self.status_bar.showMessage("Se perdió la conexión con las muestras en vivo; consultando la base de datos")
+        timestamp, start_id = self.last_live_timestamp, self.live_start_id
+
+        def last_shown_id(conn, task):
+            if timestamp is None:
+                return start_id
+            row_id = conn.execute("SELECT max(id) FROM sensor_data WHERE timestamp <= ?", (timestamp,)).fetchone()[0]
+            return max(row_id or 0, start_id)
+
+        def resume(last_id):
+            self.last_id = last_id
+            self.update_timer.start(1000)
+
+        self.query_worker.submit("tiempo_real", last_shown_id, on_result=resume,
+                                 on_error=self.on_real_time_error)
+
+    def add_real_time_rows(self, rows):
+        """Agrega a la tabla los registros nuevos"""
+        if not rows:
+            return
+        
+        # Actualizar el último ID conocido (las muestras en vivo no lo traen)
+        if rows[-1][0] is not None:
+            self.last_id = rows[-1][0]
+        else:
+            self.last_live_timestamp = rows[-1][1]
+        
+        # Los más recientes quedan arriba; los que no entran se descartan
+        self.live_model.append_rows(rows)
+        
+        # Actualizar información de registros
+        self.records_info.setText(
+            f"Registros: {self.live_model.rowCount()} (mostrando los últimos {self.live_model.capacity})")
+        
+        # Las columnas se ajustan solo con el primer lote: medir todas las
+        # celdas en cada actualización es lo más costoso del modo tiempo real
+        if not self.live_resized:
+            self.table_view.resizeColumnsToContents()
+            self.live_resized = True
 
     def apply_time_preset(self):
         """Aplica preajustes de tiempo a los selectores de fecha"""
@@ -250,65 +372,90 @@ class DatabaseViewer(QDialog):
         if self.real_time_enabled:
             self.real_time_checkbox.setChecked(False)
         
+        # Los timestamps se guardan como texto ISO ("2025-03-02 10:15:30.123456"),
+        # así que se comparan como texto y el índice sobre timestamp resuelve el
+        # rango. El fin es exclusivo y se corre un segundo para incluir las
+        # fracciones del último segundo seleccionado.
         start_datetime = self.start_date.dateTime().toString("yyyy-MM-dd HH:mm:ss")
-        end_datetime = self.end_date.dateTime().toString("yyyy-MM-dd HH:mm:ss")
-        
-        try:
-            # Conectar a la base de datos
-            conn = sqlite3.connect('sensor_data.db')
-            
-            # Consulta SQL con filtros
-            query = f"""
-            SELECT id, timestamp, accel_x, accel_y, accel_z, 
-                   gyro_roll, gyro_pitch, gyro_yaw,
-                   gps_lat, gps_lon, uv_index, temperature
-            FROM sensor_data
-            WHERE timestamp BETWEEN '{start_datetime}' AND '{end_datetime}'
-            ORDER BY timestamp DESC
-            """
-            
-            # Obtener datos como DataFrame
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            
-            # Actualizar el modelo de la tabla
-            self.update_table_model(df)
-            
-            # Actualizar información de registros
-            self.records_info.setText(f"Registros: {len(df)}")
-            self.status_bar.showMessage(f"Datos cargados: {len(df)} registros")
-            
-        except Exception as e:
-            self.status_bar.showMessage(f"Error al cargar datos: {str(e)}")
-            QMessageBox.critical(self, "Error", f"Error al consultar la base de datos: {str(e)}")
-
-    def update_table_model(self, df):
-        """Actualiza el modelo de la tabla con los datos del DataFrame"""
-        # Limpiar modelo actual
-        self.model.removeRows(0, self.model.rowCount())
-        
-        # Añadir filas
-        for i, row in df.iterrows():
-            items = []
-            for value in row:
-                # Formatear valores numéricos con 2 decimales
-                if isinstance(value, (int, float)) and not isinstance(value, bool):
-                    if isinstance(value, int):
-                        item = QStandardItem(str(value))
-                    else:
-                        item = QStandardItem(f"{value:.2f}")
-                else:
-                    item = QStandardItem(str(value))
-                items.append(item)
-            self.model.appendRow(items)
-            
-        # Ajustar ancho de columnas automáticamente
-        self.table_view.resizeColumnsToContents()
+        end_datetime = self.end_date.dateTime().addSecs(1).toString("yyyy-MM-dd HH:mm:ss")
+        
+        # Elegir la tabla: datos crudos o una de las de promedios
+        self.resolution_text = ""
+        if not self.model.source.read_only:
+            resolution = self.resolution.currentData()
+            if resolution == "auto":
+                seconds = self.start_date.dateTime().secsTo(self.end_date.dateTime())
+                resolution = choose_resolution(seconds)
+            if resolution is None:
+                self.model.source = SQLiteSource()
+            else:
+                self.model.source = SQLiteSource(rollup_view(resolution))
+                self.resolution_text = f" (promedios de {RESOLUTION_NAMES[resolution]})"
+        
+        # El modelo pide en segundo plano la primera página y luego el total;
+        # si había una consulta anterior en curso se cancela
+        self.status_bar.showMessage("Consultando datos...")
+        self.records_info.setText("Registros: ...")
+        self.model.set_time_range(start_datetime, end_datetime)
+        self.update_plot()
+
+    def on_total_changed(self, total):
+        """Se ejecuta cuando el modelo termina de contar los registros del filtro"""
+        self.records_info.setText(f"Registros: {total}{self.resolution_text}")
+        self.status_bar.showMessage(f"Datos cargados: {total} registros{self.resolution_text}")
+        
+        # Ajustar ancho de columnas con la primera página que trae datos; medir
+        # todas las celdas en cada filtro demoraba más que la propia consulta
+        if total and not self.columns_resized:
+            self.table_view.resizeColumnsToContents()
+            self.columns_resized = True
+
+    def update_plot(self):
+        """Dibuja en segundo plano el rango filtrado, si el gráfico está visible"""
+        time_range = self.model.time_range
+        if (self.view_tabs.currentWidget() is not self.history_plot or time_range is None
+                or self.model.source.read_only or time_range == self.plot_range):
+            return
+        self.plot_range = time_range
+        self.status_bar.showMessage("Calculando gráfico...")
+        self.query_worker.submit(
+            "grafico", load_history, (time_range, self.history_plot.plot_width()),
+            on_result=self.on_plot_loaded, on_error=self.on_plot_failed
+        )
+
+    def on_plot_loaded(self, result):
+        resolution, count, series = result
+        self.history_plot.set_series(series)
+        detail = f"mín/máx cada {RESOLUTION_NAMES[resolution]}" if resolution else "datos crudos"
+        self.status_bar.showMessage(f"Gráfico: {count} filas leídas ({detail})")
+
+    def on_plot_failed(self, message):
+        self.plot_range = None
+        self.status_bar.showMessage(f"Error al calcular el gráfico: {message}")
+
+    def on_load_failed(self, message):
+        self.status_bar.showMessage(f"Error al cargar datos: {message}")
+        QMessageBox.critical(self, "Error", f"Error al consultar la base de datos: {message}")
 
     def export_data(self, format_type):
-        """Exporta los datos filtrados a un archivo CSV o Excel"""
+        """Exporta los datos filtrados a un archivo CSV o Excel.
+
+        La exportación lee directamente de la base de datos, por bloques y en
+        segundo plano, así que incluye todos los registros del filtro (no solo
+        los cargados en la tabla) con su precisión completa.
+        """
+        if self.real_time_enabled:
+            # Los registros recibidos desde que se activó el tiempo real
+            where, params, order = "id > ?", (self.live_start_id,), "id DESC"
+            empty = self.live_model.rowCount() == 0
+        else:
+            where = "timestamp >= ? AND timestamp < ?"
+            params = self.model.time_range
+            order = order_clause(self.model.sort_column, self.model.sort_order)
+            empty = self.model.rowCount() == 0
+        
         # Asegurarse de que hay datos para exportar
-        if self.model.rowCount() == 0:
+        if empty:
             self.status_bar.showMessage("No hay datos para exportar")
             return
             
@@ -321,62 +468,111 @@ class DatabaseViewer(QDialog):
                 self, "Guardar como CSV", f"datos_sensores_{current_time}.csv",
                 "Archivos CSV (*.csv)", options=options
             )
-            if not file_name:
-                return
-                
-            # Convertir modelo a DataFrame
-            df = self.model_to_dataframe()
-            
-            # Guardar como CSV
-            try:
-                df.to_csv(file_name, index=False)
-                self.status_bar.showMessage(f"Datos exportados a {file_name}")
-            except Exception as e:
-                self.status_bar.showMessage(f"Error al exportar: {str(e)}")
-                
+            export_func = export_csv
         elif format_type == "excel":
             file_name, _ = QFileDialog.getSaveFileName(
                 self, "Guardar como Excel", f"datos_sensores_{current_time}.xlsx",
                 "Archivos Excel (*.xlsx)", options=options
             )
-            if not file_name:
-                return
-                
-            # Convertir modelo a DataFrame
-            df = self.model_to_dataframe()
-            
-            # Guardar como Excel
-            try:
-                df.to_excel(file_name, index=False)
-                self.status_bar.showMessage(f"Datos exportados a {file_name}")
-            except Exception as e:
-                self.status_bar.showMessage(f"Error al exportar: {str(e)}")
-
-    def model_to_dataframe(self):
-        """Convierte el modelo de tabla a un DataFrame de pandas"""
-        # Obtener encabezados
-        headers = []
-        for i in range(self.model.columnCount()):
-            headers.append(self.model.headerData(i, Qt.Horizontal))
-            
-        # Obtener datos
-        data = []
-        for row in range(self.model.rowCount()):
-            row_data = []
-            for col in range(self.model.columnCount()):
-                item = self.model.item(row, col)
-                if item is not None:
-                    row_data.append(item.text())
-                else:
-                    row_data.append("")
-            data.append(row_data)
-            
-        # Crear DataFrame
-        return pd.DataFrame(data, columns=headers)
+            export_func = export_excel
+        elif format_type == "parquet":
+            file_name = QFileDialog.getExistingDirectory(self, "Carpeta del archivo Parquet")
+            export_func = export_parquet
+        else:
+            return
+        if not file_name:
+            return
         
-    def closeEvent(self, event):
-        """Se ejecuta cuando se cierra la ventana"""
-        # Detener el timer si está activo
+        self.set_export_enabled(False)
+        self.status_bar.showMessage("Exportando...")
+        # Fuera del tiempo real se incluyen los días archivados del rango filtrado
+        time_range = None if self.real_time_enabled else self.model.time_range
+        self.export_worker.submit(
+            "exportar", export_func, (file_name, where, params, order, time_range),
+            on_result=lambda count: self.on_export_finished(
+                f"Datos exportados a {file_name} ({count} registros)"),
+            on_error=lambda message: self.on_export_finished(f"Error al exportar: {message}")
+        )
+
+    def set_export_enabled(self, enabled):
+        # Las exportaciones leen de la base de datos, no de un archivo abierto
+        enabled = enabled and not self.model.source.read_only
+        self.export_csv_btn.setEnabled(enabled)
+        self.export_excel_btn.setEnabled(enabled)
+        self.export_parquet_btn.setEnabled(enabled)
+        self.import_archive_btn.setEnabled(enabled)
+
+    def toggle_archive(self):
+        """Abre un archivo Parquet como origen de datos, o vuelve a la base de datos"""
+        if self.model.source.read_only:
+            self.model.source = SQLiteSource()
+            self.table_group.setTitle("Datos del Sensor")
+            self.open_archive_btn.setText("Abrir archivo Parquet")
+            self.real_time_checkbox.setEnabled(True)
+            self.resolution.setEnabled(True)
+            self.view_tabs.setTabEnabled(1, True)
+            self.set_export_enabled(True)
+            self.apply_filters()
+            return
+        
+        directory = QFileDialog.getExistingDirectory(self, "Abrir archivo Parquet")
+        if not directory:
+            return
+        try:
+            source = ParquetSource(directory)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudo abrir el archivo: {str(e)}")
+            return
+        
+        if self.real_time_enabled:
+            self.real_time_checkbox.setChecked(False)
+        self.real_time_checkbox.setEnabled(False)
+        # Los archivos Parquet solo tienen datos crudos
+        self.resolution.setEnabled(False)
+        self.resolution_text = ""
+        # El gráfico lee de la base de datos
+        self.view_tabs.setCurrentIndex(0)
+        self.view_tabs.setTabEnabled(1, False)
+        self.model.set_source(source)
+        self.table_group.setTitle(f"Datos del Sensor (archivo: {directory})")
+        self.open_archive_btn.setText("Volver a la base de datos")
+        self.set_export_enabled(False)
+        if self.model.time_range is None:
+            self.apply_filters()
+
+    def import_archive(self):
+        """Carga en la base de datos los registros de un archivo Parquet"""
+        directory = QFileDialog.getExistingDirectory(self, "Importar archivo Parquet")
+        if not directory:
+            return
+        self.set_export_enabled(False)
+        self.status_bar.showMessage("Importando...")
+        self.export_worker.submit(
+            "exportar", lambda conn, task: import_parquet(self.db_path, directory),
+            on_result=lambda count: self.on_export_finished(
+                f"Importados {count} registros desde {directory}"),
+            on_error=lambda message: self.on_export_finished(f"Error al importar: {message}")
+        )
+
+    def on_export_finished(self, message):
+        self.set_export_enabled(True)
+        self.status_bar.showMessage(message)
+
+    def stop_background(self):
+        """Detiene el timer y el hilo de consultas"""
         if self.update_timer.isActive():
             self.update_timer.stop()
+        self.stop_live_feed()
+        for worker in (self.query_worker, self.export_worker):
+            if worker.isRunning():
+                worker.stop()
+
+    def reject(self):
+        # Cerrar con Escape no pasa por closeEvent
+        self.stop_background()
+        super().reject()
+        
+    def closeEvent(self, event):
+        """Se ejecuta cuando se cierra la ventana"""
+        self.stop_background()
         event.accept()
\ No newline at end of file
@@ -0,0 +1,181 @@
+import queue
+import sqlite3
+import threading
+import time
+from rollups import update_rollups
+
+INSERT_SQL = '''
+INSERT INTO sensor_data (
+    timestamp, accel_x, accel_y, accel_z,
+    gyro_roll, gyro_pitch, gyro_yaw,
+    gps_lat, gps_lon, uv_index, temperature, link
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Espera máxima por el bloqueo de escritura cuando otra conexión (por
+# ejemplo la importación de un archivo Parquet) está escribiendo
+BUSY_TIMEOUT_MS = 10000
+WRITE_RETRIES = 3  # Intentos de escribir un lote antes de descartarlo
+
+# Marcador para indicar al hilo escritor que debe vaciar la cola y terminar
+_STOP = object()
+
+
+class DatabaseWriter:
+    """Escribe las muestras en SQLite desde un hilo propio, agrupadas en lotes.
+
+    Las muestras se encolan sin bloquear (``put``) y el hilo escritor las
+    inserta con ``executemany`` en una sola transacción cada vez que se
+    acumulan ``batch_size`` muestras o pasan ``flush_interval`` segundos.
+    En la misma transacción se actualizan las tablas de agregados
+    (``rollups.py``). Si la base está bloqueada por otra conexión el lote se
+    reintenta; si aun así no se puede escribir, sus muestras se cuentan
+    como descartadas.
+    """
+
+    def __init__(self, db_path='sensor_data.db', max_queue=10000,
+                 batch_size=500, flush_interval=0.5, monitor=None):
+        self.db_path = db_path
+        self.monitor = monitor  # PerfMonitor opcional
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        # Contadores
+        self.total_written = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+        self.total_commit_ms = 0.0
+
+        self.thread = threading.Thread(target=self._run, name="DatabaseWriter")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def put(self, data, block=False):
+        """Encola una muestra para ser escrita.
+
+        Normalmente nunca bloquea al llamador: con la cola llena la muestra se
+        descarta. Con ``block`` espera a que haya lugar, para fuentes que
+        pueden ir al ritmo del escritor (una reproducción a velocidad 0).
+        """
+        try:
+            self.queue.put(data, block=block)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def stats(self):
+        """Devuelve los contadores del escritor"""
+        return {
+            "queue_depth": self.queue.qsize(),
+            "total_written": self.total_written,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "last_commit_ms": self.last_commit_ms,
+            "max_commit_ms": self.max_commit_ms,
+            "avg_commit_ms": self.total_commit_ms / self.batches if self.batches else 0.0,
+        }
+
+    def close(self, timeout=10):
+        """Escribe las muestras pendientes y detiene el hilo escritor"""
+        if not self.thread.is_alive():
+            return
+        # El marcador debe entrar aunque la cola esté llena
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        # WAL permite lecturas concurrentes (visualizador) mientras se escribe,
+        # y con synchronous=NORMAL solo se sincroniza el disco en los checkpoints
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        running = True
+        while running:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if item is _STOP:
+                break
+
+            # Reunir el lote hasta llegar al tamaño máximo o al tiempo límite
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    running = False
+                    break
+                batch.append(item)
+
+            self._write_batch(conn, batch)
+
+        # Vaciar lo que haya quedado en la cola antes de cerrar
+        pending = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                pending.append(item)
+        if pending:
+            self._write_batch(conn, pending)
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        for attempt in range(1, WRITE_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                with conn:
+                    # BEGIN IMMEDIATE toma el bloqueo de escritura (esperando hasta
+                    # busy_timeout) antes de leer el último id, así update_rollups
+                    # no cuenta filas que otra conexión haya insertado en el medio
+                    conn.execute("BEGIN IMMEDIATE")
+                    last_id = conn.execute("SELECT coalesce(max(id), 0) FROM sensor_data").fetchone()[0]
+                    conn.executemany(INSERT_SQL, batch)
+                    # Los agregados por intervalo se actualizan en la misma transacción
+                    update_rollups(conn, last_id)
+            except sqlite3.OperationalError as e:
+                # Base bloqueada por otra conexión: se vuelve a intentar
+                error = e
+                print(f"Error al insertar datos (intento {attempt} de {WRITE_RETRIES}): {e}")
+                continue
+            except sqlite3.Error as e:
+                error = e
+                break
+            self._record_batch(batch, (time.perf_counter() - start) * 1000)
+            return
+        self.write_errors += 1
+        self.dropped += len(batch)
+        print(f"Error al insertar datos, {len(batch)} muestras descartadas: {error}")
+
+    def _record_batch(self, batch, elapsed_ms):
+        self.total_written += len(batch)
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.last_commit_ms = elapsed_ms
+        if self.monitor:
+            self.monitor.record("sqlite_commit", elapsed_ms / 1000)
+        self.max_commit_ms = max(self.max_commit_ms, elapsed_ms)
+        self.total_commit_ms += elapsed_ms
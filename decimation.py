@@ -0,0 +1,97 @@
+import heapq
+import numpy as np
+
+
+def _farthest_point(x, y, first, last):
+    """Punto entre first y last más alejado del segmento que los une"""
+    if last - first < 2:
+        return None
+    dx = x[last] - x[first]
+    dy = y[last] - y[first]
+    px = x[first + 1:last] - x[first]
+    py = y[first + 1:last] - y[first]
+    norm = np.hypot(dx, dy)
+    if norm == 0:
+        distances = np.hypot(px, py)
+    else:
+        distances = np.abs(dx * py - dy * px) / norm
+    k = int(np.argmax(distances))
+    return distances[k], first + 1 + k
+
+
+def simplify_track(lat, lon, max_points=500, tolerance=0.0):
+    """Simplifica una traza GPS con Douglas-Peucker.
+
+    En vez de recorrer todos los segmentos, se divide siempre primero el
+    segmento con el punto más alejado, hasta llegar a ``max_points`` vértices
+    o hasta que ninguna desviación supere ``tolerance`` (en grados de
+    latitud). Así decenas de miles de puntos se reducen a unos cientos
+    conservando la forma de la traza. Devuelve los índices conservados,
+    ordenados.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    n = len(lat)
+    if n <= max(max_points, 2):
+        return np.arange(n)
+
+    # Aproximación plana: la longitud se escala por el coseno de la latitud
+    x = lon * np.cos(np.radians(np.nanmean(lat)))
+    y = lat
+
+    keep = [0, n - 1]
+    heap = []
+
+    def push(first, last):
+        found = _farthest_point(x, y, first, last)
+        if found is not None:
+            distance, k = found
+            heapq.heappush(heap, (-distance, first, last, k))
+
+    push(0, n - 1)
+    while heap and len(keep) < max_points:
+        distance, first, last, k = heapq.heappop(heap)
+        if -distance <= tolerance:
+            break
+        keep.append(k)
+        push(first, k)
+        push(k, last)
+    return np.sort(np.array(keep))
+
+
+def minmax_decimate(x, y, bins):
+    """Reduce una serie a lo sumo a 4 puntos por intervalo de x (estilo M4).
+
+    El eje x se divide en ``bins`` intervalos iguales (uno por píxel de
+    ancho) y de cada uno se conservan el primer y el último punto y los de
+    valor mínimo y máximo. Al dibujar con una línea el resultado se ve igual
+    que la serie completa, con todos los picos, usando unos pocos miles de
+    puntos. ``x`` debe estar ordenado; los NaN se ignoran. Devuelve los
+    índices conservados, ordenados.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= 4 * bins:
+        return np.arange(n)
+
+    # Intervalo de cada punto y posición donde empieza cada intervalo no vacío
+    span = x[-1] - x[0]
+    if span > 0:
+        bin_of = np.minimum(((x - x[0]) * (bins / span)).astype(np.int64), bins - 1)
+    else:
+        bin_of = np.zeros(n, dtype=np.int64)
+    starts = np.flatnonzero(np.diff(bin_of, prepend=-1))
+    ends = np.append(starts[1:], n) - 1
+    sizes = ends - starts + 1
+
+    # Mínimo y máximo de cada intervalo; luego el primer índice que los alcanza
+    index = np.arange(n)
+    group_min = np.repeat(np.fmin.reduceat(y, starts), sizes)
+    group_max = np.repeat(np.fmax.reduceat(y, starts), sizes)
+    argmin = np.minimum.reduceat(np.where(y == group_min, index, n), starts)
+    argmax = np.minimum.reduceat(np.where(y == group_max, index, n), starts)
+
+    keep = np.concatenate([starts, ends, argmin, argmax])
+    # Los intervalos sin valores (todo NaN) no tienen mínimo ni máximo
+    return np.unique(keep[keep < n])
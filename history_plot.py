@@ -0,0 +1,120 @@
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from decimation import minmax_decimate
+from partitions import RANGE_VIEW, attach_range
+from rollups import choose_resolution, rollup_table
+
+# Paneles del gráfico histórico: (título, [(columna, etiqueta)])
+PANELS = [
+    ("Acel.", [("accel_x", "X"), ("accel_y", "Y"), ("accel_z", "Z")]),
+    ("Giro.", [("gyro_roll", "Roll"), ("gyro_pitch", "Pitch"), ("gyro_yaw", "Yaw")]),
+    ("UV", [("uv_index", "UV")]),
+    ("Temp. (°C)", [("temperature", "°C")]),
+]
+PLOT_CHANNELS = [column for _, channels in PANELS for column, _ in channels]
+
+# julianday('1970-01-01'); matplotlib cuenta las fechas en días desde 1970
+UNIX_EPOCH_JULIAN = 2440587.5
+CHUNK_SIZE = 50000  # Filas leídas de SQLite por iteración
+
+
+def read_array(conn, task, query, params):
+    """Ejecuta la consulta y devuelve el resultado como matriz float (NULL -> NaN)"""
+    cursor = conn.execute(query, params)
+    parts = []
+    while True:
+        rows = cursor.fetchmany(CHUNK_SIZE)
+        if not rows:
+            break
+        task.check()
+        parts.append(np.array(rows, dtype=float))
+    if not parts:
+        return np.empty((0, 1 + len(PLOT_CHANNELS)))
+    return np.concatenate(parts)
+
+
+def load_history(conn, task, time_range, width):
+    """Lee las series del rango y las reduce para un gráfico de ``width`` píxeles.
+
+    Si el rango es largo se leen los mínimos y máximos de la tabla de
+    agregados más gruesa que aún tenga un intervalo por píxel; si no, los
+    datos crudos. En los dos casos cada serie se reduce con
+    ``minmax_decimate``, así que los picos se conservan. Devuelve
+    (resolución o None, filas leídas, {columna: (x, y)}).
+    """
+    start, end = (np.datetime64(value) for value in time_range)
+    seconds = (end - start) / np.timedelta64(1, "s")
+    resolution = choose_resolution(seconds, min_points=width)
+
+    if resolution is None:
+        attach_range(conn, time_range)
+        data = read_array(conn, task, f"""
+        SELECT julianday(timestamp) - {UNIX_EPOCH_JULIAN}, {", ".join(PLOT_CHANNELS)}
+        FROM {RANGE_VIEW}
+        WHERE timestamp >= ? AND timestamp < ?
+        ORDER BY timestamp
+        """, time_range)
+        x = data[:, 0]
+        columns = {column: data[:, i + 1] for i, column in enumerate(PLOT_CHANNELS)}
+    else:
+        extremes = ", ".join(f"{column}_min, {column}_max" for column in PLOT_CHANNELS)
+        data = read_array(conn, task, f"""
+        SELECT julianday(bucket) - {UNIX_EPOCH_JULIAN}, {extremes}
+        FROM {rollup_table(resolution)}
+        WHERE bucket >= ? AND bucket < ?
+        ORDER BY bucket
+        """, time_range)
+        # Cada intervalo aporta su mínimo y su máximo en la misma x: la línea
+        # los une con un trazo vertical, como hace el dibujo de los datos crudos
+        x = np.repeat(data[:, 0], 2)
+        columns = {column: data[:, 1 + 2 * i:3 + 2 * i].ravel()
+                   for i, column in enumerate(PLOT_CHANNELS)}
+
+    series = {}
+    for column, y in columns.items():
+        keep = minmax_decimate(x, y, width)
+        series[column] = (x[keep], y[keep])
+    return resolution, len(data), series
+
+
+class HistoryPlot(FigureCanvas):
+    """Gráfico de los datos históricos, con un panel por sensor y el eje de tiempo compartido"""
+
+    def __init__(self, parent=None):
+        self.fig = Figure(figsize=(8, 6))
+        self.axes = self.fig.subplots(len(PANELS), 1, sharex=True)
+        self.lines = {}
+        for ax, (title, channels) in zip(self.axes, PANELS):
+            ax.set_ylabel(title, fontsize=9)
+            ax.grid(True, alpha=0.3)
+            for column, label in channels:
+                self.lines[column], = ax.plot([], [], linewidth=0.8, label=label)
+            if len(channels) > 1:
+                ax.legend(loc="upper right", fontsize="x-small", ncol=len(channels))
+
+        locator = mdates.AutoDateLocator()
+        self.axes[-1].xaxis.set_major_locator(locator)
+        self.axes[-1].xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
+        super().__init__(self.fig)
+        self.setParent(parent)
+        self.fig.tight_layout()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.fig.tight_layout()
+
+    def plot_width(self):
+        """Ancho en píxeles del área de dibujo: cantidad de intervalos de la reducción"""
+        return max(int(self.axes[0].bbox.width), 100)
+
+    def set_series(self, series):
+        for column, line in self.lines.items():
+            x, y = series.get(column, ([], []))
+            line.set_data(x, y)
+        for ax in self.axes:
+            ax.relim()
+            ax.autoscale_view()
+        self.draw_idle()
@@ -0,0 +1,298 @@
+import argparse
+import os
+import signal
+import threading
+import time
+from datetime import datetime
+from conect.frames import WIRE_FORMATS
+from data_sources import SOURCE_KINDS, create_source
+from database import Database
+from link_stats import LinkStats, combine
+from live_feed import LiveFeed
+from perf_monitor import PerfMonitor
+from serial_capture import CaptureWriter
+
+# Recepción y almacenamiento sin interfaz. Este módulo no importa PyQt5,
+# matplotlib ni folium: con ``python ingest.py`` la estación graba sin
+# ventana (por ejemplo en una computadora sin pantalla) y la interfaz se
+# conecta aparte con ``python main.py --conectar N`` para mostrar las
+# muestras publicadas con ``--publicar-puerto N``.
+
+
+class IngestService:
+    """Fuente de datos, base de datos, calidad de los enlaces y publicación en vivo.
+
+    Cada muestra se guarda, se publica y se pasa a las funciones de
+    ``consumers`` (la interfaz agrega ahí su cola). ``tick`` se debe llamar
+    una vez por segundo desde el hilo que creó el servicio, que es el
+    dueño de la conexión de la base de datos.
+    """
+
+    def __init__(self, db_path='sensor_data.db', source=None, source_kind="simulador", perf_log=None,
+                 perf_port=None, retention_days=None, max_bytes=None, live_port=None, vacuum=False):
+        self.db_path = db_path
+        self.source = source
+        self.source_reported = False
+        self.source_thread = None
+        # Una reproducción a velocidad 0 entrega más rápido de lo que se puede
+        # escribir: espera al escritor en lugar de llenar la cola y descartar
+        self.backpressure = getattr(source, "speed", None) == 0
+        self.consumers = []
+        self.extra_gauges = None  # Función opcional con valores instantáneos de la interfaz
+        self.ticks = 0
+
+        # Tiempos de cada etapa (ingesta, escritura, dibujo) para el panel de rendimiento
+        self.monitor = PerfMonitor(gauges=self.perf_gauges)
+
+        self.db = Database(db_path, monitor=self.monitor, retention_days=retention_days, max_bytes=max_bytes,
+                           vacuum=vacuum)
+        if source:
+            self.db.start_session(source_kind)
+
+        # Calidad de cada enlace, solo para las fuentes que leen puertos seriales
+        # (MultiLinkSource trae un LinkStats por enlace)
+        if hasattr(source, "links"):
+            self.link_stats = {link.name: link.stats for link in source.links}
+        elif hasattr(source, "link_stats"):
+            self.link_stats = {None: LinkStats()}
+        else:
+            self.link_stats = {}
+
+        if perf_log:
+            self.monitor.start_log(perf_log)
+        if perf_port is not None:
+            self.monitor.start_http_server(perf_port)
+        # Publicación de cada muestra para otros visualizadores (live_feed.py)
+        self.live_feed = None
+        if live_port is not None:
+            self.live_feed = LiveFeed(live_port)
+            self.live_feed.start()
+
+    def start(self):
+        """Empieza a recibir; la fuente entrega las muestras desde su propio hilo"""
+        source = self.source
+        if not source:
+            return
+        source.set_callback(self.process_sample)
+        if hasattr(source, "monitor"):
+            source.monitor = self.monitor
+        if hasattr(source, "link_stats"):
+            source.link_stats = self.link_stats[None]
+        self.source_thread = threading.Thread(target=source.start_reading)
+        self.source_thread.daemon = True
+        self.source_thread.start()
+
+    def process_sample(self, data):
+        """Procesa una muestra recibida (se ejecuta en el hilo de entrada)"""
+        # Extraer datos
+        accel = data['accel']
+        gyro = data['gyro']
+        gps = data['gps']
+
+        # Guardar en la base de datos
+        db_data = (
+            datetime.now(),
+            accel['x'], accel['y'], accel['z'],
+            gyro['roll'], gyro['pitch'], gyro['yaw'],
+            gps['lat'], gps['lon'],
+            data['uv_index'], data['temperature'],
+            data.get('link')
+        )
+        with self.monitor.measure("insert_data"):
+            self.db.insert_data(db_data, block=self.backpressure)
+        if self.live_feed:
+            with self.monitor.measure("publicacion"):
+                self.live_feed.publish(db_data)
+
+        for consumer in self.consumers:
+            consumer(data)
+
+    def perf_gauges(self):
+        """Valores instantáneos que acompañan a los tiempos de cada etapa"""
+        stats = self.db.stats()
+        gauges = {
+            "cola_escritura": stats["queue_depth"],
+            "muestras_guardadas": stats["total_written"],
+            "muestras_descartadas": stats["dropped"],
+        }
+        if self.link_stats:
+            link = combine(stats.snapshot() for stats in self.link_stats.values())
+            for field in ("frames", "lost", "duplicates", "out_of_order", "parse_errors"):
+                gauges[f"enlace_{field}"] = link[field]
+            gauges["enlace_jitter_ms"] = round(link["jitter_ms"], 3)
+        if hasattr(self.source, "links"):
+            links = self.source.stats().values()
+            gauges["enlaces_cola"] = sum(link["queue_depth"] for link in links)
+            gauges["enlaces_esperas"] = sum(link["waits"] for link in links)
+        if self.live_feed:
+            feed = self.live_feed.stats()
+            gauges["suscriptores"] = feed["subscribers"]
+            gauges["en_vivo_omitidas"] = feed["skipped"]
+        if self.extra_gauges:
+            gauges.update(self.extra_gauges())
+        return gauges
+
+    def link_summary(self):
+        """Una línea por enlace para la interfaz o la consola"""
+        return "\n".join(stats.summary(name=name) for name, stats in self.link_stats.items())
+
+    def tick(self):
+        """Tareas de cada segundo: la calidad de los enlaces se guarda en la sesión cada 10 s"""
+        self.ticks += 1
+        if self.link_stats and self.ticks % 10 == 0:
+            self.save_link_stats()
+        self.report_source()
+
+    def save_link_stats(self):
+        """Guarda la calidad de los enlaces en la sesión; con varios, también la de cada uno"""
+        snapshots = {name: stats.snapshot() for name, stats in self.link_stats.items()}
+        self.db.save_link_stats(combine(snapshots.values()))
+        if len(snapshots) > 1:
+            for name, snapshot in snapshots.items():
+                self.db.save_link_stats(snapshot, link=name)
+
+    def finished(self):
+        """True cuando una fuente finita (reproducción) ya entregó todo"""
+        done = getattr(self.source, "done", None)
+        return done is not None and done.is_set()
+
+    def report_source(self):
+        """Informa una sola vez el ritmo alcanzado cuando una fuente finita termina"""
+        if self.source_reported or not self.finished():
+            return
+        self.source_reported = True
+        stats = self.source.stats()
+        db_stats = self.db.stats()
+        print(f"Fuente de datos terminada: {stats['delivered']} muestras en "
+              f"{stats['elapsed_s']:.2f} s ({stats['samples_per_s']:.0f} muestras/s); "
+              f"guardadas {db_stats['total_written']}, en cola {db_stats['queue_depth']}, "
+              f"descartadas al guardar {db_stats['dropped']}")
+
+    def status(self):
+        """Resumen para la consola del modo sin interfaz"""
+        stats = self.db.stats()
+        lines = [f"{stats['total_written']} muestras guardadas · {stats['dropped']} descartadas · "
+                 f"cola de escritura {stats['queue_depth']}"]
+        if self.link_stats:
+            lines.append(self.link_summary())
+        if self.live_feed:
+            lines.append(f"Suscriptores en vivo: {self.live_feed.stats()['subscribers']}")
+        return "\n".join(lines)
+
+    def run(self, stop, status_interval=60):
+        """Recibe hasta que se active ``stop`` o termine la fuente (bloquea)"""
+        self.start()
+        try:
+            while not stop.wait(1):
+                self.tick()
+                if status_interval and self.ticks % status_interval == 0:
+                    print(self.status(), flush=True)
+                if self.finished():
+                    break  # La reproducción terminó; close guarda lo pendiente
+        finally:
+            self.close()
+
+    def close(self, timeout=5):
+        if self.source:
+            self.source.stop()
+            # Las muestras que el hilo de entrada todavía esté entregando se
+            # guardan y publican antes de cerrar la publicación y la base de datos
+            if self.source_thread:
+                self.source_thread.join(timeout)
+                if self.source_thread.is_alive():
+                    print("La fuente de datos no terminó a tiempo; se descartan sus últimas muestras")
+        if self.link_stats:
+            self.save_link_stats()
+        if self.live_feed:
+            self.live_feed.close()
+        # Último resumen de rendimiento; luego escribir las muestras pendientes y cerrar la base de datos
+        self.monitor.close()
+        self.db.close()
+
+
+def add_ingest_arguments(parser):
+    """Opciones de la recepción, compartidas por ``ingest.py`` y ``main.py``"""
+    parser.add_argument("--fuente", choices=SOURCE_KINDS,
+                        help="origen de las muestras (por defecto el simulador, o replay si se indica --replay)")
+    parser.add_argument("--frecuencia", type=float, default=1.0,
+                        help="muestras por segundo del simulador y de la pseudo-terminal (1 a 10000)")
+    parser.add_argument("--puerto", action="append",
+                        help="puerto serial del ESP32 (por defecto se busca uno USB o CP210x); "
+                             "se puede repetir para leer varios enlaces a la vez")
+    parser.add_argument("--replay", metavar="ORIGEN",
+                        help="base de datos o captura serial cruda a reproducir")
+    parser.add_argument("--velocidad", type=float, default=1.0,
+                        help="1 = ritmo original, N = N veces más rápido, "
+                             "0 = lo más rápido que se pueda guardar (sin descartar muestras)")
+    parser.add_argument("--formato", choices=WIRE_FORMATS,
+                        help="codificación de las muestras reproducidas o escritas en la pseudo-terminal")
+    parser.add_argument("--desde", help="inicio del rango a reproducir (AAAA-MM-DD HH:MM:SS)")
+    parser.add_argument("--hasta", help="fin del rango a reproducir")
+    parser.add_argument("--base", default="sensor_data.db", help="base de datos donde se guardan las muestras")
+    parser.add_argument("--retencion-dias", type=int, metavar="N",
+                        help="borra los datos crudos de más de N días (los agregados se conservan)")
+    parser.add_argument("--limite-mb", type=float, metavar="MB",
+                        help="tamaño máximo de la base de datos; se borran primero los días más antiguos")
+    parser.add_argument("--compactar", action="store_true",
+                        help="reorganiza una vez una base creada con una versión anterior para que "
+                             "devuelva al disco el espacio de los días archivados (VACUUM completo)")
+    parser.add_argument("--captura", metavar="CARPETA",
+                        help="guarda los bytes crudos del puerto serial en archivos de captura")
+    parser.add_argument("--captura-max-mb", type=float, default=64,
+                        help="tamaño de cada archivo de captura antes de empezar otro")
+    parser.add_argument("--captura-archivos", type=int,
+                        help="cantidad de archivos de captura a conservar (por defecto todos)")
+    parser.add_argument("--perf-log", metavar="ARCHIVO",
+                        help="agrega cada 10 s una línea JSON con los tiempos de cada etapa")
+    parser.add_argument("--perf-puerto", type=int, metavar="N",
+                        help="publica las métricas de rendimiento en http://127.0.0.1:N/metrics")
+    parser.add_argument("--publicar-puerto", type=int, metavar="N",
+                        help="publica cada muestra en 127.0.0.1:N para otros visualizadores (live_feed.py)")
+
+
+def service_from_args(parser, args):
+    """Crea la fuente y el servicio de recepción con las opciones de ``add_ingest_arguments``"""
+    kind = args.fuente or ("replay" if args.replay else "simulador")
+    if kind == "replay" and not args.replay:
+        parser.error("la fuente replay necesita --replay ORIGEN")
+    if (kind == "replay" and os.path.exists(args.replay) and os.path.exists(args.base)
+            and os.path.samefile(args.replay, args.base)):
+        # Las muestras reproducidas se guardarían otra vez, con la hora actual, junto a las originales
+        parser.error("no se puede reproducir una base de datos sobre sí misma; indique otra con --base")
+    source = create_source(kind, rate_hz=args.frecuencia, ports=args.puerto, replay=args.replay,
+                           speed=args.velocidad, wire=args.formato, start=args.desde, end=args.hasta)
+    if args.captura and source is not None:
+        if hasattr(source, "capture"):
+            source.capture = CaptureWriter(args.captura, int(args.captura_max_mb * 1024 * 1024),
+                                           args.captura_archivos)
+        elif hasattr(source, "capture_to"):
+            source.capture_to(args.captura, int(args.captura_max_mb * 1024 * 1024), args.captura_archivos)
+        else:
+            print("La captura cruda solo está disponible con las fuentes serial, multi y pty")
+
+    max_bytes = int(args.limite_mb * 1024 * 1024) if args.limite_mb else None
+    return IngestService(args.base, source, source_kind=kind, perf_log=args.perf_log,
+                         perf_port=args.perf_puerto, retention_days=args.retencion_dias,
+                         max_bytes=max_bytes, live_port=args.publicar_puerto, vacuum=args.compactar)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recepción y almacenamiento de la estación, sin interfaz")
+    add_ingest_arguments(parser)
+    parser.add_argument("--estado-s", type=int, default=60, metavar="S",
+                        help="cada cuántos segundos se muestra el resumen en la consola (0 = nunca)")
+    args = parser.parse_args()
+
+    service = service_from_args(parser, args)
+    if service.source is None:
+        service.close()
+        raise SystemExit("No hay fuente de datos disponible")
+
+    # Ctrl+C o SIGTERM (systemd, docker stop) cierran la sesión y guardan lo pendiente
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    print("Recepción iniciada; Ctrl+C para terminar")
+    start = time.monotonic()
+    service.run(stop, args.estado_s)
+    print(f"Recepción terminada después de {time.monotonic() - start:.0f} s")
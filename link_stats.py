@@ -0,0 +1,203 @@
+import time
+from conect.frames import TICKS_MODULO
+
+# Contadores del enlace que se guardan con cada sesión (columnas de sessions)
+LINK_FIELDS = ("frames", "bytes", "parse_errors", "gaps", "lost", "duplicates",
+               "out_of_order", "resets", "jitter_ms")
+
+SEQ_MODULO = 1 << 16  # La secuencia del ESP32 es de 16 bits
+WINDOW = 1024  # Secuencias recientes recordadas para reconocer duplicadas (divide a SEQ_MODULO)
+# Estado de cada secuencia de la ventana. Las anteriores a la primera trama
+# (o a un reinicio) quedan en UNKNOWN: si llegan tarde no se habían contado
+# como perdidas.
+UNKNOWN, RECEIVED, MISSING = 0, 1, 2
+RESET_MS = 5000  # Si ticks_ms retrocede más que esto, el ESP32 se reinició
+
+
+class LinkStats:
+    """Calidad del enlace serial, actualizada con cada bloque y cada trama en O(1).
+
+    Con la secuencia de 16 bits del firmware se cuentan huecos (y tramas
+    perdidas), duplicadas y desordenadas; una trama atrasada que llega
+    después de su hueco se descuenta de las perdidas (solo si se había
+    contado como perdida). Con ``ticks_ms`` y la
+    hora de recepción se calcula el jitter como en RTP (RFC 3550) y el
+    retraso relativo al mínimo observado. Los dos incluyen el agrupamiento
+    de la lectura del puerto: las tramas de un mismo bloque comparten la
+    hora de recepción. Las tasas son las del último segundo completo.
+    """
+
+    def __init__(self):
+        # Totales
+        self.frames = 0
+        self.bytes = 0
+        self.parse_errors = 0
+        self.gaps = 0
+        self.lost = 0
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.resets = 0
+        self.jitter_ms = 0.0
+        self.delay_ms = 0.0
+
+        # Tasas por segundo
+        self.second = None
+        self.second_frames = 0
+        self.second_bytes = 0
+        self.frames_per_s = 0
+        self.bytes_per_s = 0
+
+        self.received = None  # Hora de recepción del bloque que se está decodificando
+        self.last_seq = None
+        self.window = bytearray(WINDOW)  # UNKNOWN, RECEIVED o MISSING por secuencia
+        self.last_ticks = None
+        self.clock = 0  # ticks_ms sin vueltas
+        self.last_transit = None
+        self.min_transit = None
+
+    def on_bytes(self, count, received=None):
+        """Registra un bloque leído del puerto"""
+        self.received = time.time() if received is None else received
+        self._tick(self.received)
+        self.bytes += count
+        self.second_bytes += count
+
+    def on_error(self):
+        self.parse_errors += 1
+
+    def on_frame(self, seq=None, ticks_ms=None):
+        """Registra una trama decodificada (binaria o JSON)"""
+        self.frames += 1
+        self.second_frames += 1
+        if ticks_ms is not None and self.received is not None:
+            self._timing(ticks_ms)
+        if seq is not None:
+            self._sequence(seq)
+
+    def _tick(self, now):
+        second = int(now)
+        if second == self.second:
+            return
+        if self.second is not None and second == self.second + 1:
+            self.frames_per_s = self.second_frames
+            self.bytes_per_s = self.second_bytes
+        else:
+            # Pasó más de un segundo sin datos
+            self.frames_per_s = 0
+            self.bytes_per_s = 0
+        self.second = second
+        self.second_frames = 0
+        self.second_bytes = 0
+
+    def _timing(self, ticks_ms):
+        if self.last_ticks is None:
+            self.clock = ticks_ms
+        else:
+            step = (ticks_ms - self.last_ticks) % TICKS_MODULO
+            if step >= TICKS_MODULO // 2:
+                step -= TICKS_MODULO
+            if step < -RESET_MS:
+                self._reset()
+                self.clock = ticks_ms
+            else:
+                self.clock += step
+        self.last_ticks = ticks_ms
+
+        transit = self.received * 1000 - self.clock
+        if self.last_transit is not None:
+            self.jitter_ms += (abs(transit - self.last_transit) - self.jitter_ms) / 16
+        self.last_transit = transit
+        if self.min_transit is None or transit < self.min_transit:
+            self.min_transit = transit
+        self.delay_ms = transit - self.min_transit
+
+    def _reset(self):
+        """El ESP32 se reinició: la secuencia y el reloj empiezan de nuevo"""
+        self.resets += 1
+        self.last_seq = None
+        self.last_transit = None
+        self.min_transit = None
+
+    def _sequence(self, seq):
+        window = self.window
+        if self.last_seq is None:
+            window[:] = bytes(WINDOW)
+            window[seq % WINDOW] = RECEIVED
+            self.last_seq = seq
+            return
+        delta = (seq - self.last_seq) % SEQ_MODULO
+        if delta == 0:
+            self.duplicates += 1
+        elif delta < SEQ_MODULO // 2:
+            # Avanza; las secuencias salteadas quedan marcadas como perdidas
+            if delta > 1:
+                self.gaps += 1
+                self.lost += delta - 1
+                if delta >= WINDOW:
+                    window[:] = bytes([MISSING]) * WINDOW
+                else:
+                    for skipped in range(self.last_seq + 1, self.last_seq + delta):
+                        window[skipped % WINDOW] = MISSING
+            window[seq % WINDOW] = RECEIVED
+            self.last_seq = seq
+        elif SEQ_MODULO - delta < WINDOW:
+            state = window[seq % WINDOW]
+            if state == RECEIVED:
+                self.duplicates += 1
+            else:
+                window[seq % WINDOW] = RECEIVED
+                self.out_of_order += 1
+                if state == MISSING and self.lost > 0:
+                    # Llegó tarde: ya se había contado como perdida
+                    self.lost -= 1
+        else:
+            self._reset()
+            self._sequence(seq)
+
+    def snapshot(self, now=None):
+        """Contadores actuales; las tasas valen 0 si el último segundo no tuvo datos"""
+        now = time.time() if now is None else now
+        stale = self.second is None or int(now) > self.second + 1
+        expected = self.frames + self.lost
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "parse_errors": self.parse_errors,
+            "gaps": self.gaps,
+            "lost": self.lost,
+            "duplicates": self.duplicates,
+            "out_of_order": self.out_of_order,
+            "resets": self.resets,
+            "jitter_ms": self.jitter_ms,
+            "delay_ms": self.delay_ms,
+            "loss_percent": 100.0 * self.lost / expected if expected else 0.0,
+            "frames_per_s": 0 if stale else self.frames_per_s,
+            "bytes_per_s": 0 if stale else self.bytes_per_s,
+        }
+
+    def summary(self, now=None, name=None):
+        """Una línea de texto para la interfaz"""
+        s = self.snapshot(now)
+        title = f"Enlace {name}" if name else "Enlace"
+        return (f"{title}: {s['frames_per_s']} tramas/s · {s['bytes_per_s']} B/s · "
+                f"perdidas {s['lost']} ({s['loss_percent']:.2f} %) en {s['gaps']} huecos · "
+                f"duplicadas {s['duplicates']} · desordenadas {s['out_of_order']} · "
+                f"errores {s['parse_errors']} · jitter {s['jitter_ms']:.1f} ms · "
+                f"retraso {s['delay_ms']:.0f} ms")
+
+
+def combine(snapshots):
+    """Suma los contadores de varios enlaces; del jitter y el retraso queda el peor"""
+    total = {key: 0 for key in ("frames", "bytes", "parse_errors", "gaps", "lost", "duplicates",
+                                "out_of_order", "resets", "frames_per_s", "bytes_per_s")}
+    total["jitter_ms"] = 0.0
+    total["delay_ms"] = 0.0
+    for s in snapshots:
+        for key in total:
+            if key in ("jitter_ms", "delay_ms"):
+                total[key] = max(total[key], s[key])
+            else:
+                total[key] += s[key]
+    expected = total["frames"] + total["lost"]
+    total["loss_percent"] = 100.0 * total["lost"] / expected if expected else 0.0
+    return total
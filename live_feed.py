@@ -0,0 +1,330 @@
+import asyncio
+import collections
+import socket
+import struct
+import threading
+from datetime import datetime
+from conect.frames import sample_from_values
+
+# Publicación en vivo: la ingesta publica cada muestra en un puerto TCP local
+# y cualquier cantidad de visualizadores se suscriben sin consultar SQLite.
+# Al conectarse el suscriptor recibe LIVE_MAGIC y luego un mensaje por muestra:
+#   largo del resto (uint16) | número de mensaje (uint64) | hora (float64,
+#   segundos Unix) | acelerómetro y giroscopio (6 float32) | latitud y
+#   longitud (2 float64) | UV y temperatura (2 float32) | enlace (UTF-8)
+# en little-endian. Los canales van con la precisión de las tramas binarias.
+# Un salto en el número de mensaje indica muestras que no se enviaron a ese
+# suscriptor por estar atrasado.
+LIVE_MAGIC = b"ETLIVE1\n"
+MESSAGE_STRUCT = struct.Struct("<HQd6f2d2f")
+HEADER_SIZE = 2  # El largo no se cuenta a sí mismo
+
+RECONNECT_MIN_S = 0.5  # Espera antes del primer reintento de conexión del suscriptor
+RECONNECT_MAX_S = 5.0  # Espera máxima entre reintentos (se duplica en cada intento)
+
+SLOW_BUFFER = 256 * 1024  # Bytes pendientes desde los que se envía solo la última muestra
+MAX_BUFFER = 4 * 1024 * 1024  # Bytes pendientes desde los que se desconecta al suscriptor
+
+
+def encode_message(seq, timestamp, values, link=None):
+    """Mensaje de una muestra; ``timestamp`` es un datetime o segundos Unix"""
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.timestamp()
+    link = link.encode() if link else b""
+    size = MESSAGE_STRUCT.size - HEADER_SIZE + len(link)
+    try:
+        return MESSAGE_STRUCT.pack(size, seq, timestamp, *values) + link
+    except struct.error:
+        # Canales sin dato (null en JSON)
+        values = [float("nan") if v is None else v for v in values]
+        return MESSAGE_STRUCT.pack(size, seq, timestamp, *values) + link
+
+
+def decode_messages(buffer, start=0):
+    """Decodifica los mensajes completos desde ``start``.
+
+    Devuelve ``(mensajes, consumidos)`` con tuplas ``(seq, timestamp, valores, enlace)``.
+    """
+    messages = []
+    pos = start
+    end = len(buffer)
+    while pos + MESSAGE_STRUCT.size <= end:
+        fields = MESSAGE_STRUCT.unpack_from(buffer, pos)
+        next_pos = pos + HEADER_SIZE + fields[0]
+        if next_pos > end:
+            break
+        link = bytes(buffer[pos + MESSAGE_STRUCT.size:next_pos]).decode() or None
+        messages.append((fields[1], fields[2], fields[3:], link))
+        pos = next_pos
+    return messages, pos - start
+
+
+class LiveFeed:
+    """Publica las muestras en 127.0.0.1:``port`` para cualquier cantidad de suscriptores.
+
+    ``publish`` solo codifica la muestra y la agrega a una cola; el envío
+    se hace desde un bucle asyncio en un hilo propio, así la ingesta nunca
+    espera a un suscriptor. A cada suscriptor se le envía todo lo publicado
+    desde el envío anterior en una sola escritura; si tiene más de
+    ``slow_buffer`` bytes sin leer recibe solo la última muestra de cada
+    envío, y con más de ``max_buffer`` se lo desconecta.
+    """
+
+    def __init__(self, port=0, host="127.0.0.1", slow_buffer=SLOW_BUFFER, max_buffer=MAX_BUFFER):
+        self.host = host
+        self.port = port
+        self.slow_buffer = slow_buffer
+        self.max_buffer = max_buffer
+        self.pending = collections.deque()
+        self.scheduled = False
+        self.subscribers = set()
+        self.loop = None
+        self.server = None
+        self.seq = 0
+
+        # Contadores
+        self.published = 0
+        self.skipped = 0  # Muestras no enviadas a suscriptores atrasados
+        self.disconnected = 0
+
+    def start(self):
+        """Abre el puerto y empieza a atender suscriptores en un hilo propio"""
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._subscriber, self.host, self.port))
+        self.port = self.server.sockets[0].getsockname()[1]
+        thread = threading.Thread(target=self.loop.run_forever, name="LiveFeed")
+        thread.daemon = True
+        thread.start()
+        self.thread = thread
+        print(f"Muestras en vivo en {self.host}:{self.port}")
+
+    def publish(self, row):
+        """Publica una fila de sensor_data: (hora, 10 canales[, enlace]); no bloquea"""
+        self.seq += 1
+        link = row[11] if len(row) > 11 else None
+        self.pending.append(encode_message(self.seq, row[0], row[1:11], link))
+        self.published += 1
+        loop = self.loop
+        if not self.scheduled and loop:
+            self.scheduled = True
+            try:
+                loop.call_soon_threadsafe(self._flush)
+            except RuntimeError:
+                pass  # close cerró el bucle mientras tanto; ya no hay suscriptores
+
+    def _flush(self):
+        self.scheduled = False
+        pending = self.pending
+        messages = [pending.popleft() for _ in range(len(pending))]
+        if not messages or not self.subscribers:
+            return
+        data = b"".join(messages)
+        for writer in list(self.subscribers):
+            waiting = writer.transport.get_write_buffer_size()
+            if waiting > self.max_buffer:
+                print("Suscriptor en vivo desconectado por no leer las muestras")
+                self.subscribers.discard(writer)
+                self.disconnected += 1
+                writer.transport.abort()
+            elif waiting > self.slow_buffer:
+                writer.write(messages[-1])
+                self.skipped += len(messages) - 1
+            else:
+                writer.write(data)
+
+    async def _subscriber(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer.write(LIVE_MAGIC)
+        self.subscribers.add(writer)
+        try:
+            # Los suscriptores no envían nada; se espera a que cierren
+            while await reader.read(4096):
+                pass
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "skipped": self.skipped,
+            "disconnected": self.disconnected,
+        }
+
+    def close(self):
+        if not self.loop:
+            return
+
+        async def shutdown():
+            self.server.close()
+            for writer in list(self.subscribers):
+                writer.transport.abort()  # Sin esperar lo que no leyeron
+            self.subscribers.clear()
+            # Con la conexión cerrada, las tareas de los suscriptores terminan solas
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            if tasks:
+                await asyncio.wait(tasks, timeout=1)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        self.loop = None
+
+
+class LiveSubscriber:
+    """Recibe las muestras de un LiveFeed, con la interfaz de SerialDataClient.
+
+    Cada muestra llega con el formato de las líneas JSON del ESP32 más
+    ``timestamp`` (datetime), ``link`` y ``live_seq``. ``skipped`` cuenta
+    las muestras que el publicador no envió por estar atrasado. ``sock``
+    es None mientras no hay conexión; ``start_reading`` vuelve a conectarse
+    solo si el publicador todavía no inició, se cierra o se reinicia.
+    """
+
+    def __init__(self, port, host="127.0.0.1", chunk_size=65536,
+                 reconnect_min=RECONNECT_MIN_S, reconnect_max=RECONNECT_MAX_S):
+        self.host = host
+        self.port = port
+        self.chunk_size = chunk_size
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.sock = None
+        self.data_callback = None
+        self.running = False
+        self.stopped = False
+        self.stop_event = threading.Event()
+        self.last_seq = None
+        self.received = 0
+        self.skipped = 0
+        self.connections = 0
+
+    def set_callback(self, callback):
+        self.data_callback = callback
+
+    def connect(self, timeout=5, quiet=False):
+        """Conecta con el publicador; devuelve False si no está disponible"""
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=timeout)
+            magic = b""
+            try:
+                while len(magic) < len(LIVE_MAGIC):
+                    part = sock.recv(len(LIVE_MAGIC) - len(magic))
+                    if not part:
+                        break
+                    magic += part
+            except OSError:
+                sock.close()
+                raise
+        except OSError as e:
+            if not quiet:
+                print(f"No se pudo conectar a las muestras en vivo: {e}")
+            return False
+        if magic != LIVE_MAGIC:
+            if not quiet:
+                print(f"{self.host}:{self.port} no publica muestras en vivo")
+            sock.close()
+            return False
+        sock.settimeout(None)
+        # Un publicador nuevo numera sus mensajes desde 1
+        self.last_seq = None
+        self.connections += 1
+        self.sock = sock
+        return True
+
+    def messages(self):
+        """Genera (seq, timestamp, valores, enlace) hasta que se cierre la conexión"""
+        if not self.sock and not self.connect():
+            return
+        # ``stop`` puede cerrar y borrar self.sock desde otro hilo en cualquier momento
+        sock = self.sock
+        if sock is None or self.stopped:
+            self.stop()  # Se detuvo mientras se conectaba
+            return
+        buffer = bytearray()
+        self.running = True
+        while self.running:
+            try:
+                chunk = sock.recv(self.chunk_size)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                # El publicador cerró (o ``stop``): sin conexión hasta reconectar
+                self.running = False
+                if self.sock is sock:
+                    self.sock = None
+                sock.close()
+                break
+            buffer += chunk
+            messages, consumed = decode_messages(buffer)
+            del buffer[:consumed]
+            for message in messages:
+                seq = message[0]
+                if self.last_seq is not None and seq > self.last_seq + 1:
+                    self.skipped += seq - self.last_seq - 1
+                self.last_seq = seq
+                self.received += 1
+                yield message
+
+    def start_reading(self):
+        """Entrega cada muestra al callback hasta ``stop`` (bloquea).
+
+        Si no hay publicador, o la conexión se cierra, se vuelve a intentar
+        con esperas que se duplican desde ``reconnect_min`` hasta ``reconnect_max``.
+        """
+        wait = self.reconnect_min
+        while not self.stopped:
+            if self.sock is None and not self.connect(quiet=self.connections > 0 or wait > self.reconnect_min):
+                self.stop_event.wait(wait)
+                wait = min(wait * 2, self.reconnect_max)
+                continue
+            if self.connections > 1:
+                print(f"Muestras en vivo de {self.host}:{self.port} recuperadas")
+            wait = self.reconnect_min
+            for seq, timestamp, values, link in self.messages():
+                data = sample_from_values(values)
+                data["timestamp"] = datetime.fromtimestamp(timestamp)
+                data["link"] = link
+                data["live_seq"] = seq
+                if self.data_callback:
+                    try:
+                        self.data_callback(data)
+                    except Exception as e:
+                        print(f"Error procesando datos: {e}")
+            if not self.stopped:
+                print(f"Se perdió la conexión con las muestras en vivo de {self.host}:{self.port}; "
+                      "reintentando...")
+
+    def stop(self):
+        self.stopped = True
+        self.running = False
+        self.stop_event.set()
+        sock, self.sock = self.sock, None
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+def subscribe(port, host="127.0.0.1"):
+    """Muestras en vivo como filas de sensor_data sin id: (hora, 10 canales, enlace).
+
+    Pensado para notebooks::
+
+        for row in subscribe(8765):
+            ...
+    """
+    subscriber = LiveSubscriber(port, host)
+    try:
+        for _, timestamp, values, link in subscriber.messages():
+            yield (datetime.fromtimestamp(timestamp), *values, link)
+    finally:
+        subscriber.stop()
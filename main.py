@@ -1,62 +1,30 @@
 import sys
+import argparse
 import folium
 import os
-import random
+import pathlib
+import json
+import math
 import sqlite3
-from datetime import datetime
-from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QWidget, QFrame, QPushButton
+import time
+from collections import deque
+from threading import Thread
+from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QWidget, QFrame, QPushButton, QShortcut
 from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtCore import QUrl, QTimer, Qt
-from PyQt5.QtGui import QPixmap, QPalette, QBrush
+from PyQt5.QtCore import QUrl, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QPixmap, QPalette, QBrush, QFont, QKeySequence
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
-
-class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect('sensor_data.db')
-        self.cursor = self.conn.cursor()
-        self.create_table()
-        print("Base de datos iniciada correctamente")
-
-    def create_table(self):
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS sensor_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            accel_x REAL,
-            accel_y REAL,
-            accel_z REAL,
-            gyro_roll REAL,
-            gyro_pitch REAL,
-            gyro_yaw REAL,
-            gps_lat REAL,
-            gps_lon REAL,
-            uv_index REAL,
-            temperature REAL
-        )
-        ''')
-        self.conn.commit()
-
-    def insert_data(self, data):
-        try:
-            self.cursor.execute('''
-            INSERT INTO sensor_data (
-                timestamp, accel_x, accel_y, accel_z, 
-                gyro_roll, gyro_pitch, gyro_yaw,
-                gps_lat, gps_lon, uv_index, temperature
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', data)
-            self.conn.commit()
-        except sqlite3.Error as e:
-            print(f"Error al insertar datos: {e}")
-
-    def close(self):
-        self.conn.close()
-        print("Conexión a la base de datos cerrada")
+from conect.frames import has_fix
+from decimation import simplify_track
+from perf_monitor import PerfMonitor
+from ingest import add_ingest_arguments, service_from_args
+from live_feed import LiveSubscriber
+from partitions import RANGE_VIEW, attach_range, split_range
 
 class LiveGraph(FigureCanvas):
-    def __init__(self, title, xlabel, ylabel):
+    def __init__(self, title, xlabel, ylabel, window_size=120):
         self.fig = Figure(figsize=(5, 4))
         self.ax = self.fig.add_subplot(111)
         self.title = title  # Guardar el título como atributo
@@ -65,82 +33,378 @@ class LiveGraph(FigureCanvas):
         self.ax.set_title(title, fontsize=10, pad=10)
         self.ax.set_xlabel(xlabel)
         self.ax.set_ylabel(ylabel)
-        self.data_x = []
-        self.data_y = []
+        self.ax.grid(True)
+
+        # Historial en un buffer circular de tamaño fijo
+        self.window_size = window_size  # Cantidad de valores visibles
+        self.data_y = np.zeros(window_size)
+        self.size = 0  # Valores válidos en el buffer
+        self.head = 0  # Posición donde se escribe el próximo valor
         self.counter = 0  # Contador para el eje x
+
+        # La línea se crea una sola vez; en cada muestra solo cambian sus datos.
+        # Al ser "animated" no entra en el dibujo completo y se pinta con blit
+        # sobre el fondo guardado (ejes, títulos y grilla).
+        self.line, = self.ax.plot([], [], '-o', markersize=3, animated=True)
+        self.background = None
+        self.ax.set_xlim(1, window_size)
+
         super().__init__(self.fig)
         self.fig.tight_layout()
+        self.mpl_connect('draw_event', self.on_draw)
 
-    def update_graph(self, new_y):
-        self.counter += 1
-        self.data_y.append(new_y)
-        
-        # Mantener solo los últimos 20 valores
-        if len(self.data_y) > 20:
-            self.data_y.pop(0)
-        
-        self.ax.clear()
-        # Crear array de x basado en el contador
-        x_values = np.arange(self.counter - len(self.data_y) + 1, self.counter + 1)
-        self.ax.plot(x_values, self.data_y, '-o')
-        
-        # Restablecer los títulos usando los atributos almacenados
-        self.ax.set_xlabel(self.xlabel)
-        self.ax.set_ylabel(self.ylabel)
-        self.ax.set_title(self.title, fontsize=10, pad=10)
-        self.ax.grid(True)
-        
-        # Ajustar el rango del eje x para mostrar siempre los últimos 20 valores
-        if self.counter > 20:
-            self.ax.set_xlim(self.counter - 19, self.counter + 1)
-        
+    def resizeEvent(self, event):
+        # El layout solo se recalcula cuando cambia el tamaño del gráfico
+        super().resizeEvent(event)
         self.fig.tight_layout()
-        self.draw()
+
+    def on_draw(self, event):
+        """Guarda el fondo después de cada dibujo completo y pinta la línea encima"""
+        self.background = self.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+    def update_graph(self, new_y):
+        self.add_values([new_y])
+
+    def add_values(self, values):
+        """Agrega varios valores y redibuja el gráfico una sola vez"""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        self.counter += len(values)
+
+        # Escribir en el buffer circular (solo caben los últimos window_size)
+        values = values[-self.window_size:]
+        positions = (self.head + np.arange(len(values))) % self.window_size
+        self.data_y[positions] = values
+        self.head = (self.head + len(values)) % self.window_size
+        self.size = min(self.size + len(values), self.window_size)
+
+        x_values, y_values = self.visible_data()
+        self.line.set_data(x_values, y_values)
+
+        if self.update_limits(x_values, y_values) or self.background is None:
+            # Cambiaron los ejes: dibujo completo (on_draw guarda el nuevo fondo)
+            self.draw()
+        else:
+            self.restore_region(self.background)
+            self.ax.draw_artist(self.line)
+            self.blit(self.ax.bbox)
+
+    def visible_data(self):
+        """Devuelve los valores del buffer en orden cronológico con su eje x"""
+        if self.size < self.window_size:
+            y_values = self.data_y[:self.size]
+        else:
+            y_values = np.concatenate((self.data_y[self.head:], self.data_y[:self.head]))
+        x_values = np.arange(self.counter - self.size + 1, self.counter + 1)
+        return x_values, y_values
+
+    def update_limits(self, x_values, y_values):
+        """Ajusta los límites de los ejes; devuelve True si hubo que cambiarlos.
+
+        El eje x avanza a saltos de un cuarto de ventana para que el dibujo
+        completo (ticks y etiquetas) no se repita en cada muestra.
+        """
+        changed = False
+        x_min, x_max = self.ax.get_xlim()
+        if self.counter > x_max:
+            self.ax.set_xlim(self.counter - self.window_size + 1,
+                             self.counter + self.window_size // 4)
+            changed = True
+
+        # Los canales sin dato llegan como NaN y no cuentan para la escala
+        valid = y_values[np.isfinite(y_values)]
+        if len(valid) == 0:
+            return changed
+        y_low, y_high = valid.min(), valid.max()
+        y_min, y_max = self.ax.get_ylim()
+        if changed or y_low < y_min or y_high > y_max:
+            margin = max((y_high - y_low) * 0.1, 0.5)
+            self.ax.set_ylim(y_low - margin, y_high + margin)
+            changed = True
+        return changed
+
+MAX_TRACK_FIXES = 50000  # Posiciones de la traza que se guardan en memoria
+
 
 class MapaFolium(QWidget):
-    def __init__(self, lat, lon):
+    # Posiciones leídas de la base de datos (latitudes, longitudes)
+    track_loaded = pyqtSignal(list, list)
+
+    def __init__(self, lat, lon, max_updates_per_second=2, db_path=None, max_track_points=500,
+                 monitor=None):
         super().__init__()
         self.lat = lat
         self.lon = lon
-
-        self.mapa = folium.Map(location=[lat, lon], zoom_start=15)
-        self.marker = folium.Marker([lat, lon], popup="Ubicación seleccionada")
+        self.monitor = monitor  # PerfMonitor opcional
+
+        # Historial de la traza; en el mapa se dibuja simplificado. Las
+        # posiciones guardadas se leen en un hilo aparte y se agregan al
+        # mapa cuando llegan, así la ventana se muestra enseguida.
+        self.max_track_points = max_track_points
+        self.track_lat, self.track_lon = [], []
+        self.track_ready = False
+        self.track_changed = False  # La polilínea de la página no tiene la traza actual
+        self.track_vertices = 0  # Vértices de la polilínea en la página
+
+        # La página del mapa se genera una sola vez; luego las posiciones se
+        # envían con JavaScript sin recargarla
+        self.mapa = folium.Map(location=[self.lat, self.lon], zoom_start=15)
+        self.marker = folium.Marker([self.lat, self.lon], popup="Ubicación actual")
         self.marker.add_to(self.mapa)
+        # Folium no acepta una polilínea vacía: se crea con el centro y se
+        # vacía al cargar la página, para que no una el centro con la primera posición
+        self.track = folium.PolyLine([[self.lat, self.lon]], color="red", weight=3)
+        self.track.add_to(self.mapa)
 
         self.mapa_file = os.path.abspath("mapa.html")
         self.mapa.save(self.mapa_file)
 
         self.browser = QWebEngineView()
+        self.page_ready = False
+        self.browser.loadFinished.connect(self.on_load_finished)
         self.browser.setUrl(QUrl.fromLocalFile(self.mapa_file))
 
         layout = QVBoxLayout()
         layout.addWidget(self.browser)
         self.setLayout(layout)
 
+        # Posiciones recibidas desde el último envío al navegador. Mientras la
+        # página carga se guardan a lo sumo max_track_points; si se descartan,
+        # el primer envío reemplaza la polilínea por la traza simplificada.
+        self.pending_points = deque(maxlen=max_track_points)
+        self.pending_total = 0
+        self.js_timer = QTimer()
+        self.js_timer.timeout.connect(self.flush_updates)
+        self.js_timer.start(int(1000 / max_updates_per_second))
+
+        self.track_loaded.connect(self.on_track_loaded)
+        if db_path is None:
+            self.track_ready = True
+        else:
+            loader = Thread(target=self.load_track, args=(db_path,))
+            loader.daemon = True
+            loader.start()
+
+    def load_track(self, db_path):
+        """Lee las posiciones GPS registradas, también las de días archivados (en su propio hilo).
+
+        Si hay más de MAX_TRACK_FIXES se lee una de cada N, elegidas por id
+        en la consulta; la última posición se incluye siempre.
+        """
+        rows = []
+        try:
+            # Solo lectura: la base puede ser la de otro proceso (ingest.py)
+            conn = sqlite3.connect(pathlib.Path(db_path).absolute().as_uri() + "?mode=ro", uri=True)
+            try:
+                # Los días archivados se leen por tramos, como en replay.db_samples
+                ranges = split_range(conn)
+                fixes = (f"FROM {RANGE_VIEW} WHERE timestamp >= ? AND timestamp < ? "
+                         "AND gps_lat IS NOT NULL AND gps_lon IS NOT NULL")
+                total = 0
+                for time_range in ranges:
+                    attach_range(conn, time_range)
+                    total += conn.execute(f"SELECT count(*) {fixes}", time_range).fetchone()[0]
+                step = max(1, math.ceil(total / MAX_TRACK_FIXES))
+                for time_range in ranges:
+                    attach_range(conn, time_range)
+                    rows += conn.execute(
+                        f"SELECT gps_lat, gps_lon {fixes} AND id % ? = 0 ORDER BY timestamp, id",
+                        (*time_range, step)
+                    ).fetchall()
+                if step > 1:
+                    last = conn.execute(
+                        f"SELECT gps_lat, gps_lon {fixes} ORDER BY timestamp DESC, id DESC LIMIT 1",
+                        ranges[-1]
+                    ).fetchone()
+                    if last and (not rows or rows[-1] != last):
+                        rows.append(last)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error al cargar la traza GPS: {e}")
+        try:
+            self.track_loaded.emit([row[0] for row in rows], [row[1] for row in rows])
+        except RuntimeError:
+            pass  # La ventana se cerró antes de terminar la lectura
+
+    def on_track_loaded(self, track_lat, track_lon):
+        """Pone las posiciones guardadas antes de las recibidas mientras se leían"""
+        self.track_ready = True
+        if not track_lat:
+            return
+        if not self.track_lat:
+            self.lat, self.lon = track_lat[-1], track_lon[-1]
+        self.track_lat = track_lat + self.track_lat
+        self.track_lon = track_lon + self.track_lon
+        self.compact_track()
+        self.track_changed = True
+
+    def compact_track(self):
+        """Con más de MAX_TRACK_FIXES posiciones se conserva una de cada dos (y siempre la última)"""
+        if len(self.track_lat) > MAX_TRACK_FIXES:
+            self.track_lat = self.track_lat[::-2][::-1]
+            self.track_lon = self.track_lon[::-2][::-1]
+
+    def simplified_track(self):
+        """Traza completa reducida a lo sumo a max_track_points vértices"""
+        indices = simplify_track(self.track_lat, self.track_lon, self.max_track_points)
+        return [[self.track_lat[i], self.track_lon[i]] for i in indices]
+
+    def on_load_finished(self, ok):
+        self.page_ready = ok
+        if ok:
+            self.browser.page().runJavaScript(f"{self.track.get_name()}.setLatLngs([]);")
+            self.track_vertices = 0
+            # Si la página se recargó, la traza ya recibida se vuelve a dibujar
+            self.track_changed = bool(self.track_lat)
+
     def update_marker(self, lat, lon):
+        # Leaflet rechaza NaN y null: una muestra sin GPS no mueve el marcador ni entra en la traza
+        if not has_fix(lat, lon):
+            return
         self.lat = lat
         self.lon = lon
-        self.mapa = folium.Map(location=[lat, lon], zoom_start=15)
-        folium.Marker([lat, lon], popup="Ubicación actual").add_to(self.mapa)
-        self.mapa.save(self.mapa_file)
-        self.browser.reload()
+        self.track_lat.append(lat)
+        self.track_lon.append(lon)
+        self.compact_track()
+        self.pending_points.append([lat, lon])
+        self.pending_total += 1
+
+    def flush_updates(self):
+        """Envía en una sola llamada JavaScript las posiciones acumuladas"""
+        if not self.page_ready or not (self.pending_points or self.track_changed):
+            return
+        start = time.perf_counter()
+        track = self.track.get_name()
+        self.track_vertices += self.pending_total
+        if (self.track_changed or self.pending_total > len(self.pending_points)
+                or self.track_vertices > 2 * self.max_track_points):
+            # Llegó la traza guardada, faltan posiciones o la polilínea creció
+            # demasiado: se reemplaza por la traza simplificada
+            track_points = self.simplified_track()
+            self.track_vertices = len(track_points)
+            self.track_changed = False
+            add_points = f"{track}.setLatLngs({json.dumps(track_points)});"
+        else:
+            # Lo normal es solo agregar los puntos nuevos
+            add_points = f"puntos.forEach(function(p) {{ {track}.addLatLng(p); }});"
+        points = json.dumps(list(self.pending_points) or [[self.lat, self.lon]])
+        self.pending_points.clear()
+        self.pending_total = 0
+        self.browser.page().runJavaScript(f"""
+            (function() {{
+                var puntos = {points};
+                {add_points}
+                var ultimo = puntos[puntos.length - 1];
+                {self.marker.get_name()}.setLatLng(ultimo);
+                {self.mapa.get_name()}.panTo(ultimo);
+            }})();
+        """)
+        if self.monitor:
+            self.monitor.record("mapa_javascript", time.perf_counter() - start)
+
+class PerfOverlay(QLabel):
+    """Panel semitransparente con los percentiles de cada etapa, sobre la ventana principal"""
+
+    def __init__(self, monitor, parent):
+        super().__init__(parent)
+        self.monitor = monitor
+        font = QFont("Monospace")
+        font.setStyleHint(QFont.TypeWriter)
+        self.setFont(font)
+        self.setStyleSheet("""
+            background-color: rgba(0, 0, 0, 180);
+            color: #00ff88;
+            padding: 8px;
+            border-radius: 5px;
+        """)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.hide()
+        
+        # Se actualiza una vez por segundo, solo mientras está visible
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def toggle(self):
+        if self.isVisible():
+            self.timer.stop()
+            self.hide()
+        else:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.timer.start(1000)
+
+    def refresh(self):
+        self.setText(self.monitor.format_table())
+        self.adjustSize()
+        self.move(10, 10)
+
 
 class MainApp(QWidget):
-    def __init__(self):
+    """Ventana principal de la estación.
+
+    Con ``service`` (ingest.IngestService) la ventana recibe y guarda las
+    muestras en este mismo proceso. Sin él solo muestra las que publica
+    otro proceso (``python ingest.py --publicar-puerto N``) en ``live_port``
+    y lee ``db_path`` sin modificarla.
+    """
+
+    def __init__(self, service=None, live_port=None, db_path='sensor_data.db'):
         super().__init__()
         self.setWindowTitle("Interfaz de Sensores")
         self.setGeometry(100, 100, 1200, 800)
         
-        # Inicializar base de datos
-        self.db = Database()
+        # Cola entre el hilo de entrada y la interfaz; deque.append y popleft
+        # son atómicos, así que no hace falta un lock. Si la interfaz se
+        # atrasa, se descartan las muestras más antiguas.
+        self.sample_queue = deque(maxlen=1000)
+        self.max_fps = 10  # Máximo de refrescos de la interfaz por segundo
+        self.service = service
+        self.subscriber = None
+        if service:
+            self.db_path = service.db_path
+            self.live_port = service.live_feed.port if service.live_feed else None
+            # Tiempos de cada etapa (ingesta, escritura, dibujo) para el panel de rendimiento
+            self.monitor = service.monitor
+            service.extra_gauges = self.perf_gauges
+            service.consumers.append(self.sample_queue.append)
+        else:
+            self.db_path = db_path
+            self.live_port = live_port
+            self.monitor = PerfMonitor(gauges=self.perf_gauges)
+            self.subscriber = LiveSubscriber(live_port)
+            self.subscriber.set_callback(self.sample_queue.append)
         
         # Configurar UI
         self.setup_ui()
         
-        # Timer para actualizar datos
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_data)
-        self.timer.start(1000)  # Actualización cada 1 segundo
+        # La fuente de datos (simulador, puerto serial, reproducción,
+        # pseudo-terminal o el proceso de recepción) entrega las muestras
+        # desde su propio hilo
+        if service:
+            service.start()
+        else:
+            # Se conecta (y se reconecta) aunque ingest.py todavía no haya iniciado
+            self.source_thread = Thread(target=self.subscriber.start_reading)
+            self.source_thread.daemon = True
+            self.source_thread.start()
+        
+        # Timer en el hilo de la interfaz que aplica las muestras acumuladas
+        self.ui_timer = QTimer()
+        self.ui_timer.timeout.connect(self.refresh_ui)
+        self.ui_timer.start(int(1000 / self.max_fps))
+        
+        # La línea del enlace se actualiza cada segundo y se guarda en la sesión cada 10 s
+        self.link_timer = QTimer()
+        self.link_timer.timeout.connect(self.update_link_stats)
+        self.link_timer.start(1000)
+        
+        # Panel de rendimiento, oculto hasta pulsar F12 o el botón
+        self.perf_overlay = PerfOverlay(self.monitor, self)
+        QShortcut(QKeySequence("F12"), self, activated=self.toggle_perf_overlay)
 
     def setup_ui(self):
         palette = QPalette()
@@ -194,11 +458,25 @@ class MainApp(QWidget):
             }
         """)
         self.database_viewer_btn.clicked.connect(self.open_database_viewer)
+        
+        # Botón para mostrar u ocultar el panel de rendimiento (también con F12)
+        self.perf_btn = QPushButton("Rendimiento")
+        self.perf_btn.setStyleSheet(self.database_viewer_btn.styleSheet())
+        self.perf_btn.clicked.connect(self.toggle_perf_overlay)
         database_btn_layout.addStretch()
         database_btn_layout.addWidget(self.database_viewer_btn)
+        database_btn_layout.addWidget(self.perf_btn)
         database_btn_layout.addStretch()
         main_layout.addLayout(database_btn_layout)
 
+        # Calidad del enlace serial (tramas, pérdidas, errores y jitter)
+        self.link_label = QLabel("Enlace: esperando datos...")
+        self.link_label.setStyleSheet(
+            "QLabel { color: white; font-weight: bold; background-color: rgba(0, 0, 0, 100); padding: 4px; }")
+        self.link_label.setAlignment(Qt.AlignCenter)
+        self.link_label.setVisible(self.subscriber is not None or bool(self.service.link_stats))
+        main_layout.addWidget(self.link_label)
+
         # Layout superior
         top_layout = QGridLayout()
         top_layout.setSpacing(15)
@@ -254,7 +532,8 @@ class MainApp(QWidget):
         top_layout.addWidget(gps_frame, 0, 2)
 
         # Mapa
-        self.map_widget = MapaFolium(lat=-12.0464, lon=-77.0428)
+        self.map_widget = MapaFolium(lat=-12.0464, lon=-77.0428, db_path=self.db_path,
+                                     monitor=self.monitor)
         top_layout.addWidget(self.map_widget, 0, 3, 3, 1)
 
         # Crear línea divisoria
@@ -286,51 +565,104 @@ class MainApp(QWidget):
 
     def open_database_viewer(self):
         from database_viewer import DatabaseViewer
-        viewer = DatabaseViewer(self)
+        viewer = DatabaseViewer(self, live_port=self.live_port, db_path=self.db_path,
+                                read_only=self.service is None)
         viewer.exec_()
 
-    def update_data(self):
-        # Simular datos
-        lat, lon = -12.0464 + random.uniform(-0.001, 0.001), -77.0428 + random.uniform(-0.001, 0.001)
-        x, y, z = random.uniform(-10, 10), random.uniform(-10, 10), random.uniform(-10, 10)
-        roll, pitch, yaw = random.uniform(-180, 180), random.uniform(-180, 180), random.uniform(-180, 180)
-        uv = random.uniform(0, 11)
-        temp = random.uniform(15, 40)
-
-        # Guardar en la base de datos
-        data = (
-            datetime.now(),  # timestamp
-            x, y, z,        # acelerómetro
-            roll, pitch, yaw,  # giroscopio
-            lat, lon,          # GPS
-            uv, temp           # sensores
-        )
-        self.db.insert_data(data)
-
-        # Actualizar labels
-        self.label_x.setText(f"X: {x:.2f} m/s²")
-        self.label_y.setText(f"Y: {y:.2f} m/s²")
-        self.label_z.setText(f"Z: {z:.2f} m/s²")
-        self.label_roll.setText(f"Roll: {roll:.2f}°")
-        self.label_pitch.setText(f"Pitch: {pitch:.2f}°")
-        self.label_yaw.setText(f"Yaw: {yaw:.2f}°")
-        self.label_lat.setText(f"Lat: {lat:.5f}°")
-        self.label_lon.setText(f"Lon: {lon:.5f}°")
-
-        # Actualizar gráficos
-        self.uv_graph.update_graph(uv)
-        self.temp_graph.update_graph(temp)
-
-        # Actualizar marcador en el mapa
-        self.map_widget.update_marker(lat, lon)
+    def toggle_perf_overlay(self):
+        self.perf_overlay.toggle()
+
+    def perf_gauges(self):
+        """Valores instantáneos de la interfaz (se agregan a los de la recepción)"""
+        gauges = {"cola_interfaz": len(self.sample_queue)}
+        if self.subscriber:
+            gauges["en_vivo_recibidas"] = self.subscriber.received
+            gauges["en_vivo_omitidas"] = self.subscriber.skipped
+        return gauges
+
+    def refresh_ui(self):
+        """Aplica en un solo refresco todas las muestras recibidas desde el anterior"""
+        start = time.perf_counter()
+        samples = []
+        while True:
+            try:
+                samples.append(self.sample_queue.popleft())
+            except IndexError:
+                break
+        if not samples:
+            return
+        
+        # Las etiquetas y el mapa muestran solo la muestra más reciente
+        data = samples[-1]
+        accel = data['accel']
+        gyro = data['gyro']
+        gps = data['gps']
+        t0 = time.perf_counter()
+        self.label_x.setText(f"X: {accel['x']:.2f} m/s²")
+        self.label_y.setText(f"Y: {accel['y']:.2f} m/s²")
+        self.label_z.setText(f"Z: {accel['z']:.2f} m/s²")
+        self.label_roll.setText(f"Roll: {gyro['roll']:.2f}°")
+        self.label_pitch.setText(f"Pitch: {gyro['pitch']:.2f}°")
+        self.label_yaw.setText(f"Yaw: {gyro['yaw']:.2f}°")
+        if has_fix(gps['lat'], gps['lon']):
+            self.label_lat.setText(f"Lat: {gps['lat']:.5f}°")
+            self.label_lon.setText(f"Lon: {gps['lon']:.5f}°")
+        else:
+            self.label_lat.setText("Lat: sin GPS")
+            self.label_lon.setText("Lon: sin GPS")
+        t1 = time.perf_counter()
+        
+        # Los gráficos reciben todas las muestras, con un solo redibujado
+        self.uv_graph.add_values([s['uv_index'] for s in samples])
+        t2 = time.perf_counter()
+        self.temp_graph.add_values([s['temperature'] for s in samples])
+        t3 = time.perf_counter()
+        
+        # Actualizar mapa
+        self.map_widget.update_marker(gps['lat'], gps['lon'])
+        t4 = time.perf_counter()
+        
+        self.monitor.record("etiquetas", t1 - t0)
+        self.monitor.record("grafico_uv", t2 - t1)
+        self.monitor.record("grafico_temperatura", t3 - t2)
+        self.monitor.record("mapa_marcador", t4 - t3)
+        self.monitor.record("refresco_interfaz", t4 - start)
+
+    def update_link_stats(self):
+        if self.subscriber:
+            self.link_label.setText(
+                f"En vivo desde 127.0.0.1:{self.live_port} · recibidas {self.subscriber.received} · "
+                f"omitidas {self.subscriber.skipped}" if self.subscriber.sock else
+                f"Sin conexión con 127.0.0.1:{self.live_port}")
+            return
+        if self.service.link_stats:
+            self.link_label.setText(self.service.link_summary())
+        self.service.tick()
 
     def closeEvent(self, event):
-        # Cerrar la conexión a la base de datos al cerrar la aplicación
-        self.db.close()
+        self.ui_timer.stop()
+        self.link_timer.stop()
+        if self.service:
+            # Cierra la sesión, escribe las muestras pendientes y cierra la base de datos
+            self.service.close()
+        else:
+            self.subscriber.stop()
+            self.monitor.close()
         event.accept()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    ventana = MainApp()
+    parser = argparse.ArgumentParser(description="Interfaz de Sensores")
+    add_ingest_arguments(parser)
+    parser.add_argument("--conectar", type=int, metavar="N",
+                        help="no recibe ni guarda: muestra las muestras que publica ingest.py "
+                             "con --publicar-puerto N y lee --base sin modificarla")
+    # Los argumentos que no son de la aplicación quedan para Qt
+    args, qt_args = parser.parse_known_args()
+    
+    app = QApplication(sys.argv[:1] + qt_args)
+    if args.conectar is not None:
+        ventana = MainApp(live_port=args.conectar, db_path=args.base)
+    else:
+        ventana = MainApp(service_from_args(parser, args))
     ventana.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
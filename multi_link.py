@@ -0,0 +1,212 @@
+import asyncio
+import os
+import time
+from conect.serial_client import SerialDataClient
+from link_stats import LinkStats
+
+QUEUE_SIZE = 2000  # Muestras en espera por enlace antes de dejar de leerlo
+QUANTUM = 200  # Muestras que se entregan de cada enlace por turno
+
+
+class Link:
+    """Un enlace serial del núcleo asyncio: su decodificador, su cola y sus contadores"""
+
+    def __init__(self, name, client):
+        self.name = name
+        self.client = client
+        self.stats = LinkStats()
+        client.link_stats = self.stats
+        self.pending = []  # Muestras decodificadas del último bloque
+        client.set_callback(self.pending.append)
+        self.queue = None  # asyncio.Queue, se crea dentro del bucle
+        self.connected = True
+
+        # Contadores
+        self.delivered = 0
+        self.waits = 0  # Veces que la cola estaba llena y se dejó de leer el puerto
+
+
+class MultiLinkSource:
+    """Lee varios puertos seriales a la vez con asyncio, en un solo hilo.
+
+    Cada enlace tiene su propio decodificador (``SerialDataClient.feed``),
+    su ``LinkStats`` y una cola acotada de muestras. Cada muestra lleva en
+    ``"link"`` el puerto por el que llegó y todas se entregan al mismo
+    callback, tomando por turno a lo sumo ``quantum`` de cada enlace. Si la
+    cola de un enlace se llena, solo ese enlace deja de leerse hasta que se
+    vacíe (los bytes esperan en el buffer del puerto), así un enlace
+    ruidoso no retrasa a los demás.
+
+    En POSIX se espera a cada puerto con ``loop.add_reader`` sobre su
+    descriptor; donde no se puede (Windows) cada lectura bloqueante va al
+    ThreadPool del bucle.
+    """
+
+    def __init__(self, ports, baudrate=115200, queue_size=QUEUE_SIZE, quantum=QUANTUM, chunk_size=4096):
+        self.queue_size = queue_size
+        self.quantum = quantum
+        self.chunk_size = chunk_size
+        self.data_callback = None
+        self.monitor = None  # PerfMonitor opcional
+        self.running = False
+        self.loop = None
+        self.stopping = None
+        self.ready = None
+        self.links = []
+        for port in ports:
+            client = SerialDataClient(baudrate, chunk_size=chunk_size)
+            if client.connect(port):
+                self.links.append(Link(port, client))
+
+    def set_callback(self, callback):
+        self.data_callback = callback
+
+    def capture_to(self, directory, max_bytes, max_files=None):
+        """Guarda los bytes crudos de cada enlace en una subcarpeta con el nombre del puerto"""
+        from serial_capture import CaptureWriter
+        for link in self.links:
+            name = os.path.basename(link.name) or link.name.replace(":", "")
+            link.client.capture = CaptureWriter(os.path.join(directory, name), max_bytes, max_files)
+
+    def start_reading(self):
+        """Atiende todos los enlaces hasta ``stop`` (bloquea)"""
+        if not self.links:
+            raise Exception("No hay conexión serial establecida")
+        self.running = True
+        try:
+            asyncio.run(self._run())
+        finally:
+            for link in self.links:
+                link.client.stop()
+
+    def stop(self):
+        self.running = False
+        loop = self.loop
+        if loop:
+            try:
+                loop.call_soon_threadsafe(self.stopping.set)
+            except RuntimeError:
+                pass  # El bucle ya terminó
+
+    async def _run(self):
+        self.stopping = asyncio.Event()
+        self.ready = asyncio.Event()  # Hay muestras en alguna cola
+        self.loop = asyncio.get_running_loop()
+        if not self.running:
+            return
+        for link in self.links:
+            link.queue = asyncio.Queue(self.queue_size)
+        tasks = [asyncio.create_task(self._read(link)) for link in self.links]
+        tasks.append(asyncio.create_task(self._dispatch()))
+        await self.stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _read(self, link):
+        """Lee un enlace, decodifica cada bloque y encola sus muestras"""
+        serial = link.client.serial
+        fd = None
+        if hasattr(serial, "fileno"):
+            try:
+                fd = serial.fileno()
+                self.loop.add_reader(fd, lambda: None)
+                self.loop.remove_reader(fd)
+                serial.timeout = 0  # Solo se lee lo que ya llegó
+            except (NotImplementedError, OSError, ValueError):
+                fd = None
+
+        while self.running:
+            try:
+                if fd is not None:
+                    await self._readable(fd)
+                    chunk = serial.read(max(1, min(serial.in_waiting, self.chunk_size)))
+                else:
+                    chunk = await self.loop.run_in_executor(None, self._read_blocking, serial)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.running:
+                    print(f"Error leyendo datos de {link.name}: {e}")
+                link.connected = False
+                return
+            if not chunk:
+                continue
+
+            client = link.client
+            if client.capture:
+                client.capture.write(chunk, time.time())
+            if self.monitor:
+                with self.monitor.measure("lectura_serial"):
+                    client.feed(chunk)
+            else:
+                client.feed(chunk)
+
+            queue = link.queue
+            for data in link.pending:
+                data["link"] = link.name
+                if queue.full():
+                    # Se deja de leer este enlace hasta que el despacho libere lugar
+                    link.waits += 1
+                    self.ready.set()
+                    await queue.put(data)
+                else:
+                    queue.put_nowait(data)
+            link.pending.clear()
+            self.ready.set()
+
+    async def _readable(self, fd):
+        """Espera a que el puerto tenga datos"""
+        future = self.loop.create_future()
+
+        def ready():
+            self.loop.remove_reader(fd)
+            if not future.done():
+                future.set_result(None)
+
+        self.loop.add_reader(fd, ready)
+        try:
+            await future
+        finally:
+            self.loop.remove_reader(fd)
+
+    def _read_blocking(self, serial):
+        # Bloquea hasta el timeout del puerto (0.1 s), como SerialDataClient
+        return serial.read(max(1, min(serial.in_waiting, self.chunk_size)))
+
+    async def _dispatch(self):
+        """Entrega las muestras de todas las colas por turnos al callback"""
+        while True:
+            delivered = 0
+            for link in self.links:
+                queue = link.queue
+                count = min(self.quantum, queue.qsize())
+                for _ in range(count):
+                    self._deliver(queue.get_nowait())
+                link.delivered += count
+                delivered += count
+            if delivered:
+                await asyncio.sleep(0)  # Deja leer a los enlaces entre turnos
+            else:
+                self.ready.clear()
+                await self.ready.wait()
+
+    def _deliver(self, data):
+        if self.data_callback:
+            try:
+                self.data_callback(data)
+            except Exception as e:
+                print(f"Error procesando datos: {e}")
+
+    def stats(self):
+        """Contadores de cada enlace"""
+        return {
+            link.name: {
+                "connected": link.connected,
+                "delivered": link.delivered,
+                "queue_depth": link.queue.qsize() if link.queue else 0,
+                "waits": link.waits,
+                "parse_errors": link.client.parse_errors,
+            }
+            for link in self.links
+        }
@@ -0,0 +1,338 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+# Almacenamiento por día: sensor_data en la base principal guarda solo los
+# datos del día en curso. Una tarea de mantenimiento mueve cada día cerrado a
+# su propio archivo (<base>_dias/AAAA-MM-DD.db, tabla sensor_data con las
+# mismas columnas e ids) y lo anota en la tabla partitions. Los agregados
+# (rollups.py) y las sesiones quedan en la base principal. Para consultar un
+# rango se adjuntan solo los archivos de los días que lo cubren
+# (``attach_range``) y se consulta la vista temporal RANGE_VIEW.
+
+# Archivos que SQLite permite adjuntar a una conexión (SQLITE_MAX_ATTACHED)
+MAX_ATTACHED = 10
+
+# Vista temporal con los datos crudos del rango adjunto. Tiene otro nombre
+# que sensor_data porque SQLite busca primero en temp: con el mismo nombre
+# las consultas a sensor_data de esa conexión (MAX(id), lectura en tiempo
+# real) leerían la vista en lugar de la tabla del día en curso.
+RANGE_VIEW = "sensor_data_range"
+
+PARTITION_COLUMNS = '''
+    id INTEGER PRIMARY KEY,
+    timestamp DATETIME,
+    accel_x REAL,
+    accel_y REAL,
+    accel_z REAL,
+    gyro_roll REAL,
+    gyro_pitch REAL,
+    gyro_yaw REAL,
+    gps_lat REAL,
+    gps_lon REAL,
+    uv_index REAL,
+    temperature REAL,
+    link TEXT
+'''
+
+
+def create_catalog(cursor):
+    """Tablas de sesiones y de particiones en la base principal"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT,
+        started DATETIME,
+        stopped DATETIME,
+        samples INTEGER,
+        first_id INTEGER
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS partitions (
+        day TEXT PRIMARY KEY,
+        first_ts DATETIME,
+        last_ts DATETIME,
+        rows INTEGER,
+        bytes INTEGER
+    )
+    ''')
+
+
+def add_partition_column(conn, db_path, column):
+    """Agrega una columna de sensor_data (``"nombre TIPO"``) a los días ya archivados"""
+    name = column.split()[0]
+    for (day,) in conn.execute("SELECT day FROM partitions").fetchall():
+        path = partition_path(db_path, day)
+        if not os.path.exists(path):
+            continue
+        day_conn = sqlite3.connect(path)
+        try:
+            existing = [row[1] for row in day_conn.execute("PRAGMA table_info(sensor_data)")]
+            if existing and name not in existing:
+                with day_conn:
+                    day_conn.execute(f"ALTER TABLE sensor_data ADD COLUMN {column}")
+        finally:
+            day_conn.close()
+
+
+def partition_dir(db_path):
+    return os.path.splitext(db_path)[0] + "_dias"
+
+
+def partition_path(db_path, day):
+    return os.path.join(partition_dir(db_path), f"{day}.db")
+
+
+def schema_name(day):
+    return "dia_" + day.replace("-", "")
+
+
+def next_day(day):
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def main_path(conn):
+    return next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+
+
+def has_catalog(conn):
+    """False en bases creadas antes del almacenamiento por día"""
+    return conn.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'partitions'").fetchone() is not None
+
+
+def range_partitions(conn, time_range):
+    """Días archivados que tienen datos en el rango (inicio, fin)"""
+    if not has_catalog(conn):
+        return []
+    return [day for (day,) in conn.execute(
+        "SELECT day FROM main.partitions WHERE last_ts >= ? AND first_ts < ? ORDER BY day", time_range)]
+
+
+def attach_range(conn, time_range):
+    """Deja en la vista ``RANGE_VIEW`` de la conexión solo las tablas que cubren el rango.
+
+    Se adjuntan los archivos de los días del rango y se crea la vista
+    temporal ``RANGE_VIEW`` que los une con la tabla del día en curso
+    (que se omite si no tiene datos del rango). Con una sola tabla la vista
+    es un simple SELECT y SQLite sigue usando su índice. Los archivos que
+    ya no hacen falta se separan. No hace nada si la vista ya es la correcta.
+    Para rangos de más de MAX_ATTACHED días hay que consultar por tramos
+    (``split_range``).
+    """
+    db_path = main_path(conn)
+    days = [day for day in range_partitions(conn, time_range)
+            if os.path.exists(partition_path(db_path, day))]
+    if len(days) > MAX_ATTACHED:
+        raise RuntimeError(f"El rango abarca {len(days)} días archivados y se pueden consultar "
+                           f"hasta {MAX_ATTACHED} a la vez; acorte el rango o use datos agregados")
+
+    tables = [f"{schema_name(day)}.sensor_data" for day in days]
+    in_main = conn.execute(
+        "SELECT 1 FROM main.sensor_data WHERE timestamp >= ? AND timestamp < ? LIMIT 1", time_range
+    ).fetchone()
+    if in_main or not tables:
+        tables.insert(0, "main.sensor_data")
+    view = f"CREATE VIEW {RANGE_VIEW} AS " + " UNION ALL ".join(f"SELECT * FROM {t}" for t in tables)
+
+    current = conn.execute(
+        "SELECT sql FROM temp.sqlite_master WHERE type = 'view' AND name = ?", (RANGE_VIEW,)).fetchone()
+    if current and current[0] == view:
+        return
+
+    # La vista temporal no modifica la base, pero query_only también la impide
+    query_only = conn.execute("PRAGMA query_only").fetchone()[0]
+    conn.execute("PRAGMA query_only = OFF")
+    try:
+        conn.execute(f"DROP VIEW IF EXISTS temp.{RANGE_VIEW}")
+        attached = {row[1] for row in conn.execute("PRAGMA database_list") if row[1].startswith("dia_")}
+        wanted = {schema_name(day): day for day in days}
+        for name in attached - set(wanted):
+            conn.execute(f"DETACH DATABASE {name}")
+        for name in set(wanted) - attached:
+            conn.execute(f"ATTACH DATABASE ? AS {name}", (partition_path(db_path, wanted[name]),))
+        conn.execute(view.replace("CREATE VIEW", "CREATE TEMP VIEW", 1))
+    finally:
+        conn.execute(f"PRAGMA query_only = {query_only}")
+
+
+def detach_range(conn):
+    """Quita la vista del rango y separa los días adjuntos por ``attach_range``"""
+    query_only = conn.execute("PRAGMA query_only").fetchone()[0]
+    conn.execute("PRAGMA query_only = OFF")
+    try:
+        conn.execute(f"DROP VIEW IF EXISTS temp.{RANGE_VIEW}")
+        for row in conn.execute("PRAGMA database_list").fetchall():
+            if row[1].startswith("dia_"):
+                conn.execute(f"DETACH DATABASE {row[1]}")
+    finally:
+        conn.execute(f"PRAGMA query_only = {query_only}")
+
+
+def split_range(conn, start=None, end=None):
+    """Divide (inicio, fin) en tramos que se pueden consultar con ``attach_range``.
+
+    Sin inicio o fin se usa el rango de todos los datos. Devuelve una lista
+    de (inicio, fin) en orden, cada uno con a lo sumo MAX_ATTACHED días.
+    """
+    first, last = conn.execute("SELECT min(timestamp), max(timestamp) FROM main.sensor_data").fetchone()
+    bounds = [value for value in (first, last) if value]
+    if has_catalog(conn):
+        bounds += [value for value in conn.execute(
+            "SELECT min(first_ts), max(last_ts) FROM main.partitions").fetchone() if value]
+    if not bounds:
+        return []
+    start = start or min(bounds)
+    end = end or next_day(max(bounds)[:10])
+    ranges = []
+    while start < end:
+        stop = min(end, (date.fromisoformat(start[:10]) + timedelta(days=MAX_ATTACHED)).isoformat())
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def move_day(conn, db_path, day, chunk_size=50000, stop=None):
+    """Mueve las filas de un día de sensor_data a su archivo, por transacciones de ``chunk_size``.
+
+    Se puede repetir sin duplicar filas: si se interrumpe entre la copia y
+    el borrado, la próxima vez las filas ya copiadas se ignoran.
+    """
+    os.makedirs(partition_dir(db_path), exist_ok=True)
+    conn.execute("ATTACH DATABASE ? AS dia", (partition_path(db_path, day),))
+    try:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS dia.sensor_data ({PARTITION_COLUMNS})")
+        conn.execute("CREATE INDEX IF NOT EXISTS dia.idx_sensor_data_timestamp ON sensor_data(timestamp)")
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS moving (id INTEGER PRIMARY KEY)")
+        moved = 0
+        while not (stop and stop.is_set()):
+            with conn:
+                conn.execute("DELETE FROM temp.moving")
+                count = conn.execute(
+                    "INSERT INTO temp.moving SELECT id FROM main.sensor_data "
+                    "WHERE timestamp >= ? AND timestamp < ? LIMIT ?", (day, next_day(day), chunk_size)
+                ).rowcount
+                if count:
+                    conn.execute("INSERT OR IGNORE INTO dia.sensor_data "
+                                 "SELECT * FROM main.sensor_data WHERE id IN temp.moving")
+                    conn.execute("DELETE FROM main.sensor_data WHERE id IN temp.moving")
+            moved += count
+            if count < chunk_size:
+                break
+
+        page_size = conn.execute("PRAGMA dia.page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA dia.page_count").fetchone()[0]
+        with conn:
+            conn.execute('''
+            INSERT OR REPLACE INTO main.partitions (day, first_ts, last_ts, rows, bytes)
+            SELECT ?, min(timestamp), max(timestamp), count(*), ? FROM dia.sensor_data
+            ''', (day, page_size * page_count))
+    finally:
+        conn.execute("DETACH DATABASE dia")
+    return moved
+
+
+def rotate_days(conn, db_path, before, stop=None):
+    """Mueve a su archivo cada día de sensor_data anterior a ``before`` (AAAA-MM-DD)"""
+    moved = 0
+    while not (stop and stop.is_set()):
+        first = conn.execute(
+            "SELECT min(timestamp) FROM main.sensor_data WHERE timestamp < ?", (before,)).fetchone()[0]
+        if first is None:
+            break
+        moved += move_day(conn, db_path, first[:10], stop=stop)
+    return moved
+
+
+def enforce_retention(conn, db_path, retention_days=None, max_bytes=None):
+    """Borra los días archivados más antiguos que ``retention_days`` o que excedan ``max_bytes``.
+
+    El límite de tamaño cuenta la base principal y todos los archivos de
+    días; el día en curso nunca se borra. Devuelve los días borrados.
+    """
+    if retention_days is None and max_bytes is None:
+        return []
+    cutoff = (date.today() - timedelta(days=retention_days)).isoformat() if retention_days is not None else None
+    days = conn.execute("SELECT day, bytes FROM main.partitions ORDER BY day").fetchall()
+    total = os.path.getsize(db_path) + sum(size for _, size in days)
+    removed = []
+    for day, size in days:
+        if not ((cutoff and day < cutoff) or (max_bytes is not None and total > max_bytes)):
+            break
+        path = partition_path(db_path, day)
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            # En Windows no se puede borrar mientras el visualizador lo tenga abierto
+            print(f"No se pudo borrar la partición {day}: {e}")
+            break
+        with conn:
+            conn.execute("DELETE FROM main.partitions WHERE day = ?", (day,))
+        total -= size
+        removed.append(day)
+    return removed
+
+
+def incremental_vacuum(conn, pages=2000, stop=None):
+    """Devuelve al sistema las páginas libres de la base principal, de a ``pages`` por vez"""
+    if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] != 2:
+        return 0  # Solo en bases con auto_vacuum = INCREMENTAL
+    freed = 0
+    free = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+    while free and not (stop and stop.is_set()):
+        conn.execute(f"PRAGMA main.incremental_vacuum({pages})").fetchall()
+        remaining = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+        if remaining >= free:
+            break
+        freed += free - remaining
+        free = remaining
+    return freed
+
+
+class PartitionMaintenance:
+    """Tarea de mantenimiento del almacenamiento por día, en un hilo propio.
+
+    Al iniciar y luego cada ``interval`` segundos mueve los días cerrados a
+    sus archivos, aplica la retención y libera el espacio de la base
+    principal con ``incremental_vacuum``. Las transacciones son cortas, así
+    que el escritor de muestras solo espera unos milisegundos.
+    """
+
+    def __init__(self, db_path, retention_days=None, max_bytes=None, interval=3600):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="PartitionMaintenance")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run_once(self, conn):
+        today = datetime.now().date().isoformat()
+        moved = rotate_days(conn, self.db_path, today, self.stop_event)
+        removed = enforce_retention(conn, self.db_path, self.retention_days, self.max_bytes)
+        freed = incremental_vacuum(conn, stop=self.stop_event)
+        if moved or removed:
+            print(f"Mantenimiento de la base de datos: {moved} filas archivadas por día, "
+                  f"{len(removed)} días borrados, {freed} páginas liberadas")
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    self.run_once(conn)
+                except sqlite3.Error as e:
+                    print(f"Error en el mantenimiento de la base de datos: {e}")
+                self.stop_event.wait(self.interval)
+        finally:
+            conn.close()
+
+    def close(self, timeout=30):
+        self.stop_event.set()
+        self.thread.join(timeout)
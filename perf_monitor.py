@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Percentiles que se informan en el panel, el registro y /metrics
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageStats:
+    """Duraciones recientes de una etapa en un buffer circular, más totales acumulados"""
+
+    def __init__(self, window):
+        self.window = window
+        self.durations = np.zeros(window)
+        self.head = 0  # Posición donde se escribe la próxima duración
+        self.size = 0  # Duraciones válidas en el buffer
+        self.count = 0  # Total de mediciones desde el inicio
+        self.total = 0.0  # Suma de todas las duraciones (segundos)
+
+    def add(self, seconds):
+        self.durations[self.head] = seconds
+        self.head = (self.head + 1) % self.window
+        self.size = min(self.size + 1, self.window)
+        self.count += 1
+        self.total += seconds
+
+    def summary(self):
+        recent = self.durations[:self.size]
+        result = {"count": self.count, "sum_s": self.total}
+        if self.size:
+            values = np.quantile(recent, QUANTILES)
+            for q, value in zip(QUANTILES, values):
+                result[f"p{int(q * 100)}_ms"] = float(value * 1000)
+            result["max_ms"] = float(recent.max() * 1000)
+        return result
+
+
+class _Timer:
+    """Contexto que mide un bloque y lo registra al salir"""
+
+    __slots__ = ("monitor", "stage", "start")
+
+    def __init__(self, monitor, stage):
+        self.monitor = monitor
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.monitor.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class PerfMonitor:
+    """Tiempos de cada etapa de la estación (ingesta, escritura, dibujo).
+
+    Cada etapa guarda las últimas ``window`` duraciones, así los
+    percentiles reflejan el comportamiento reciente. Registrar una
+    medición cuesta un par de microsegundos y se puede hacer desde
+    cualquier hilo; los percentiles se calculan solo al consultarlos.
+    ``gauges`` es una función opcional que devuelve valores instantáneos
+    (por ejemplo la cola del escritor) para incluir en los informes.
+    """
+
+    def __init__(self, window=2048, gauges=None):
+        self.window = window
+        self.gauges = gauges
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.server = None
+        self.log_path = None
+        self.log_stop = threading.Event()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats(self.window)
+            stats.add(seconds)
+
+    def measure(self, stage):
+        """Uso: ``with monitor.measure("etapa"): ...``"""
+        return _Timer(self, stage)
+
+    def snapshot(self):
+        """Resumen de todas las etapas y de los valores instantáneos"""
+        with self.lock:
+            stages = {name: stats.summary() for name, stats in self.stages.items()}
+        return {
+            "time": time.time(),
+            "uptime_s": time.time() - self.started,
+            "stages": stages,
+            "gauges": self.gauges() if self.gauges else {},
+        }
+
+    def format_table(self, snapshot=None):
+        """Tabla de texto para el panel de rendimiento"""
+        snapshot = snapshot or self.snapshot()
+        lines = [f"{'etapa':<22}{'n':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}  (ms)"]
+        for name, stats in sorted(snapshot["stages"].items()):
+            if "max_ms" not in stats:
+                continue
+            lines.append(f"{name:<22}{stats['count']:>9}{stats['p50_ms']:>9.3f}{stats['p95_ms']:>9.3f}"
+                         f"{stats['p99_ms']:>9.3f}{stats['max_ms']:>9.3f}")
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines.append(f"{name:<22}{value:>9}")
+        return "\n".join(lines)
+
+    def prometheus_text(self):
+        """Métricas en el formato de texto de Prometheus"""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP estacion_etapa_segundos Duración de cada etapa (últimas mediciones)",
+            "# TYPE estacion_etapa_segundos summary",
+        ]
+        for name, stats in sorted(snapshot["stages"].items()):
+            if "max_ms" in stats:
+                for q in QUANTILES:
+                    value = stats[f"p{int(q * 100)}_ms"] / 1000
+                    lines.append(f'estacion_etapa_segundos{{etapa="{name}",quantile="{q}"}} {value:.9f}')
+            lines.append(f'estacion_etapa_segundos_sum{{etapa="{name}"}} {stats["sum_s"]:.9f}')
+            lines.append(f'estacion_etapa_segundos_count{{etapa="{name}"}} {stats["count"]}')
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines.append(f"# TYPE estacion_{name} gauge")
+            lines.append(f"estacion_{name} {value}")
+        lines.append(f"estacion_uptime_segundos {snapshot['uptime_s']:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port, host="127.0.0.1"):
+        """Publica /metrics en http://host:port (solo local por defecto)"""
+        monitor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = monitor.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Sin una línea en la consola por cada consulta
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=self.server.serve_forever, name="PerfMonitorHTTP")
+        thread.daemon = True
+        thread.start()
+        print(f"Métricas de rendimiento en http://{host}:{self.server.server_address[1]}/metrics")
+
+    def start_log(self, path, interval=10.0):
+        """Agrega cada ``interval`` segundos una línea JSON con el resumen a ``path``"""
+        self.log_path = path
+
+        def run():
+            while not self.log_stop.wait(interval):
+                self.write_log(path)
+
+        thread = threading.Thread(target=run, name="PerfMonitorLog")
+        thread.daemon = True
+        thread.start()
+
+    def write_log(self, path):
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.snapshot(), ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Error al escribir el registro de rendimiento: {e}")
+
+    def close(self):
+        """Detiene el servidor y el registro; el registro recibe un último resumen"""
+        self.log_stop.set()
+        if self.log_path:
+            self.write_log(self.log_path)
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
@@ -0,0 +1,128 @@
+import itertools
+import queue
+import sqlite3
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class QueryCancelled(Exception):
+    """La consulta fue reemplazada por una más reciente del mismo tipo"""
+
+
+class QueryTask:
+    """Lo que recibe cada función de consulta para comunicarse con la interfaz"""
+
+    def __init__(self, worker, request_id, kind):
+        self.worker = worker
+        self.request_id = request_id
+        self.kind = kind
+
+    def cancelled(self):
+        return self.worker.latest.get(self.kind) != self.request_id
+
+    def check(self):
+        """Interrumpe la consulta si ya fue reemplazada"""
+        if self.cancelled():
+            raise QueryCancelled()
+
+    def partial(self, result):
+        """Envía un resultado parcial a la interfaz"""
+        self.worker._partial.emit(self.request_id, result)
+
+    def progress(self, message):
+        """Muestra un mensaje de avance en la interfaz"""
+        self.worker.progress.emit(message)
+
+
+class QueryWorker(QThread):
+    """Hilo que ejecuta las consultas del visualizador fuera de la interfaz.
+
+    Usa una sola conexión persistente de solo lectura. Cada consulta tiene un
+    tipo (``kind``); al enviar una nueva, las anteriores del mismo tipo quedan
+    obsoletas: si aún no empezaron se descartan, y si están corriendo SQLite
+    las interrumpe con el progress handler. Los callbacks se ejecutan siempre
+    en el hilo de la interfaz.
+    """
+
+    progress = pyqtSignal(str)
+    _partial = pyqtSignal(int, object)
+    _done = pyqtSignal(int, object)
+    _failed = pyqtSignal(int, str)
+
+    def __init__(self, db_path='sensor_data.db', parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.requests = queue.Queue()
+        self.ids = itertools.count(1)
+        self.latest = {}  # Última consulta enviada de cada tipo
+        self.callbacks = {}
+        self._partial.connect(self._on_partial)
+        self._done.connect(self._on_done)
+        self._failed.connect(self._on_failed)
+
+    def submit(self, kind, func, args=(), on_result=None, on_partial=None, on_error=None):
+        """Encola ``func(conn, task, *args)`` y reemplaza a las consultas del mismo tipo"""
+        request_id = next(self.ids)
+        self.cancel(kind)
+        self.latest[kind] = request_id
+        self.callbacks[request_id] = (kind, on_result, on_partial, on_error)
+        self.requests.put((request_id, kind, func, args))
+        return request_id
+
+    def cancel(self, kind):
+        """Descarta las consultas pendientes o en curso de un tipo"""
+        self.callbacks.pop(self.latest.pop(kind, None), None)
+
+    def stop(self):
+        """Cancela todo y espera a que el hilo termine"""
+        self.latest.clear()
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA query_only = ON")
+        while True:
+            item = self.requests.get()
+            if item is None:
+                break
+            request_id, kind, func, args = item
+            task = QueryTask(self, request_id, kind)
+            if task.cancelled():
+                continue
+
+            # SQLite llama al handler cada N instrucciones; si devuelve un valor
+            # distinto de cero la consulta en curso se interrumpe
+            conn.set_progress_handler(lambda: task.cancelled(), 10000)
+            try:
+                result = func(conn, task, *args)
+            except QueryCancelled:
+                continue
+            except Exception as e:
+                if not task.cancelled():
+                    self._failed.emit(request_id, str(e))
+                continue
+            finally:
+                conn.set_progress_handler(None, 0)
+            self._done.emit(request_id, result)
+        conn.close()
+
+    def _current_callbacks(self, request_id, remove):
+        callbacks = self.callbacks.pop(request_id, None) if remove else self.callbacks.get(request_id)
+        if callbacks is None or self.latest.get(callbacks[0]) != request_id:
+            return None
+        return callbacks
+
+    def _on_partial(self, request_id, result):
+        callbacks = self._current_callbacks(request_id, remove=False)
+        if callbacks and callbacks[2]:
+            callbacks[2](result)
+
+    def _on_done(self, request_id, result):
+        callbacks = self._current_callbacks(request_id, remove=True)
+        if callbacks and callbacks[1]:
+            callbacks[1](result)
+
+    def _on_failed(self, request_id, message):
+        callbacks = self._current_callbacks(request_id, remove=True)
+        if callbacks and callbacks[3]:
+            callbacks[3](message)
@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from conect.frames import CHANNELS, encode_sample, sample_from_values, sample_values
+from conect.serial_client import SerialDataClient
+from partitions import RANGE_VIEW, attach_range, split_range
+from serial_capture import read_chunks
+
+CHUNK_SIZE = 5000  # Filas leídas de SQLite por iteración
+
+
+def db_samples(db_path, start=None, end=None):
+    """Recorre sensor_data en orden de tiempo; genera (segundos, muestra).
+
+    Solo incluye los registros que existían al empezar. Los días
+    archivados se leen por tramos (``partitions.split_range``).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        last_id = conn.execute(
+            "SELECT coalesce((SELECT seq FROM sqlite_sequence WHERE name = 'sensor_data'), 0)"
+        ).fetchone()[0]
+        for time_range in split_range(conn, start, end):
+            attach_range(conn, time_range)
+            cursor = conn.execute(f"""
+            SELECT timestamp, {", ".join(CHANNELS)}
+            FROM {RANGE_VIEW}
+            WHERE id <= ? AND timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp, id
+            """, (last_id, *time_range))
+            while True:
+                rows = cursor.fetchmany(CHUNK_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield datetime.fromisoformat(row[0]).timestamp(), sample_from_values(row[1:])
+    finally:
+        conn.close()
+
+
+def capture_samples(path, interval=1.0, chunk_size=4096):
+    """Decodifica una captura serial (``serial_capture.py``) o un volcado crudo del puerto.
+
+    Las capturas guardan la hora de recepción de cada bloque y se
+    reproducen con esos tiempos. En los volcados crudos las tramas binarias
+    usan ``ticks_ms`` del ESP32 y las líneas JSON sin ticks se separan por
+    ``interval`` segundos, el período de envío del firmware.
+    """
+    parser = SerialDataClient(chunk_size=chunk_size)
+    decoded = []
+    parser.set_callback(decoded.append)
+    t = None
+    for received, chunk in read_chunks(path, chunk_size):
+        parser.feed(chunk)
+        for data in decoded:
+            ticks = data.get("ticks_ms")
+            if received is not None:
+                t = received
+            elif ticks is not None and (t is None or ticks / 1000 >= t):
+                t = ticks / 1000
+            else:
+                # Sin ticks, o el contador se reinició: se sigue al ritmo nominal
+                t = 0.0 if t is None else t + interval
+            yield t, data
+        decoded.clear()
+
+
+def open_samples(path, start=None, end=None):
+    """Muestras de una base de datos SQLite, de una captura serial o de un volcado crudo"""
+    is_sqlite = False
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            is_sqlite = f.read(16) == b"SQLite format 3\x00"
+    if is_sqlite:
+        return db_samples(path, start, end)
+    return capture_samples(path)
+
+
+class TelemetryReplay:
+    """Reproduce telemetría grabada como si llegara del puerto serial.
+
+    Tiene la misma interfaz que ``SerialDataClient`` (``set_callback``,
+    ``start_reading`` en un hilo propio y ``stop``), así que las muestras
+    llegan al mismo callback que las del enlace real. ``speed`` es 1 para
+    el ritmo original, N para N veces más rápido o 0 para entregar lo más
+    rápido posible. Con ``wire`` ("binario" o "json") cada muestra se
+    vuelve a codificar y pasa por el parser serial, para medir también
+    la decodificación.
+    """
+
+    def __init__(self, samples, speed=1.0, wire=None, chunk_size=4096):
+        self.samples = samples  # Iterable de (segundos, muestra)
+        self.speed = speed
+        self.wire = wire
+        self.chunk_size = chunk_size  # Bytes entregados al parser por llamada
+        self.data_callback = None
+        self.running = False
+        self.parser = SerialDataClient(chunk_size=chunk_size) if wire else None
+        if self.parser:
+            self.parser.set_callback(self.deliver)
+
+        # Contadores
+        self.delivered = 0
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def set_callback(self, callback):
+        """Establece la función callback que procesará las muestras"""
+        self.data_callback = callback
+
+    def start_reading(self):
+        """Entrega las muestras respetando sus tiempos relativos (bloquea hasta terminar)"""
+        self.running = True
+        self.started = time.monotonic()
+        first = None
+        pending = bytearray()
+        seq = 0
+        try:
+            for t, data in self.samples:
+                if not self.running:
+                    break
+                if first is None:
+                    first = t
+                if self.speed:
+                    # Los tiempos se calculan desde el inicio, así los retrasos no se acumulan
+                    delay = self.started + (t - first) / self.speed - time.monotonic()
+                    if delay > 0:
+                        self._feed(pending)
+                        time.sleep(delay)
+
+                if self.parser:
+                    pending += self.encode(seq, t - first, data)
+                    seq += 1
+                    if len(pending) >= self.chunk_size:
+                        self._feed(pending)
+                else:
+                    self.deliver(data)
+            self._feed(pending)
+        finally:
+            if hasattr(self.samples, "close"):
+                self.samples.close()
+            self.running = False
+            self.finished = time.monotonic()
+            self.done.set()
+
+    def encode(self, seq, t, data):
+        """Bytes que el ESP32 enviaría para esta muestra (``t`` en segundos desde el inicio)"""
+        return encode_sample(self.wire, seq, int(t * 1000), sample_values(data))
+
+    def _feed(self, pending):
+        if pending:
+            self.parser.feed(bytes(pending))
+            pending.clear()
+
+    def deliver(self, data):
+        """Entrega una muestra al callback"""
+        self.delivered += 1
+        if self.data_callback:
+            try:
+                self.data_callback(data)
+            except Exception as e:
+                print(f"Error procesando datos: {e}")
+
+    def stats(self):
+        """Muestras entregadas, duración y ritmo promedio de la reproducción"""
+        if self.started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            "delivered": self.delivered,
+            "elapsed_s": elapsed,
+            "samples_per_s": self.delivered / elapsed if elapsed else 0.0,
+            "finished": self.done.is_set(),
+        }
+
+    def stop(self):
+        """Detiene la reproducción"""
+        self.running = False
@@ -0,0 +1,192 @@
+from partitions import RANGE_VIEW, attach_range, detach_range, split_range
+
+CHANNELS = ["accel_x", "accel_y", "accel_z",
+            "gyro_roll", "gyro_pitch", "gyro_yaw",
+            "gps_lat", "gps_lon", "uv_index", "temperature"]
+
+# Resoluciones agregadas: (nombre, segundos por intervalo, expresión SQL que
+# trunca el timestamp ISO "AAAA-MM-DD HH:MM:SS.ffffff" al inicio del intervalo)
+ROLLUPS = [
+    ("10s", 10, "substr(timestamp, 1, 18) || '0'"),
+    ("1m", 60, "substr(timestamp, 1, 17) || '00'"),
+    ("1h", 3600, "substr(timestamp, 1, 14) || '00:00'"),
+]
+
+RESOLUTION_NAMES = {"10s": "10 s", "1m": "1 min", "1h": "1 h"}
+
+
+def rollup_table(name):
+    return f"sensor_rollup_{name}"
+
+
+def rollup_view(name):
+    return f"sensor_data_{name}"
+
+
+def create_rollup_tables(cursor):
+    """Crea las tablas de agregados (mín/máx/suma/cantidad por canal) y sus vistas.
+
+    Cada vista expone las mismas columnas que ``sensor_data`` con el promedio
+    de cada canal, para que el visualizador las consulte igual que los datos
+    crudos. El promedio divide por la cantidad de valores del canal, no por
+    la de muestras, así los canales sin dato (NULL) no lo sesgan.
+    """
+    for name, _, _ in ROLLUPS:
+        columns = ",\n".join(f"{c}_min REAL, {c}_max REAL, {c}_sum REAL, {c}_count INTEGER" for c in CHANNELS)
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {rollup_table(name)} (
+            bucket TEXT PRIMARY KEY,
+            count INTEGER NOT NULL,
+            {columns}
+        )
+        ''')
+        means = ", ".join(f"{c}_sum / {c}_count AS {c}" for c in CHANNELS)
+        cursor.execute(f'''
+        CREATE VIEW IF NOT EXISTS {rollup_view(name)} AS
+        SELECT rowid AS id, bucket AS timestamp, {means}
+        FROM {rollup_table(name)}
+        ''')
+
+
+def update_rollups(conn, after_id):
+    """Agrega a las tablas de resumen las filas de sensor_data con id > after_id.
+
+    Se llama dentro de la misma transacción que inserta el lote, así que
+    los agregados nunca quedan desfasados de los datos crudos. Solo el
+    primer nivel lee las filas nuevas; en cada nivel siguiente se vuelven
+    a calcular, a partir del nivel anterior, los intervalos que cubren el
+    rango de tiempo del lote.
+    """
+    first, last = conn.execute(
+        "SELECT min(timestamp), max(timestamp) FROM sensor_data WHERE id > ?", (after_id,)
+    ).fetchone()
+    if first is None:
+        return
+
+    aggregates = ", ".join(f"min({c}), max({c}), sum({c}), count({c})" for c in CHANNELS)
+    targets = ", ".join(f"{c}_min, {c}_max, {c}_sum, {c}_count" for c in CHANNELS)
+    # min(), max() y + devuelven NULL si algún argumento es NULL
+    updates = ", ".join(
+        f"{c}_min = coalesce(min({c}_min, excluded.{c}_min), {c}_min, excluded.{c}_min), "
+        f"{c}_max = coalesce(max({c}_max, excluded.{c}_max), {c}_max, excluded.{c}_max), "
+        f"{c}_sum = coalesce({c}_sum + excluded.{c}_sum, {c}_sum, excluded.{c}_sum), "
+        f"{c}_count = {c}_count + excluded.{c}_count"
+        for c in CHANNELS
+    )
+    name, _, bucket = ROLLUPS[0]
+    conn.execute(f'''
+    INSERT INTO {rollup_table(name)} (bucket, count, {targets})
+    SELECT {bucket}, count(*), {aggregates}
+    FROM sensor_data
+    WHERE id > ?
+    GROUP BY 1
+    ON CONFLICT(bucket) DO UPDATE SET count = count + excluded.count, {updates}
+    ''', (after_id,))
+    update_parent_rollups(conn, first, last)
+
+
+def update_parent_rollups(conn, first, last):
+    """Recalcula desde el nivel anterior los intervalos de 1 min y 1 h entre ``first`` y ``last``"""
+    targets = ", ".join(f"{c}_min, {c}_max, {c}_sum, {c}_count" for c in CHANNELS)
+    aggregates = ", ".join(f"min({c}_min), max({c}_max), sum({c}_sum), sum({c}_count)" for c in CHANNELS)
+    # Los valores recalculados reemplazan a los anteriores (se conserva el rowid)
+    updates = ", ".join(
+        f"{c}_min = excluded.{c}_min, {c}_max = excluded.{c}_max, "
+        f"{c}_sum = excluded.{c}_sum, {c}_count = excluded.{c}_count"
+        for c in CHANNELS
+    )
+    for (child, _, _), (name, seconds, bucket) in zip(ROLLUPS, ROLLUPS[1:]):
+        # Desde el inicio del intervalo del primer dato hasta el final del intervalo del último
+        start = conn.execute(f"SELECT {bucket} FROM (SELECT ? AS timestamp)", (first,)).fetchone()[0]
+        end = conn.execute(f"SELECT datetime({bucket}, '+{seconds} seconds') FROM (SELECT ? AS timestamp)",
+                           (last,)).fetchone()[0]
+        conn.execute(f'''
+        INSERT INTO {rollup_table(name)} (bucket, count, {targets})
+        SELECT {bucket}, sum(count), {aggregates}
+        FROM (SELECT bucket AS timestamp, * FROM {rollup_table(child)} WHERE bucket >= ? AND bucket < ?)
+        GROUP BY 1
+        ON CONFLICT(bucket) DO UPDATE SET count = excluded.count, {updates}
+        ''', (start, end))
+
+
+def backfill_rollups(conn):
+    """Calcula los agregados de todos los datos existentes.
+
+    Solo el primer nivel se calcula desde sensor_data; cada nivel siguiente
+    se arma con el anterior, que es mucho más chico.
+    """
+    targets = ", ".join(f"{c}_min, {c}_max, {c}_sum, {c}_count" for c in CHANNELS)
+    source = "sensor_data"
+    aggregates = ", ".join(f"min({c}), max({c}), sum({c}), count({c})" for c in CHANNELS)
+    count = "count(*)"
+    for name, _, bucket in ROLLUPS:
+        conn.execute(f"DELETE FROM {rollup_table(name)}")
+        conn.execute(f'''
+        INSERT INTO {rollup_table(name)} (bucket, count, {targets})
+        SELECT {bucket}, {count}, {aggregates}
+        FROM {source}
+        GROUP BY 1
+        ''')
+        # El siguiente nivel agrega las filas de esta tabla
+        source = f"(SELECT bucket AS timestamp, * FROM {rollup_table(name)})"
+        aggregates = ", ".join(f"min({c}_min), max({c}_max), sum({c}_sum), sum({c}_count)" for c in CHANNELS)
+        count = "sum(count)"
+
+
+def add_channel_counts(conn):
+    """Agrega la cantidad de valores de cada canal a agregados creados sin ella.
+
+    Los intervalos cuyos datos crudos se conservan (el día en curso y los
+    días archivados) se recalculan; en los anteriores se supone que cada
+    canal tuvo dato en todas las muestras del intervalo o en ninguna.
+    """
+    for name, _, _ in ROLLUPS:
+        table = rollup_table(name)
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for c in CHANNELS:
+            if f"{c}_count" not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {c}_count INTEGER")
+                conn.execute(f"UPDATE {table} SET {c}_count = CASE WHEN {c}_sum IS NULL THEN 0 ELSE count END")
+        conn.execute(f"DROP VIEW IF EXISTS {rollup_view(name)}")
+    create_rollup_tables(conn)
+    conn.commit()
+
+    targets = ", ".join(f"{c}_min, {c}_max, {c}_sum, {c}_count" for c in CHANNELS)
+    aggregates = ", ".join(f"min({c}), max({c}), sum({c}), count({c})" for c in CHANNELS)
+    updates = ", ".join(
+        f"{c}_min = excluded.{c}_min, {c}_max = excluded.{c}_max, "
+        f"{c}_sum = excluded.{c}_sum, {c}_count = excluded.{c}_count"
+        for c in CHANNELS
+    )
+    name, _, bucket = ROLLUPS[0]
+    # Los días archivados se leen por tramos; ATTACH no se puede usar dentro de una transacción
+    try:
+        for time_range in split_range(conn):
+            attach_range(conn, time_range)
+            with conn:
+                conn.execute(f'''
+                INSERT INTO {rollup_table(name)} (bucket, count, {targets})
+                SELECT {bucket}, count(*), {aggregates}
+                FROM {RANGE_VIEW}
+                WHERE timestamp >= ? AND timestamp < ?
+                GROUP BY 1
+                ON CONFLICT(bucket) DO UPDATE SET count = excluded.count, {updates}
+                ''', time_range)
+    finally:
+        detach_range(conn)
+    first, last = conn.execute(f"SELECT min(bucket), max(bucket) FROM {rollup_table(name)}").fetchone()
+    if first is not None:
+        with conn:
+            update_parent_rollups(conn, first, last)
+
+
+def choose_resolution(seconds, min_points=1000):
+    """Resolución más gruesa que aún da al menos ``min_points`` puntos en el rango.
+
+    Devuelve el nombre del agregado o None para usar los datos crudos.
+    """
+    chosen = None
+    for name, bucket_seconds, _ in ROLLUPS:
+        if seconds / bucket_seconds >= min_points:
+            chosen = name
+    return chosen
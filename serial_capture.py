@@ -0,0 +1,275 @@
+import argparse
+import mmap
+import os
+import queue
+import sqlite3
+import struct
+import threading
+import time
+from datetime import datetime
+from conect.frames import sample_values
+from conect.serial_client import SerialDataClient
+from database import Database
+from rollups import update_rollups
+
+# Captura serial cruda: archivos de solo agregado con todos los bytes que
+# llegaron del puerto, tal cual, para volver a decodificarlos más tarde.
+# Cada archivo empieza con CAPTURE_MAGIC y sigue con registros
+#   hora de recepción (float64, segundos Unix) | largo (uint32) | bytes
+# en little-endian. Un registro incompleto al final (corte de energía) se
+# ignora al leer.
+CAPTURE_MAGIC = b"ETCAPv1\n"
+RECORD_STRUCT = struct.Struct("<dI")
+CAPTURE_PATTERN = "captura_%Y%m%d_%H%M%S.bin"
+
+# Columnas de las filas que arma CaptureIngest (las de INSERT_SQL)
+ROW_COLUMNS = ("timestamp, accel_x, accel_y, accel_z, gyro_roll, gyro_pitch, gyro_yaw, "
+               "gps_lat, gps_lon, uv_index, temperature, link")
+
+
+class CaptureWriter:
+    """Guarda los bytes recibidos en archivos de captura que rotan por tamaño.
+
+    Cada ``write`` es una sola escritura sin buffer, así lo recibido queda
+    en el archivo aunque la aplicación se cierre de golpe. Al superar
+    ``max_bytes`` se empieza un archivo nuevo; con ``max_files`` se borran
+    los más antiguos.
+    """
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, max_files=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.file = None
+        self.size = 0
+        self.lock = threading.Lock()
+        self.closed = False
+
+        # Contadores
+        self.total_bytes = 0
+        self.files = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, chunk, received=None):
+        """Agrega un bloque de bytes con su hora de recepción"""
+        record = RECORD_STRUCT.pack(time.time() if received is None else received, len(chunk)) + chunk
+        with self.lock:
+            if self.closed:
+                return
+            if self.file is None or self.size + len(record) > self.max_bytes:
+                self._rotate()
+            try:
+                self.file.write(record)
+            except OSError as e:
+                print(f"Error al escribir la captura serial: {e}")
+                return
+            self.size += len(record)
+            self.total_bytes += len(chunk)
+
+    def _rotate(self):
+        if self.file:
+            self.file.close()
+        name = datetime.now().strftime(CAPTURE_PATTERN)
+        path = os.path.join(self.directory, name)
+        # Dos archivos en el mismo segundo: se agrega un sufijo
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{name[:-4]}_{suffix}.bin")
+            suffix += 1
+        self.file = open(path, "ab", buffering=0)
+        self.file.write(CAPTURE_MAGIC)
+        self.size = len(CAPTURE_MAGIC)
+        self.files += 1
+        if self.max_files:
+            for old in capture_files(self.directory)[:-self.max_files]:
+                try:
+                    os.remove(old)
+                except OSError as e:
+                    print(f"No se pudo borrar la captura {old}: {e}")
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.file:
+                self.file.close()
+                self.file = None
+
+
+def capture_files(path):
+    """Archivos de captura de una carpeta en orden cronológico (o el archivo indicado)"""
+    if not os.path.isdir(path):
+        return [path]
+    names = sorted(name for name in os.listdir(path)
+                   if name.startswith("captura_") and name.endswith(".bin"))
+    return [os.path.join(path, name) for name in names]
+
+
+def is_capture(path):
+    """True si ``path`` es una carpeta de capturas o un archivo de captura"""
+    if os.path.isdir(path):
+        return True
+    with open(path, "rb") as f:
+        return f.read(len(CAPTURE_MAGIC)) == CAPTURE_MAGIC
+
+
+def read_records(path):
+    """Genera (hora de recepción, bytes) de un archivo de captura, leído con mmap"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(CAPTURE_MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+                raise ValueError(f"{path} no es un archivo de captura serial")
+            pos = len(CAPTURE_MAGIC)
+            end = len(data)
+            while pos + RECORD_STRUCT.size <= end:
+                received, length = RECORD_STRUCT.unpack_from(data, pos)
+                pos += RECORD_STRUCT.size
+                if pos + length > end:
+                    break  # Registro incompleto al final del archivo
+                yield received, data[pos:pos + length]
+                pos += length
+
+
+def read_chunks(path, chunk_size=4096):
+    """Genera (hora de recepción, bytes) de una captura o de un volcado crudo sin registros.
+
+    En los volcados crudos la hora de recepción es None.
+    """
+    if is_capture(path):
+        for file_path in capture_files(path):
+            yield from read_records(file_path)
+        return
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield None, chunk
+
+
+class CaptureIngest(SerialDataClient):
+    """Decodifica una captura y arma directamente las filas de sensor_data.
+
+    Las tramas binarias pasan de la tupla decodificada a la fila sin
+    convertirse en diccionarios. Cada fila lleva la hora de recepción de
+    su bloque, la misma que habría guardado la aplicación en vivo. Los
+    errores de decodificación se cuentan sin imprimir uno por uno.
+    """
+
+    def __init__(self, chunk_size=4096):
+        super().__init__(chunk_size=chunk_size)
+        self.rows = []
+        self.timestamp = None
+        self.link = None  # Se guarda en la columna link de cada fila
+        self.set_callback(self.add_sample)
+
+    def deliver_frames(self, frames):
+        timestamp = self.timestamp
+        link = self.link
+        self.rows.extend([(timestamp, *values, link) for _, _, values in frames])
+
+    def add_sample(self, data):
+        self.rows.append((self.timestamp, *sample_values(data), self.link))
+
+    def parse_error(self, error):
+        self.parse_errors += 1
+
+
+def write_batch(conn, rows):
+    """Inserta un lote en sensor_data y actualiza los agregados, en una transacción.
+
+    Las filas se cargan primero en una tabla temporal sin índices y luego
+    se copian con un solo INSERT ... SELECT: SQLite mantiene el índice y
+    la secuencia de ids una vez por lote y no por fila, y durante la copia
+    y los agregados no retiene el GIL, así el hilo que decodifica sigue
+    trabajando. Los agregados se calculan con un GROUP BY sobre los ids
+    recién insertados (``rollups.update_rollups``).
+    """
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS lote AS SELECT {ROW_COLUMNS} FROM sensor_data WHERE 0")
+    with conn:
+        last_id = conn.execute("SELECT coalesce(max(id), 0) FROM sensor_data").fetchone()[0]
+        conn.executemany(f"INSERT INTO temp.lote VALUES ({', '.join('?' * len(rows[0]))})", rows)
+        conn.execute(f"INSERT INTO sensor_data ({ROW_COLUMNS}) SELECT * FROM temp.lote")
+        conn.execute("DELETE FROM temp.lote")
+        update_rollups(conn, last_id)
+
+
+def ingest_capture(db_path, path, batch_size=50000, progress=None, link=None):
+    """Carga una captura serial en sensor_data; devuelve (filas, errores de decodificación).
+
+    La decodificación y la escritura van en hilos distintos: mientras
+    SQLite inserta un lote (sin retener el GIL) ya se decodifica el
+    siguiente. Cada lote de ``batch_size`` filas se inserta en una
+    transacción junto con la actualización de los agregados.
+    """
+    batches = queue.Queue(maxsize=2)
+    written = [0]
+    errors = []
+
+    def write():
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Los agrupamientos de los agregados se ordenan en memoria
+        conn.execute("PRAGMA temp_store=MEMORY")
+        try:
+            while True:
+                rows = batches.get()
+                if rows is None:
+                    break
+                if errors:
+                    continue  # Después de un error solo se vacía la cola
+                try:
+                    write_batch(conn, rows)
+                except sqlite3.Error as e:
+                    errors.append(e)
+                    continue
+                written[0] += len(rows)
+                if progress:
+                    progress(written[0])
+        finally:
+            conn.close()
+
+    writer = threading.Thread(target=write, name="CaptureIngest")
+    writer.start()
+    parser = CaptureIngest()
+    parser.link = link
+    try:
+        for received, chunk in read_chunks(path):
+            if errors:
+                break
+            # Los volcados sin hora de recepción se guardan con la hora actual
+            parser.timestamp = str(datetime.fromtimestamp(received if received is not None else time.time()))
+            parser.feed(chunk)
+            if len(parser.rows) >= batch_size:
+                batches.put(parser.rows)
+                parser.rows = []
+        if parser.rows:
+            batches.put(parser.rows)
+    finally:
+        batches.put(None)
+        writer.join()
+    if errors:
+        print(f"Error al insertar datos: {errors[0]}")
+    return written[0], parser.parse_errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga una captura serial cruda en la base de datos")
+    parser.add_argument("captura", help="archivo o carpeta de capturas (también acepta volcados crudos)")
+    parser.add_argument("--base", default="sensor_data.db", help="base de datos de destino")
+    parser.add_argument("--lote", type=int, default=50000, help="filas por transacción")
+    parser.add_argument("--enlace", help="enlace por el que llegó la captura (columna link)")
+    args = parser.parse_args()
+
+    # Crea la tabla y los agregados si la base de datos es nueva
+    Database(args.base, maintenance=False).close()
+
+    start = time.perf_counter()
+    rows, errors = ingest_capture(args.base, args.captura, args.lote,
+                                  progress=lambda n: print(f"\r{n} filas cargadas", end="", flush=True),
+                                  link=args.enlace)
+    elapsed = time.perf_counter() - start
+    print(f"\n{rows} filas en {elapsed:.2f} s ({rows / elapsed if elapsed else 0:.0f} filas/s); "
+          f"errores de decodificación: {errors}")
@@ -0,0 +1,343 @@
+import time
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from archive import open_dataset, range_filter, table_rows
+from data_export import COLUMNS, HEADERS, sort_key
+from partitions import RANGE_VIEW, attach_range, split_range
+
+
+def format_value(value):
+    """Texto que se muestra en una celda"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def count_rows(conn, time_range, table="sensor_data"):
+    """Cantidad de registros con inicio <= timestamp < fin"""
+    return conn.execute(
+        f"SELECT COUNT(*) FROM {table} WHERE timestamp >= ? AND timestamp < ?",
+        time_range
+    ).fetchone()[0]
+
+
+def order_clause(sort_column, sort_order):
+    """ORDER BY por la columna elegida, con el id para desempatar"""
+    column = COLUMNS[sort_column]
+    direction = "DESC" if sort_order == Qt.DescendingOrder else "ASC"
+    return f"id {direction}" if column == "id" else f"{column} {direction}, id {direction}"
+
+
+def read_page(conn, time_range, sort_column, sort_order, last_row, page_size, table="sensor_data"):
+    """Lee la página que sigue a ``last_row`` (o la primera si es None)"""
+    column = COLUMNS[sort_column]
+    descending = sort_order == Qt.DescendingOrder
+    operator = "<" if descending else ">"
+
+    where = "timestamp >= ? AND timestamp < ?"
+    params = list(time_range)
+    if last_row is not None:
+        last_value = last_row[sort_column]
+        if column == "id":
+            where += f" AND id {operator} ?"
+            params.append(last_row[0])
+        elif column == "timestamp":
+            # timestamp nunca es NULL; la comparación de tuplas usa el índice
+            where += f" AND (timestamp, id) {operator} (?, ?)"
+            params.extend([last_value, last_row[0]])
+        elif last_value is None:
+            # SQLite ordena los NULL primero en ASC y al final en DESC
+            if descending:
+                where += f" AND {column} IS NULL AND id < ?"
+                params.append(last_row[0])
+            else:
+                where += f" AND (({column} IS NULL AND id > ?) OR {column} IS NOT NULL)"
+                params.append(last_row[0])
+        else:
+            null_rows = f" OR {column} IS NULL" if descending else ""
+            where += f" AND ({column} {operator} ? OR ({column} = ? AND id {operator} ?){null_rows})"
+            params.extend([last_value, last_value, last_row[0]])
+    params.append(page_size)
+
+    query = f"""
+    SELECT {", ".join(COLUMNS)}
+    FROM {table}
+    WHERE {where}
+    ORDER BY {order_clause(sort_column, sort_order)}
+    LIMIT ?
+    """
+    return conn.execute(query, params).fetchall()
+
+
+class SQLiteSource:
+    """Origen de datos por defecto: la base de datos.
+
+    ``table`` es ``sensor_data`` para los datos crudos o una de las vistas de
+    promedios por intervalo (``rollups.py``), que tienen las mismas columnas.
+    Para los datos crudos se adjuntan antes solo los días archivados del
+    rango y se consulta la vista ``partitions.RANGE_VIEW``.
+    """
+
+    read_only = False
+
+    def __init__(self, table="sensor_data"):
+        self.table = table
+
+    def parts(self, conn, time_range):
+        """Genera (tabla, rango) a consultar.
+
+        Los datos crudos se leen por tramos de a lo sumo MAX_ATTACHED días
+        (``partitions.split_range``), cada uno con sus días adjuntos.
+        """
+        if self.table != "sensor_data":
+            yield self.table, time_range
+            return
+        for part in split_range(conn, *time_range) or [time_range]:
+            attach_range(conn, part)
+            yield RANGE_VIEW, part
+
+    def read(self, conn, time_range, sort_column, sort_order, last_row, page_size):
+        """Página siguiente a ``last_row``; con varios tramos se unen sus páginas en orden"""
+        rows = []
+        parts = 0
+        for table, part in self.parts(conn, time_range):
+            rows += read_page(conn, part, sort_column, sort_order, last_row, page_size, table)
+            parts += 1
+        if parts > 1:
+            rows.sort(key=lambda row: sort_key(row, sort_column), reverse=sort_order == Qt.DescendingOrder)
+            del rows[page_size:]
+        return rows
+
+    def load_range(self, conn, task, time_range, sort_column, sort_order, page_size):
+        """Consulta de un filtro nuevo: envía primero la página inicial y luego el total"""
+        task.partial(self.read(conn, time_range, sort_column, sort_order, None, page_size))
+        task.progress("Contando registros...")
+        return sum(count_rows(conn, part, table) for table, part in self.parts(conn, time_range))
+
+    def load_page(self, conn, task, time_range, sort_column, sort_order, last_row, offset, page_size):
+        return self.read(conn, time_range, sort_column, sort_order, last_row, page_size)
+
+
+class ParquetSource:
+    """Archivo Parquet abierto como origen de solo lectura.
+
+    Al aplicar un filtro se leen solo las particiones del rango, se ordena
+    en Arrow y las páginas se toman de esa tabla ya ordenada.
+    """
+
+    read_only = True
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.dataset = open_dataset(directory)
+        self.table = None
+
+    def load_range(self, conn, task, time_range, sort_column, sort_order, page_size):
+        task.progress("Leyendo archivo Parquet...")
+        start = time.perf_counter()
+        table = self.dataset.to_table(columns=COLUMNS, filter=range_filter(time_range))
+        task.check()
+        direction = "descending" if sort_order == Qt.DescendingOrder else "ascending"
+        sort_keys = [(COLUMNS[sort_column], direction)]
+        if COLUMNS[sort_column] != "id":
+            sort_keys.append(("id", direction))
+        self.table = table.sort_by(sort_keys)
+        task.partial(table_rows(self.table.slice(0, page_size)))
+        task.progress(f"Archivo leído en {time.perf_counter() - start:.2f} s")
+        return self.table.num_rows
+
+    def load_page(self, conn, task, time_range, sort_column, sort_order, last_row, offset, page_size):
+        return table_rows(self.table.slice(offset, page_size))
+
+
+class SensorTableModel(QAbstractTableModel):
+    """Modelo de tabla que lee ``sensor_data`` por páginas.
+
+    Solo se consulta la página que la vista necesita (``canFetchMore`` /
+    ``fetchMore``), con paginación por clave: cada página continúa desde el
+    último valor de la columna ordenada y el id, en lugar de usar OFFSET.
+    El ordenamiento se resuelve en SQL y el texto de cada celda se genera
+    recién en ``data()``, así que solo se formatean las filas visibles.
+    Las consultas corren en el ``QueryWorker``; cuando cambia el filtro o el
+    orden, las que estaban en curso se cancelan. El origen de los datos es
+    intercambiable (``SQLiteSource`` o ``ParquetSource``).
+    """
+
+    total_changed = pyqtSignal(int)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, worker, page_size=500, parent=None):
+        super().__init__(parent)
+        self.worker = worker
+        self.source = SQLiteSource()
+        self.page_size = page_size
+        self.rows = []
+        self.total = 0
+        self.fetching = False
+        self.time_range = None  # (inicio, fin) como texto ISO, fin exclusivo
+        self.sort_column = COLUMNS.index("timestamp")
+        self.sort_order = Qt.DescendingOrder
+
+    def set_source(self, source):
+        """Cambia el origen de los datos (base de datos o archivo Parquet)"""
+        self.source = source
+        if self.time_range is not None:
+            self.reload()
+
+    def set_time_range(self, start, end):
+        """Carga los registros con start <= timestamp < end"""
+        self.time_range = (start, end)
+        self.reload()
+
+    def reload(self):
+        self.worker.cancel("pagina")
+        self.fetching = False
+        self.set_rows([])
+        self.worker.submit(
+            "filtro", self.source.load_range,
+            (self.time_range, self.sort_column, self.sort_order, self.page_size),
+            on_partial=self.set_rows, on_result=self.set_total, on_error=self.on_error
+        )
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.total = len(rows)
+        self.endResetModel()
+
+    def set_total(self, total):
+        self.total = total
+        self.total_changed.emit(total)
+
+    def append_rows(self, rows):
+        self.fetching = False
+        if not rows:
+            # La tabla cambió desde el conteo; no hay más filas que leer
+            self.total = len(self.rows)
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def on_error(self, message):
+        self.fetching = False
+        self.load_failed.emit(message)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return format_value(self.rows[index.row()][index.column()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.fetching and len(self.rows) < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        self.fetching = True
+        # Sin filas (se borraron entre el conteo y la primera página) se lee desde el principio
+        last_row = self.rows[-1] if self.rows else None
+        self.worker.submit(
+            "pagina", self.source.load_page,
+            (self.time_range, self.sort_column, self.sort_order, last_row, len(self.rows),
+             self.page_size),
+            on_result=self.append_rows, on_error=self.on_error
+        )
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Ordena en la base de datos y vuelve a cargar desde la primera página"""
+        self.sort_column = column
+        self.sort_order = order
+        if self.time_range is not None:
+            self.reload()
+
+
+# Texto constante: sqlite3 guarda la sentencia preparada en el caché de la
+# conexión persistente del QueryWorker y la reutiliza en cada actualización
+TAIL_SQL = f"""
+SELECT {", ".join(COLUMNS)}
+FROM sensor_data
+WHERE id > ?
+ORDER BY id DESC
+LIMIT ?
+"""
+
+
+def read_tail(conn, task, last_id, limit):
+    """Registros con id > last_id, a lo sumo los ``limit`` más nuevos, en orden ascendente"""
+    rows = conn.execute(TAIL_SQL, (last_id, limit)).fetchall()
+    rows.reverse()
+    return rows
+
+
+class TailTableModel(QAbstractTableModel):
+    """Últimos ``capacity`` registros para el modo tiempo real, el más nuevo primero.
+
+    Las filas se guardan en un buffer circular de tamaño fijo: agregar un
+    registro sobrescribe el más viejo, sin mover los demás. La vista recibe
+    solo las filas insertadas y quitadas (``beginInsertRows`` /
+    ``beginRemoveRows``) y el texto se genera recién en ``data()``.
+    """
+
+    def __init__(self, capacity=1000, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.buffer = [None] * capacity
+        self.head = 0  # Posición donde se escribe el próximo registro
+        self.size = 0  # Registros válidos en el buffer
+
+    def clear(self):
+        self.beginResetModel()
+        self.buffer = [None] * self.capacity
+        self.head = 0
+        self.size = 0
+        self.endResetModel()
+
+    def row_values(self, row):
+        # La fila 0 es el último registro escrito
+        return self.buffer[(self.head - 1 - row) % self.capacity]
+
+    def append_rows(self, rows):
+        """Agrega registros en orden ascendente de id y descarta los más viejos"""
+        rows = rows[-self.capacity:]
+        if not rows:
+            return
+        # Los registros que ya no entran están al final de la vista
+        overflow = self.size + len(rows) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), self.size - overflow, self.size - 1)
+            self.size -= overflow
+            self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), 0, len(rows) - 1)
+        for row in rows:
+            self.buffer[self.head] = row
+            self.head = (self.head + 1) % self.capacity
+        self.size += len(rows)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.size
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return format_value(self.row_values(index.row())[index.column()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
@@ -0,0 +1,94 @@
+import pathlib
+import sqlite3
+import subprocess
+import sys
+import threading
+import pytest
+from archive import export_parquet, import_parquet
+from database import Database
+from database_writer import INSERT_SQL, DatabaseWriter
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+class Task:
+    def __init__(self):
+        self.pages = []
+
+    def check(self):
+        pass
+
+    def partial(self, rows):
+        self.pages.append(rows)
+
+    def progress(self, message):
+        pass
+
+
+def create_database(path, rows=0):
+    Database(str(path), maintenance=False).close()
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(INSERT_SQL, [(f"2026-01-01 10:{i // 60:02d}:{i % 60:02d}", *[float(i)] * 10, "COM3")
+                                      for i in range(rows)])
+    return conn
+
+
+def test_headless_modules_do_not_import_qt():
+    # Un proceso nuevo: en este ya están cargados los módulos de Qt de otras pruebas
+    code = ("import sys, archive, data_export, ingest, serial_capture, replay; "
+            "print(sorted(m for m in sys.modules if m.startswith('PyQt5')))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_import_while_writer_is_running(tmp_path):
+    pytest.importorskip("pyarrow")
+    source = create_database(tmp_path / "origen.db", 3000)
+    count = export_parquet(source, Task(), str(tmp_path / "archivo"), "1 = 1", (), "id")
+    assert count == 3000
+
+    db_path = str(tmp_path / "sensor_data.db")
+    create_database(db_path)
+    writer = DatabaseWriter(db_path, batch_size=50, flush_interval=0.01)
+    stop = threading.Event()
+
+    def capture():
+        while not stop.is_set():
+            writer.put(("2026-01-02 00:00:00.000000", *[1.0] * 10, None))
+            stop.wait(0.001)
+
+    thread = threading.Thread(target=capture)
+    thread.start()
+    try:
+        assert import_parquet(db_path, str(tmp_path / "archivo"), batch_size=200) == 3000
+    finally:
+        stop.set()
+        thread.join()
+        writer.close()
+
+    stats = writer.stats()
+    assert stats["dropped"] == 0
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT count(*) FROM sensor_data").fetchone()[0] == 3000 + stats["total_written"]
+    assert conn.execute("SELECT count(*) FROM sensor_data WHERE link = 'COM3'").fetchone()[0] == 3000
+    # Ninguna fila quedó contada dos veces (ni ninguna sin contar) en los agregados
+    for table in ("sensor_rollup_10s", "sensor_rollup_1m", "sensor_rollup_1h"):
+        assert conn.execute(f"SELECT sum(count) FROM {table}").fetchone()[0] == 3000 + stats["total_written"]
+
+
+def test_parquet_source_pages_in_sort_order(tmp_path):
+    pytest.importorskip("pyarrow")
+    from PyQt5.QtCore import Qt
+    from table_models import COLUMNS, ParquetSource
+    source = create_database(tmp_path / "origen.db", 10)
+    export_parquet(source, Task(), str(tmp_path / "archivo"), "1 = 1", (), "id")
+
+    parquet = ParquetSource(str(tmp_path / "archivo"))
+    task = Task()
+    time_range = ("2026-01-01 10:00:03", "2026-01-02 00:00:00")
+    column = COLUMNS.index("temperature")
+    assert parquet.load_range(None, task, time_range, column, Qt.DescendingOrder, 4) == 7
+    assert [row[column] for row in task.pages[0]] == [9.0, 8.0, 7.0, 6.0]
+    page = parquet.load_page(None, task, time_range, column, Qt.DescendingOrder, task.pages[0][-1], 4, 4)
+    assert [row[1] for row in page] == ["2026-01-01 10:00:05", "2026-01-01 10:00:04", "2026-01-01 10:00:03"]
@@ -0,0 +1,68 @@
+import sqlite3
+from PyQt5.QtCore import Qt
+from database import Database
+from database_writer import INSERT_SQL
+from partitions import RANGE_VIEW, attach_range, rotate_days
+from table_models import COLUMNS, count_rows, read_page
+
+RANGE = ("2026-01-01 00:00:00", "2026-02-01 00:00:00")
+
+
+class QueryPlan:
+    """Conexión que devuelve el plan de cada consulta en lugar de ejecutarla"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.plans = []
+
+    def execute(self, query, params=()):
+        plan = self.conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+        self.plans.append(" ".join(row[-1] for row in plan))
+        return self.conn.execute("SELECT 0")
+
+
+def create_database(tmp_path):
+    db = Database(str(tmp_path / "sensor_data.db"), maintenance=False)
+    db.close()
+    return sqlite3.connect(tmp_path / "sensor_data.db")
+
+
+def test_range_count_uses_timestamp_index(tmp_path):
+    conn = QueryPlan(create_database(tmp_path))
+    count_rows(conn, RANGE)
+    assert "idx_sensor_data_timestamp" in conn.plans[0]
+
+
+def test_range_page_uses_timestamp_index(tmp_path):
+    conn = QueryPlan(create_database(tmp_path))
+    # Primera página y página siguiente del filtro por fecha, ordenado por fecha
+    column = COLUMNS.index("timestamp")
+    read_page(conn, RANGE, column, Qt.DescendingOrder, None, 500)
+    last_row = (10, "2026-01-15 12:00:00") + (None,) * (len(COLUMNS) - 2)
+    read_page(conn, RANGE, column, Qt.DescendingOrder, last_row, 500)
+    for plan in conn.plans:
+        assert "idx_sensor_data_timestamp" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def test_range_view_uses_timestamp_index_of_each_day(tmp_path):
+    conn = create_database(tmp_path)
+    rows = [(f"2026-01-0{day} {hour:02d}:00:00", *[1.0] * 10, None) for day in (1, 2, 3) for hour in range(24)]
+    with conn:
+        conn.executemany(INSERT_SQL, rows)
+    # Dos días archivados en sus archivos y el tercero en la base principal
+    rotate_days(conn, str(tmp_path / "sensor_data.db"), "2026-01-03")
+    time_range = ("2026-01-01 00:00:00", "2026-01-04 00:00:00")
+    attach_range(conn, time_range)
+
+    plans = QueryPlan(conn)
+    count_rows(plans, time_range, RANGE_VIEW)
+    column = COLUMNS.index("timestamp")
+    read_page(plans, time_range, column, Qt.DescendingOrder, None, 500, RANGE_VIEW)
+    last_row = (30, "2026-01-02 12:00:00") + (None,) * (len(COLUMNS) - 2)
+    read_page(plans, time_range, column, Qt.DescendingOrder, last_row, 500, RANGE_VIEW)
+    for plan in plans.plans:
+        for table in ("main", "dia_20260101", "dia_20260102"):
+            assert f"SEARCH {table}.sensor_data USING INDEX idx_sensor_data_timestamp" in plan
+    for plan in plans.plans[1:]:
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,50 @@
+import sqlite3
+import threading
+import database_writer
+from database import Database
+from database_writer import DatabaseWriter
+
+ROW = ("2026-01-01 12:00:00.000000", *[1.0] * 10, None)
+
+
+def create_database(tmp_path):
+    db_path = str(tmp_path / "sensor_data.db")
+    Database(db_path, maintenance=False).close()
+    return db_path
+
+
+def lock_database(db_path, seconds):
+    """Toma el bloqueo de escritura desde otra conexión durante ``seconds``"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("BEGIN IMMEDIATE")
+    timer = threading.Timer(seconds, lambda: (conn.rollback(), conn.close()))
+    timer.start()
+    return timer
+
+
+def test_locked_batch_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_writer, "BUSY_TIMEOUT_MS", 200)
+    db_path = create_database(tmp_path)
+    timer = lock_database(db_path, 0.3)
+    writer = DatabaseWriter(db_path, flush_interval=0.05)
+    for _ in range(10):
+        writer.put(ROW)
+    writer.close()
+    timer.join()
+    stats = writer.stats()
+    assert (stats["total_written"], stats["dropped"], stats["write_errors"]) == (10, 0, 0)
+
+
+def test_batch_that_cannot_be_written_counts_as_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_writer, "BUSY_TIMEOUT_MS", 50)
+    db_path = create_database(tmp_path)
+    timer = lock_database(db_path, 2)
+    writer = DatabaseWriter(db_path, flush_interval=0.05)
+    for _ in range(10):
+        writer.put(ROW)
+    writer.close()
+    timer.join()
+    stats = writer.stats()
+    assert stats["total_written"] == 0
+    assert stats["dropped"] == 10
+    assert stats["write_errors"] >= 1
@@ -0,0 +1,66 @@
+import numpy as np
+from decimation import minmax_decimate, simplify_track
+
+
+def test_short_track_is_kept():
+    assert list(simplify_track([1.0, 2.0, 3.0], [4.0, 5.0, 6.0])) == [0, 1, 2]
+
+
+def test_simplify_keeps_corners_of_track():
+    # Dos tramos rectos con muchos puntos y una esquina en el índice 600
+    lat = np.concatenate([np.linspace(-12.0, -12.1, 601), np.full(400, -12.1)])
+    lon = np.concatenate([np.full(601, -77.0), np.linspace(-77.0, -77.1, 401)[1:]])
+    lon[300] += 0.01  # Desvío brusco hacia un costado
+    keep = simplify_track(lat, lon, max_points=10)
+    assert len(keep) <= 10
+    assert np.all(np.diff(keep) > 0)
+    assert keep[0] == 0 and keep[-1] == len(lat) - 1
+    assert 300 in keep and 600 in keep
+
+
+def test_tolerance_stops_on_straight_track():
+    lat = np.linspace(-12.0, -12.1, 1000)
+    lon = np.linspace(-77.0, -77.1, 1000)
+    assert list(simplify_track(lat, lon, max_points=500, tolerance=1e-9)) == [0, 999]
+
+
+def test_short_series_is_kept():
+    assert list(minmax_decimate(range(8), range(8), 2)) == list(range(8))
+
+
+def test_keeps_first_last_min_and_max_of_each_bin():
+    rng = np.random.default_rng(3)
+    x = np.arange(10000, dtype=float)
+    y = rng.normal(size=len(x))
+    y[1234] = 50.0
+    y[8765] = -50.0
+    bins = 100
+    keep = minmax_decimate(x, y, bins)
+
+    assert len(keep) <= 4 * bins
+    assert np.all(np.diff(keep) > 0)
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert 1234 in keep and 8765 in keep
+    for start in range(0, len(x), 100):
+        segment = y[start:start + 100]
+        assert start in keep and start + 99 in keep
+        assert start + np.argmin(segment) in keep
+        assert start + np.argmax(segment) in keep
+
+
+def test_nan_values_are_ignored():
+    x = np.arange(100, dtype=float)
+    y = np.sin(x)
+    y[10:20] = np.nan  # Intervalo entero sin valores
+    y[33] = np.nan
+    keep = minmax_decimate(x, y, 10)
+    assert np.all(np.diff(keep) > 0)
+    assert keep[-1] == 99
+    # Del intervalo sin valores quedan solo sus extremos
+    assert [i for i in keep if 10 <= i < 20] == [10, 19]
+    assert np.nanmax(y[30:40]) in y[keep] and np.nanmin(y[30:40]) in y[keep]
+
+
+def test_constant_x():
+    keep = minmax_decimate(np.zeros(50), np.arange(50.0), 5)
+    assert list(keep) == [0, 49]
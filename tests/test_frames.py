@@ -0,0 +1,85 @@
+import json
+import math
+import struct
+from conect.frames import FRAME_SIZE, SYNC, crc16, decode_frames, encode_frame, encode_sample, has_fix
+from conect.serial_client import SerialDataClient
+
+VALUES = (0.5, -0.25, 9.75, 1.0, 2.0, 3.0, -12.046374, -77.042793, 4.5, 21.5)
+
+
+def collect(client):
+    samples = []
+    client.set_callback(samples.append)
+    return samples
+
+
+def test_crc16_check_value():
+    assert crc16(b"123456789") == 0x29B1
+
+
+def test_decode_round_trip_and_missing_gps():
+    missing = VALUES[:6] + (float("nan"), None) + VALUES[8:]
+    buffer = encode_frame(1, 1000, VALUES) + encode_frame(2, 2000, missing)
+    frames, consumed = decode_frames(buffer)
+    assert consumed == 2 * FRAME_SIZE
+    (seq, ticks, values), (seq2, ticks2, values2) = frames
+    assert (seq, ticks, seq2, ticks2) == (1, 1000, 2, 2000)
+    assert values[:6] + values[8:] == VALUES[:6] + VALUES[8:]
+    assert values[6:8] == (-12.046374, -77.042793)  # Millonésimas de grado exactas
+    assert math.isnan(values2[6]) and math.isnan(values2[7])
+
+
+def test_decode_stops_at_incomplete_or_corrupt_frame():
+    frame = encode_frame(1, 0, VALUES)
+    assert decode_frames(frame[:-1]) == ([], 0)
+    corrupt = bytearray(frame)
+    corrupt[10] ^= 0xFF
+    frames, consumed = decode_frames(frame + bytes(corrupt) + frame)
+    assert len(frames) == 1 and consumed == FRAME_SIZE
+    assert decode_frames(bytes(corrupt)) == ([], 0)
+
+
+def test_feed_garbage_split_frames_and_json():
+    client = SerialDataClient()
+    samples = collect(client)
+    frame = encode_frame(7, 100, VALUES)
+    corrupt = bytearray(encode_frame(8, 110, VALUES))
+    corrupt[-1] ^= 0xFF
+    stream = (b"\x00\xffbasura\n" + frame + SYNC + b"\x01" + bytes(corrupt)
+              + encode_sample("json", 9, 120, VALUES) + b"{no es json\n" + encode_frame(10, 130, VALUES))
+
+    # Bloques de tamaños distintos: las tramas quedan partidas entre lecturas
+    pos = 0
+    for size in [1, 2, 3, 5, 8, 13, 21] * 10:
+        client.feed(stream[pos:pos + size])
+        pos += size
+    client.feed(stream[pos:])
+
+    assert [s["seq"] for s in samples] == [7, 9, 10]
+    assert samples[1]["temperature"] == 21.5
+    assert samples[0]["gps"] == {"lat": -12.046374, "lon": -77.042793}
+    # Basura, sincronismo suelto, CRC inválido y línea que no es JSON
+    assert client.parse_errors == 4
+    assert not client.buffer
+
+
+def test_json_line_matches_frame():
+    client = SerialDataClient()
+    samples = collect(client)
+    client.feed(encode_sample("json", 3, 50, VALUES) + encode_sample("binario", 3, 50, VALUES))
+    from_json, from_frame = samples
+    assert from_json == from_frame
+    assert json.loads(encode_sample("json", 70000, 0, VALUES))["seq"] == 70000 & 0xFFFF
+    assert struct.unpack_from("<H", encode_frame(70000, 0, VALUES), 3)[0] == 70000 & 0xFFFF
+
+
+def test_samples_without_gps_have_no_fix():
+    client = SerialDataClient()
+    samples = collect(client)
+    missing = VALUES[:6] + (float("nan"), float("nan")) + VALUES[8:]
+    client.feed(encode_frame(1, 0, VALUES) + encode_frame(2, 10, missing)
+                + b'{"accel": {"x": 0, "y": 0, "z": 0}, "gyro": {"roll": 0, "pitch": 0, "yaw": 0}, '
+                  b'"gps": {"lat": null, "lon": -77.0}, "uv_index": 0, "temperature": 20}\n')
+    fixes = [has_fix(s["gps"]["lat"], s["gps"]["lon"]) for s in samples]
+    assert fixes == [True, False, False]
+    assert not has_fix(float("inf"), 0.0)
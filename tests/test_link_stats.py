@@ -0,0 +1,63 @@
+from conect.frames import TICKS_MODULO, decode_frames, encode_frame, encode_sample
+from link_stats import SEQ_MODULO, WINDOW, LinkStats
+
+
+def feed(stats, seqs):
+    for seq in seqs:
+        stats.on_frame(seq)
+    return stats
+
+
+def test_late_frame_recovers_lost():
+    stats = feed(LinkStats(), [10, 9, 11])
+    # 9 es anterior a la primera trama: nunca se contó como perdida
+    assert (stats.lost, stats.out_of_order, stats.gaps) == (0, 1, 0)
+
+    stats = feed(LinkStats(), [1, 2, 5, 3, 4, 6])
+    assert (stats.gaps, stats.lost, stats.out_of_order, stats.duplicates) == (1, 0, 2, 0)
+
+
+def test_duplicates_are_not_recovered_losses():
+    stats = feed(LinkStats(), [1, 4, 4, 3, 3, 1])
+    assert stats.gaps == 1
+    assert stats.lost == 1  # Solo 2 sigue perdida
+    assert stats.duplicates == 3
+    assert stats.out_of_order == 1
+
+
+def test_sequence_wraps_at_16_bits():
+    stats = feed(LinkStats(), [SEQ_MODULO - 2, SEQ_MODULO - 1, 0, 2, 1])
+    assert (stats.gaps, stats.lost, stats.out_of_order, stats.resets) == (1, 0, 1, 0)
+
+
+def test_long_gap_and_restart():
+    stats = feed(LinkStats(), [0, WINDOW + 10])
+    assert stats.lost == WINDOW + 9
+    stats.on_frame(WINDOW + 5)
+    assert stats.lost == WINDOW + 8
+    # Un salto hacia atrás fuera de la ventana es un reinicio del ESP32
+    stats.on_frame(1)
+    assert stats.resets == 1
+    assert stats.lost == WINDOW + 8
+
+
+def test_ticks_wrap_is_not_a_reset():
+    stats = LinkStats()
+    for i, ticks in enumerate([TICKS_MODULO - 20, TICKS_MODULO - 10, 0, 10]):
+        stats.on_bytes(1, received=100 + i * 0.01)
+        stats.on_frame(i, ticks)
+    assert stats.resets == 0
+    assert stats.clock == TICKS_MODULO + 10
+    assert stats.jitter_ms < 1
+    stats.on_bytes(1, received=101)
+    stats.on_frame(4, 60000)
+    stats.on_frame(0, 0)  # ticks_ms retrocede un minuto: el ESP32 se reinició
+    assert stats.resets == 1
+    assert stats.lost == 0
+
+
+def test_senders_wrap_ticks_like_the_firmware():
+    values = (0.0,) * 10
+    (frame,), _ = decode_frames(encode_frame(1, TICKS_MODULO + 5, values))
+    assert frame[1] == 5
+    assert b'"ticks_ms": 5' in encode_sample("json", 1, TICKS_MODULO + 5, values)
@@ -0,0 +1,78 @@
+import threading
+import time
+from datetime import datetime
+from live_feed import LiveFeed, LiveSubscriber
+
+ROW = (datetime(2026, 1, 1, 12, 0, 0), 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, -12.0464, -77.0428, 7.0, 25.0)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "tiempo de espera agotado"
+        time.sleep(0.01)
+
+
+def publish_until_received(feed, subscriber, count):
+    """Publica hasta que el suscriptor recibe ``count`` muestras en total"""
+    deadline = time.monotonic() + 5.0
+    while subscriber.received < count:
+        assert time.monotonic() < deadline, "no llegaron las muestras publicadas"
+        feed.publish(ROW)
+        time.sleep(0.02)
+
+
+def test_subscriber_reconnects_after_publisher_restart():
+    feed = LiveFeed()
+    feed.start()
+    port = feed.port
+    samples = []
+    subscriber = LiveSubscriber(port, reconnect_min=0.05, reconnect_max=0.2)
+    subscriber.set_callback(samples.append)
+    reader = threading.Thread(target=subscriber.start_reading, daemon=True)
+    reader.start()
+    try:
+        wait_for(lambda: subscriber.sock is not None)
+        publish_until_received(feed, subscriber, 1)
+
+        # La ingesta se cierra: la interfaz debe mostrar que no hay conexión
+        feed.close()
+        wait_for(lambda: subscriber.sock is None)
+
+        # La ingesta vuelve a iniciar en el mismo puerto: la recepción sigue sola
+        feed = LiveFeed(port)
+        feed.start()
+        wait_for(lambda: subscriber.sock is not None)
+        received = subscriber.received
+        publish_until_received(feed, subscriber, received + 1)
+        assert subscriber.connections == 2
+        assert subscriber.skipped == 0  # El nuevo publicador numera desde 1
+        assert samples[-1]["temperature"] == 25.0
+    finally:
+        subscriber.stop()
+        feed.close()
+    reader.join(5)
+    assert not reader.is_alive()
+
+
+def test_subscriber_waits_for_publisher_to_start():
+    feed = LiveFeed()
+    feed.start()
+    port = feed.port
+    feed.close()
+
+    subscriber = LiveSubscriber(port, reconnect_min=0.05, reconnect_max=0.2)
+    reader = threading.Thread(target=subscriber.start_reading, daemon=True)
+    reader.start()
+    try:
+        time.sleep(0.2)
+        assert subscriber.sock is None
+        feed = LiveFeed(port)
+        feed.start()
+        wait_for(lambda: subscriber.sock is not None)
+        publish_until_received(feed, subscriber, 1)
+    finally:
+        subscriber.stop()
+        feed.close()
+    reader.join(5)
+    assert not reader.is_alive()
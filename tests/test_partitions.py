@@ -0,0 +1,76 @@
+import os
+import sqlite3
+from datetime import date, timedelta
+import pytest
+from database import Database
+from database_writer import INSERT_SQL
+from partitions import (MAX_ATTACHED, RANGE_VIEW, attach_range, detach_range, partition_path,
+                        rotate_days, split_range)
+
+
+def create_database(tmp_path, days):
+    db_path = str(tmp_path / "sensor_data.db")
+    db = Database(db_path, maintenance=False)
+    db.close()
+    conn = sqlite3.connect(db_path)
+    first = date(2026, 1, 1)
+    rows = [(f"{first + timedelta(days=d)} {hour:02d}:30:00", *[float(d)] * 10, None)
+            for d in range(days) for hour in (0, 12, 23)]
+    with conn:
+        conn.executemany(INSERT_SQL, rows)
+    return conn, db_path
+
+
+def test_split_range_covers_all_days(tmp_path):
+    conn, db_path = create_database(tmp_path, 25)
+    rotate_days(conn, db_path, "2026-01-20")
+    ranges = split_range(conn)
+    assert ranges[0][0] == "2026-01-01 00:30:00"
+    assert ranges[-1][1] == "2026-01-26"
+    for (start, stop), (next_start, _) in zip(ranges, ranges[1:]):
+        assert stop == next_start
+    for start, stop in ranges:
+        days = (date.fromisoformat(stop[:10]) - date.fromisoformat(start[:10])).days
+        assert 0 < days <= MAX_ATTACHED
+
+    # Cada tramo se puede adjuntar y entre todos se leen todas las filas
+    total = 0
+    for time_range in ranges:
+        attach_range(conn, time_range)
+        total += conn.execute(f"SELECT count(*) FROM {RANGE_VIEW} WHERE timestamp >= ? AND timestamp < ?",
+                              time_range).fetchone()[0]
+    assert total == 25 * 3
+    assert split_range(conn, "2026-01-05", "2026-01-07") == [("2026-01-05", "2026-01-07")]
+
+
+def test_rotate_days_moves_rows_to_day_files(tmp_path):
+    conn, db_path = create_database(tmp_path, 4)
+    assert rotate_days(conn, db_path, "2026-01-03") == 6
+    assert rotate_days(conn, db_path, "2026-01-03") == 0
+    assert conn.execute("SELECT min(timestamp), count(*) FROM main.sensor_data").fetchone() == (
+        "2026-01-03 00:30:00", 6)
+    assert conn.execute("SELECT day, first_ts, last_ts, rows FROM partitions ORDER BY day").fetchall() == [
+        ("2026-01-01", "2026-01-01 00:30:00", "2026-01-01 23:30:00", 3),
+        ("2026-01-02", "2026-01-02 00:30:00", "2026-01-02 23:30:00", 3),
+    ]
+    assert os.path.exists(partition_path(db_path, "2026-01-01"))
+
+    time_range = ("2026-01-01 12:00:00", "2026-01-03 12:00:00")
+    attach_range(conn, time_range)
+    rows = conn.execute(f"SELECT timestamp, temperature FROM {RANGE_VIEW} WHERE timestamp >= ? AND timestamp < ? "
+                        "ORDER BY timestamp", time_range).fetchall()
+    assert rows == [("2026-01-01 12:30:00", 0.0), ("2026-01-01 23:30:00", 0.0),
+                    ("2026-01-02 00:30:00", 1.0), ("2026-01-02 12:30:00", 1.0),
+                    ("2026-01-02 23:30:00", 1.0), ("2026-01-03 00:30:00", 2.0)]
+
+    # Un rango solo del día en curso no adjunta archivos
+    attach_range(conn, ("2026-01-04 00:00:00", "2026-01-05 00:00:00"))
+    assert not [row for row in conn.execute("PRAGMA database_list") if row[1].startswith("dia_")]
+    detach_range(conn)
+
+
+def test_attach_range_limit(tmp_path):
+    conn, db_path = create_database(tmp_path, MAX_ATTACHED + 2)
+    rotate_days(conn, db_path, "2026-02-01")
+    with pytest.raises(RuntimeError):
+        attach_range(conn, ("2026-01-01", "2026-02-01"))
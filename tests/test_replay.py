@@ -0,0 +1,35 @@
+import sqlite3
+from conect.frames import sample_from_values
+from database import Database
+from database_writer import DatabaseWriter
+from ingest import IngestService
+from replay import TelemetryReplay
+
+ROW = ("2026-01-01 12:00:00.000000", *[1.0] * 10, None)
+
+
+def test_blocking_put_waits_for_the_writer(tmp_path):
+    db_path = str(tmp_path / "sensor_data.db")
+    Database(db_path, maintenance=False).close()
+    writer = DatabaseWriter(db_path, max_queue=10, batch_size=5)
+    for _ in range(500):
+        assert writer.put(ROW, block=True)
+    writer.close()
+    stats = writer.stats()
+    assert (stats["total_written"], stats["dropped"]) == (500, 0)
+
+
+def test_replay_at_full_speed_writes_every_sample(tmp_path):
+    db_path = str(tmp_path / "sensor_data.db")
+    samples = [(i * 0.01, sample_from_values([float(i)] * 10)) for i in range(30000)]
+    replay = TelemetryReplay(iter(samples), speed=0)
+    service = IngestService(db_path, source=replay, source_kind="replay")
+    assert service.backpressure
+    service.start()
+    assert replay.done.wait(60)
+    service.close()
+
+    stats = service.db.stats()
+    assert (replay.stats()["delivered"], stats["total_written"], stats["dropped"]) == (30000, 30000, 0)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT count(*) FROM sensor_data").fetchone()[0] == 30000
@@ -0,0 +1,103 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from database import Database
+from database_writer import INSERT_SQL
+from rollups import CHANNELS, ROLLUPS, backfill_rollups, rollup_table, rollup_view, update_rollups
+
+
+def create_database(tmp_path):
+    db = Database(str(tmp_path / "sensor_data.db"), maintenance=False)
+    db.close()
+    return sqlite3.connect(tmp_path / "sensor_data.db")
+
+
+def sample_rows(count, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, 23, 58, 0)
+    rows = []
+    for i in range(count):
+        t = start + timedelta(seconds=i * 0.7)
+        # Algunos canales sin dato, para que el promedio no divida por todas las muestras
+        values = [None if rng.random() < 0.1 else rng.uniform(-50, 50) for _ in CHANNELS]
+        rows.append((t.isoformat(" ", "microseconds"), *values, None))
+    return rows
+
+
+def insert_batches(conn, rows, sizes):
+    """Inserta las filas en lotes de tamaños variados, actualizando los agregados como la ingesta"""
+    pos = 0
+    while pos < len(rows):
+        for size in sizes:
+            batch = rows[pos:pos + size]
+            if not batch:
+                break
+            with conn:
+                after_id = conn.execute("SELECT coalesce(max(id), 0) FROM sensor_data").fetchone()[0]
+                conn.executemany(INSERT_SQL, batch)
+                update_rollups(conn, after_id)
+            pos += size
+
+
+def raw_means(conn, bucket):
+    means = ", ".join(f"avg({c})" for c in CHANNELS)
+    return conn.execute(f"SELECT {bucket}, {means} FROM sensor_data GROUP BY 1 ORDER BY 1").fetchall()
+
+
+def rollup_rows(conn, name):
+    return conn.execute(f"SELECT timestamp, {', '.join(CHANNELS)} FROM {rollup_view(name)} "
+                        "ORDER BY timestamp").fetchall()
+
+
+def assert_same_rows(actual, expected):
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected):
+        assert got[0] == want[0]
+        assert got[1:] == pytest.approx(want[1:])
+
+
+def test_incremental_rollups_match_raw_means(tmp_path):
+    conn = create_database(tmp_path)
+    # Cruza el cambio de minuto, de hora y de día; los lotes parten intervalos
+    insert_batches(conn, sample_rows(600), [1, 7, 33, 120])
+    for name, _, bucket in ROLLUPS:
+        assert_same_rows(rollup_rows(conn, name), raw_means(conn, bucket))
+    counts = [conn.execute(f"SELECT sum(count) FROM {rollup_table(name)}").fetchone()[0] for name, _, _ in ROLLUPS]
+    assert counts == [600] * len(ROLLUPS)
+
+
+def test_backfill_matches_incremental(tmp_path):
+    conn = create_database(tmp_path)
+    insert_batches(conn, sample_rows(300, seed=2), [50])
+    incremental = {name: conn.execute(f"SELECT * FROM {rollup_table(name)} ORDER BY bucket").fetchall()
+                   for name, _, _ in ROLLUPS}
+    with conn:
+        backfill_rollups(conn)
+    for name, _, _ in ROLLUPS:
+        backfilled = conn.execute(f"SELECT * FROM {rollup_table(name)} ORDER BY bucket").fetchall()
+        assert len(backfilled) == len(incremental[name])
+        for got, want in zip(backfilled, incremental[name]):
+            assert got == pytest.approx(want)
+
+
+def test_new_database_skips_backfill_message(tmp_path, capsys):
+    create_database(tmp_path)
+    assert "Calculando agregados" not in capsys.readouterr().out
+
+
+def test_migration_backfills_existing_rows(tmp_path, capsys):
+    conn = sqlite3.connect(tmp_path / "sensor_data.db")
+    # Base de una versión anterior a los agregados, con datos
+    conn.execute("CREATE TABLE sensor_data (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME, "
+                 f"{', '.join(f'{c} REAL' for c in CHANNELS)})")
+    conn.execute("PRAGMA user_version = 1")
+    with conn:
+        conn.executemany(f"INSERT INTO sensor_data (timestamp, {', '.join(CHANNELS)}) VALUES "
+                         f"(?, {', '.join('?' * len(CHANNELS))})",
+                         [row[:-1] for row in sample_rows(50)])
+    conn.close()
+
+    conn = create_database(tmp_path)
+    assert "Calculando agregados" in capsys.readouterr().out
+    assert conn.execute(f"SELECT sum(count) FROM {rollup_table('1h')}").fetchone()[0] == 50
@@ -0,0 +1,70 @@
+import sqlite3
+from database import Database
+from database_writer import INSERT_SQL
+from table_models import SensorTableModel
+
+RANGE = ("2026-01-01 00:00:00", "2026-01-02 00:00:00")
+
+
+class SyncTask:
+    def __init__(self, on_partial):
+        self.on_partial = on_partial
+
+    def partial(self, result):
+        self.on_partial(result)
+
+    def progress(self, message):
+        pass
+
+
+class SyncWorker:
+    """Ejecuta las consultas en el momento, en lugar de en el hilo del QueryWorker"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def cancel(self, kind):
+        pass
+
+    def submit(self, kind, func, args=(), on_result=None, on_partial=None, on_error=None):
+        result = func(self.conn, SyncTask(on_partial), *args)
+        if on_result:
+            on_result(result)
+
+
+def create_model(tmp_path, count):
+    db = Database(str(tmp_path / "sensor_data.db"), maintenance=False)
+    db.close()
+    conn = sqlite3.connect(tmp_path / "sensor_data.db")
+    with conn:
+        conn.executemany(INSERT_SQL, [(f"2026-01-01 00:00:{i:02d}", *[float(i)] * 10, None)
+                                      for i in range(count)])
+    model = SensorTableModel(SyncWorker(conn), page_size=2)
+    model.set_time_range(*RANGE)
+    return model, conn
+
+
+def test_fetch_more_pages_until_total(tmp_path):
+    model, _ = create_model(tmp_path, 5)
+    assert (model.rowCount(), model.total) == (2, 5)
+    while model.canFetchMore():
+        model.fetchMore()
+    assert [row[1] for row in model.rows] == [f"2026-01-01 00:00:0{i}" for i in (4, 3, 2, 1, 0)]
+
+
+def test_fetch_more_without_rows_reads_first_page(tmp_path):
+    model, conn = create_model(tmp_path, 3)
+    # El conteo vio filas pero la primera página llegó vacía
+    model.set_rows([])
+    model.total = 3
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 2
+
+    with conn:
+        conn.execute("DELETE FROM sensor_data")
+    model.set_rows([])
+    model.total = 3
+    model.fetchMore()
+    assert model.rowCount() == 0
+    assert not model.canFetchMore()